@@ -1,5 +1,6 @@
 import os
 import urllib
+from concurrent.futures import TimeoutError
 from datetime import datetime, timedelta, timezone
 from time import monotonic
 
@@ -16,7 +17,7 @@ from flask import (
     url_for
 )
 from flask._compat import string_types
-from flask.globals import _lookup_req_object, _request_ctx_stack
+from flask.globals import _request_ctx_stack, _request_ctx_err_msg
 from flask_login import LoginManager
 from flask_wtf import CSRFProtect
 from flask_wtf.csrf import CSRFError
@@ -36,7 +37,15 @@ from werkzeug.local import LocalProxy
 
 from app import proxy_fix
 from app.asset_fingerprinter import AssetFingerprinter
+from app.cache import ExpiringCache
+from app.event_streams import EventStreams
+from app.upload_checks import UploadChecks
 from app.its_dangerous_session import ItsdangerousSessionInterface
+from app.notify_client.circuit_breaker import CircuitBreakers
+from app.notify_client.json_decoder import JSONDecoder
+from app.notify_client.request_budgets import RequestBudgets
+from app.notify_client.token_cache import TokenCache
+from app.pooled_sessions import PooledSessions
 from app.notify_client.service_api_client import ServiceAPIClient
 from app.notify_client.api_key_api_client import ApiKeyApiClient
 from app.notify_client.invite_api_client import InviteApiClient
@@ -75,9 +84,44 @@ statsd_client = StatsdClient()
 letter_jobs_client = LetterJobsClient()
 inbound_number_client = InboundNumberClient()
 billing_api_client = BillingAPIClient()
+pooled_sessions = PooledSessions()
+circuit_breakers = CircuitBreakers()
+request_budgets = RequestBudgets()
+json_decoder = JSONDecoder()
+api_token_cache = TokenCache()
+event_streams = EventStreams()
+# the data behind partials which pages poll for, shared by everyone looking at the same service or job
+partials_data_cache = ExpiringCache(key_prefix='partials-data/', ttl_config_key='MICRO_CACHE_TTL_SECONDS')
+# what we found when checking an uploaded spreadsheet, so looking at it again doesn’t mean checking it again
+parsed_upload_cache = ExpiringCache(key_prefix='parsed-upload/', ttl_config_key='PARSED_UPLOAD_CACHE_TTL_SECONDS')
+upload_checks = UploadChecks()
+
+
+def _lookup_current_service():
+    top = _request_ctx_stack.top
+    if top is None:
+        raise RuntimeError(_request_ctx_err_msg)
+    # only fetched the first time something looks at it - plenty of pages never do
+    if not hasattr(top, 'service'):
+        service_id = getattr(top, 'service_id', None)
+        top.service = service_api_client.get_service(service_id)['data'] if service_id else None
+    return top.service
+
+
+def _lookup_current_service_for_page():
+    # for things on every page, like the footer: a page which isn’t for a service only gets the service if
+    # something else has already fetched it, rather than fetching it just for them
+    top = _request_ctx_stack.top
+    if top is None:
+        raise RuntimeError(_request_ctx_err_msg)
+    if hasattr(top, 'service') or (top.request.view_args or {}).get('service_id'):
+        return _lookup_current_service()
+    return None
+
 
 # The current service attached to the request stack.
-current_service = LocalProxy(partial(_lookup_req_object, 'service'))
+current_service = LocalProxy(_lookup_current_service)
+current_service_for_page = LocalProxy(_lookup_current_service_for_page)
 
 
 def create_app():
@@ -94,6 +138,15 @@ def create_app():
     logging.init_app(application, statsd_client)
     init_csrf(application)
     request_id.init_app(application)
+    pooled_sessions.init_app(application, statsd_client)
+    circuit_breakers.init_app(application, statsd_client)
+    request_budgets.init_app(application, statsd_client)
+    json_decoder.init_app(application)
+    api_token_cache.init_app(application)
+    event_streams.init_app(application, statsd_client)
+    partials_data_cache.init_app(application)
+    parsed_upload_cache.init_app(application)
+    upload_checks.init_app(application, statsd_client)
 
     service_api_client.init_app(application)
     user_api_client.init_app(application)
@@ -149,10 +202,11 @@ def create_app():
     application.after_request(useful_headers_after_request)
     application.after_request(save_service_after_request)
     application.before_request(load_service_before_request)
+    application.after_request(record_whether_service_was_fetched)
 
     @application.context_processor
     def _attach_current_service():
-        return {'current_service': current_service}
+        return {'current_service': current_service, 'current_service_for_page': current_service_for_page}
 
     register_errorhandlers(application)
 
@@ -407,7 +461,17 @@ def load_service_before_request():
     service_id = request.view_args.get('service_id', session.get('service_id')) if request.view_args \
         else session.get('service_id')
     if _request_ctx_stack.top is not None:
-        _request_ctx_stack.top.service = service_api_client.get_service(service_id)['data'] if service_id else None
+        # the service itself isn’t fetched until something uses `current_service`
+        _request_ctx_stack.top.service_id = service_id
+
+
+def record_whether_service_was_fetched(response):
+    top = _request_ctx_stack.top
+    if top is not None and getattr(top, 'service_id', None):
+        statsd_client.incr('current-service.{}'.format(
+            'fetched' if hasattr(top, 'service') else 'not-fetched'
+        ))
+    return response
 
 
 def save_service_after_request(response):
@@ -463,6 +527,9 @@ def register_errorhandlers(application):
             error_code = 500
         return _error_response(error_code)
 
+    # the API didn’t answer within the page’s time budget, which is likely to pass
+    application.register_error_handler(TimeoutError, lambda error: _error_response(503))
+
     @application.errorhandler(410)
     def handle_gone(error):
         return _error_response(410)
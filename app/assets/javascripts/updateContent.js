@@ -2,13 +2,23 @@
   "use strict";
 
   var queues = {};
+  var hashes = {};
+  var intervals = {};
+  var streams = {};
   var dd = new diffDOM();
 
-  var getRenderer = $component => response => dd.apply(
+  // partials which haven’t changed since the last poll are left out of the response
+  var getRenderer = $component => response => ($component.data('key') in response) && dd.apply(
     $component.get(0),
     dd.diff($component.get(0), $(response[$component.data('key')]).get(0))
   );
 
+  // for pages which are replaced by something else once there’s nothing more to wait for
+  var reloadWhenFinished = (render, resource) => response => {
+    render(response);
+    if (intervals[resource] === 0) window.location.reload();
+  };
+
   var getQueue = resource => (
     queues[resource] = queues[resource] || []
   );
@@ -21,33 +31,98 @@
 
   var poll = function(renderer, resource, queue, interval, form) {
 
+    // the server says nothing on the page can change any more
+    if (intervals[resource] === 0) return;
+
     if (queue.push(renderer) === 1) $.ajax(
       resource,
       {
         'method': form ? 'post' : 'get',
-        'data': form ? $('#' + form).serialize() : {}
+        'data': form ? $('#' + form).serialize() : {},
+        // sends If-None-Match with the ETag of the last response, so nothing comes back if nothing has changed
+        'ifModified': true,
+        'headers': {
+          'X-Partial-Hashes': JSON.stringify(hashes[resource] || {}),
+          'X-Poll-Interval-Seconds': interval / 1000
+        }
       }
-    ).done(
-      response => flushQueue(queue, response)
-    ).fail(
+    ).done((response, status, xhr) => {
+      // the server decides how long to wait before polling again, including after a 304
+      var nextInterval = xhr.getResponseHeader('X-Poll-Interval-Seconds');
+      if (nextInterval !== null) intervals[resource] = parseFloat(nextInterval) * 1000;
+      if (status === 'notmodified') return clearQueue(queue);
+      hashes[resource] = response.hashes;
+      flushQueue(queue, response);
+    }).fail(
       () => poll = function(){}
     );
 
     setTimeout(
-      () => poll(...arguments), interval
+      () => poll(renderer, resource, queue, resource in intervals ? intervals[resource] : interval, form),
+      interval
     );
 
   };
 
+  // one connection per stream, shared by every component on the page which it updates
+  var listen = function(renderer, eventsUrl, fallback) {
+
+    var stream = streams[eventsUrl];
+
+    if (!stream) {
+      stream = streams[eventsUrl] = {
+        'source': new EventSource(eventsUrl),
+        'opened': false,
+        'polling': false,
+        'renderers': [],
+        'fallbacks': []
+      };
+      stream.source.addEventListener('open', () => (stream.opened = true));
+      stream.source.addEventListener('message', event => {
+        var response = JSON.parse(event.data);
+        stream.renderers.forEach(render => render(response));
+      });
+      // otherwise the browser would reconnect once the server has closed the stream
+      stream.source.addEventListener('finished', () => stream.source.close());
+      stream.source.addEventListener('error', () => {
+        // the browser reconnects by itself if a stream drops, but gives up if reconnecting fails (eg with a 403
+        // or a 500) - then, or if it never connected in the first place, go back to polling
+        if (stream.opened && stream.source.readyState !== EventSource.CLOSED) return;
+        stream.source.close();
+        if (stream.polling) return;
+        stream.polling = true;
+        stream.fallbacks.forEach(startPolling => startPolling());
+      });
+    }
+
+    stream.renderers.push(renderer);
+    stream.fallbacks.push(fallback);
+
+  };
+
   Modules.UpdateContent = function() {
 
-    this.start = component => poll(
-      getRenderer($(component)),
-      $(component).data('resource'),
-      getQueue($(component).data('resource')),
-      ($(component).data('interval-seconds') || 1.5) * 1000,
-      $(component).data('form')
-    );
+    this.start = component => {
+
+      var $component = $(component);
+      var renderer = $component.data('reload-when-finished') ?
+        reloadWhenFinished(getRenderer($component), $component.data('resource')) :
+        getRenderer($component);
+      var startPolling = () => poll(
+        renderer,
+        $component.data('resource'),
+        getQueue($component.data('resource')),
+        ($component.data('interval-seconds') || 1.5) * 1000,
+        $component.data('form')
+      );
+
+      if (window.EventSource && $component.data('events-url')) {
+        listen(renderer, $component.data('events-url'), startPolling);
+      } else {
+        startPolling();
+      }
+
+    };
 
   };
 
@@ -0,0 +1,360 @@
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+from time import time
+from urllib.parse import quote, unquote
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class LRUCache(object):
+    """
+        A cache local to this worker process, which forgets the least recently used item once it holds
+        `max_size` of them, and anything set with a `ttl` once that many seconds have passed.
+
+        Values are pickled on the way in and out, so callers get their own copy and can change it freely.
+    """
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            expires_at, value = self._items[key]
+            if _has_expired(expires_at):
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        """
+        Sets `key` only if it isn’t already set, returning whether it was.
+        """
+        with self._lock:
+            if key in self._items and not _has_expired(self._items[key][0]):
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def _set(self, key, value, ttl):
+        self._items[key] = (_expires_at(ttl), pickle.dumps(value))
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._items if key.startswith(prefix)]:
+                del self._items[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class FileSystemCache(object):
+    """
+        A cache shared by every worker on the same machine, kept as one file per item in `directory`.
+
+        Items are grouped into a directory for each key’s first part (up to and including its first '/'), so
+        that deleting everything for an upload or a service removes a directory rather than looking through every
+        file. Expired items are only deleted when something tries to get them, so every `sweep_interval` seconds
+        a `set` also sweeps out any nobody has asked for.
+    """
+
+    def __init__(self, directory, key_prefix='', sweep_interval=600):
+        self.directory = os.path.join(directory, hashlib.sha1(key_prefix.encode('utf-8')).hexdigest())
+        self.key_prefix = key_prefix
+        self.sweep_interval = sweep_interval
+        self._swept_at = time()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def _group(key):
+        return key[:key.index('/') + 1] if '/' in key else key
+
+    def _group_directory(self, group):
+        # quoted so that it’s one directory whatever is in it, and never '.' or '..'
+        return os.path.join(self.directory, quote(group, safe='').replace('.', '%2E'))
+
+    def _path(self, key):
+        return os.path.join(
+            self._group_directory(self._group(key)),
+            hashlib.sha1(key.encode('utf-8')).hexdigest(),
+        )
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, 'rb') as cache_file:
+                return pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def get(self, key):
+        item = self._read(self._path(key))
+        if item is None:
+            return None
+        expires_at, _, value = item
+        if _has_expired(expires_at):
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        temporary_path = self._write(key, value, ttl)
+        try:
+            os.replace(temporary_path, self._path(key))
+        except FileNotFoundError:
+            # its group was deleted while it was being written, so it’s been forgotten already
+            os.remove(temporary_path)
+        if time() - self._swept_at > self.sweep_interval:
+            self.sweep()
+
+    def add(self, key, value, ttl=None):
+        """
+        Sets `key` only if it isn’t already set, returning whether it was.
+        """
+        if self.get(key) is not None:
+            return False
+        temporary_path = self._write(key, value, ttl)
+        try:
+            # unlike moving it into place, linking it fails if another worker got there first
+            os.link(temporary_path, self._path(key))
+            return True
+        except (FileExistsError, FileNotFoundError):
+            return False
+        finally:
+            os.remove(temporary_path)
+
+    def _write(self, key, value, ttl):
+        os.makedirs(self._group_directory(self._group(key)), exist_ok=True)
+        # write to a temporary file then move it into place, so other workers never see half a file
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(file_descriptor, 'wb') as cache_file:
+            pickle.dump((_expires_at(ttl), key, value), cache_file)
+        return temporary_path
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_prefix(self, prefix):
+        for group_directory in self._group_directories():
+            group = unquote(os.path.basename(group_directory))
+            if group.startswith(prefix):
+                # every key in the group starts with it
+                shutil.rmtree(group_directory, ignore_errors=True)
+            elif prefix.startswith(group):
+                for item in self._items(group_directory):
+                    if item[1].startswith(prefix):
+                        self.delete(item[1])
+
+    def sweep(self):
+        """
+        Deletes every item which has expired, and any groups left empty.
+        """
+        self._swept_at = time()
+        for group_directory in self._group_directories():
+            for item in self._items(group_directory):
+                if _has_expired(item[0]):
+                    self.delete(item[1])
+            try:
+                os.rmdir(group_directory)
+            except OSError:
+                pass
+
+    def _group_directories(self):
+        return [entry.path for entry in os.scandir(self.directory) if entry.is_dir()]
+
+    def _items(self, group_directory):
+        try:
+            filenames = os.listdir(group_directory)
+        except FileNotFoundError:
+            return
+        for filename in filenames:
+            item = self._read(os.path.join(group_directory, filename))
+            if item is not None:
+                yield item
+
+    def clear(self):
+        self.delete_prefix('')
+
+
+class RedisCache(object):
+    """
+        A cache shared by every worker that can reach the same Redis. Needs the `redis` package, which
+        isn’t installed unless you want to use this.
+    """
+
+    def __init__(self, url, key_prefix=''):
+        if redis is None:
+            raise RuntimeError('The redis package needs to be installed to use a Redis cache')
+        self._redis = redis.StrictRedis.from_url(url)
+        self.key_prefix = key_prefix
+
+    def get(self, key):
+        value = self._redis.get(self.key_prefix + key)
+        return None if value is None else pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        self._redis.set(self.key_prefix + key, pickle.dumps(value), ex=ttl)
+
+    def add(self, key, value, ttl=None):
+        return bool(self._redis.set(self.key_prefix + key, pickle.dumps(value), ex=ttl, nx=True))
+
+    def delete(self, key):
+        self._redis.delete(self.key_prefix + key)
+
+    def delete_prefix(self, prefix):
+        for key in self._redis.scan_iter(match='{}{}*'.format(self.key_prefix, prefix)):
+            self._redis.delete(key)
+
+    def clear(self):
+        self.delete_prefix('')
+
+
+class LayeredCache(object):
+    """
+        Looks in each cache in turn, copying anything found into the ones before it - normally a fast local
+        cache in front of a shared one. Only suitable for things which don’t change, since a change made by one
+        worker can’t remove the copy in another worker’s local cache.
+    """
+
+    def __init__(self, *caches):
+        self.caches = caches
+
+    def get(self, key):
+        for index, cache in enumerate(self.caches):
+            value = cache.get(key)
+            if value is not None:
+                for earlier_cache in self.caches[:index]:
+                    earlier_cache.set(key, value)
+                return value
+        return None
+
+    def set(self, key, value, ttl=None):
+        for cache in self.caches:
+            cache.set(key, value, ttl=ttl)
+
+    def add(self, key, value, ttl=None):
+        # the last cache is the one everyone shares, so it decides
+        if not self.caches[-1].add(key, value, ttl=ttl):
+            return False
+        for cache in self.caches[:-1]:
+            cache.set(key, value, ttl=ttl)
+        return True
+
+    def delete(self, key):
+        for cache in self.caches:
+            cache.delete(key)
+
+    def delete_prefix(self, prefix):
+        for cache in self.caches:
+            cache.delete_prefix(prefix)
+
+    def clear(self):
+        for cache in self.caches:
+            cache.clear()
+
+
+class ExpiringCache(object):
+    """
+        A cache shared between workers, whose items expire `ttl` seconds (set by `ttl_config_key`) after being
+        set. A `ttl` of 0 turns it off.
+
+        Usage:
+
+            partials_data_cache = ExpiringCache(key_prefix='partials-data/', ttl_config_key='MICRO_CACHE_TTL_SECONDS')
+            partials_data_cache.init_app(application)
+
+            jobs = partials_data_cache.get_or_fetch('jobs/{}'.format(service_id), partial(get_jobs, service_id))
+    """
+
+    def __init__(self, key_prefix, ttl_config_key):
+        self.key_prefix = key_prefix
+        self.ttl_config_key = ttl_config_key
+        self.cache = LRUCache()
+        self.ttl = 0
+
+    def init_app(self, application):
+        self.cache = create_shared_cache(application, key_prefix=self.key_prefix)
+        self.ttl = application.config[self.ttl_config_key]
+
+    def get(self, key):
+        if not self.ttl:
+            return None
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        if self.ttl:
+            self.cache.set(key, value, ttl=self.ttl)
+
+    def get_or_fetch(self, key, fetch, should_cache=lambda value: True):
+        value = self.get(key)
+        if value is None:
+            value = fetch()
+            if value is not None and should_cache(value):
+                self.set(key, value)
+        return value
+
+    def delete_prefix(self, prefix):
+        self.cache.delete_prefix(prefix)
+
+
+def _expires_at(ttl):
+    return None if ttl is None else time() + ttl
+
+
+def _has_expired(expires_at):
+    return expires_at is not None and time() > expires_at
+
+
+def create_shared_cache(application, key_prefix):
+    """
+    A cache shared between workers, chosen by `SHARED_CACHE_BACKEND`: 'redis', 'filesystem' (shared by workers on
+    the same machine) or 'local' (not really shared - each worker has its own).
+    """
+    backend = application.config['SHARED_CACHE_BACKEND']
+    if backend == 'redis':
+        return RedisCache(application.config['REDIS_URL'], key_prefix=key_prefix)
+    if backend == 'filesystem':
+        return FileSystemCache(application.config['SHARED_CACHE_DIRECTORY'], key_prefix=key_prefix)
+    if backend == 'local':
+        return LRUCache()
+    raise ValueError('Unknown cache backend {}'.format(backend))
+
+
+def create_immutable_cache(max_size, redis_url=None, key_prefix=''):
+    """
+    A cache for things which never change once created: local to the worker, and also shared through
+    Redis if there is one.
+    """
+    if redis_url:
+        return LayeredCache(LRUCache(max_size), RedisCache(redis_url, key_prefix=key_prefix))
+    return LRUCache(max_size)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 
 if os.environ.get('VCAP_SERVICES'):
@@ -53,6 +54,8 @@ class Config(object):
     SESSION_COOKIE_NAME = 'notify_admin_session'
     SESSION_COOKIE_SECURE = True
     SESSION_REFRESH_EACH_REQUEST = True
+    # views marked `session_read_only` only send the cookie back if it would otherwise expire within this long
+    SESSION_REISSUE_BEFORE_EXPIRY_SECONDS = 60 * 60
     SHOW_STYLEGUIDE = True
     # TODO: move to utils
     SMS_CHAR_COUNT_LIMIT = 459
@@ -64,6 +67,89 @@ class Config(object):
     ACTIVITY_STATS_LIMIT_DAYS = 7
     TEST_MESSAGE_FILENAME = 'Report'
 
+    # Keep-alive connections to the API, template preview and Deskpro, per worker process
+    HTTP_POOL_CONNECTIONS = 10  # number of upstream hosts to keep a pool for
+    HTTP_POOL_MAXSIZE = 10  # connections kept open to each host
+    HTTP_MAX_RETRIES = 3  # only failures to connect are retried
+    HTTP_RETRY_BACKOFF_FACTOR = 0.1
+
+    # Versions of templates never change, so we keep (up to this many of) them per worker
+    TEMPLATE_VERSION_CACHE_MAX_SIZE = 2000
+    # notifications and jobs which have finished, so will never change again
+    FINISHED_CACHE_MAX_SIZE = 5000
+    # Optional - caches are shared between workers through Redis if this is set
+    REDIS_URL = os.environ.get('REDIS_URL')
+    # How caches which have to be shared between workers are kept - 'redis', 'filesystem' or 'local' (not shared)
+    SHARED_CACHE_BACKEND = 'redis' if REDIS_URL else 'filesystem'
+    SHARED_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), 'notify-admin-cache')
+    # users and services are only cached with Redis, so that forgetting one reaches every instance of the app
+    SERVICE_CACHE_TTL_SECONDS = 30
+    USER_CACHE_TTL_SECONDS = 10
+    # data behind the partials pages poll for, shared by everyone looking at the same service or job
+    MICRO_CACHE_TTL_SECONDS = 2
+    # an upload is only in the session as long as the session lasts
+    PARSED_UPLOAD_CACHE_TTL_SECONDS = PERMANENT_SESSION_LIFETIME
+
+    # uploaded files this big (in characters, about 50,000 rows) are checked in the background, 0 for never -
+    # and only with Redis, so every instance of the app can see that a file is being checked
+    BACKGROUND_CHECK_MIN_FILE_SIZE = 2 * 1024 * 1024
+    # files with more rows than this are split between a pool of other processes to be checked, if there's more than
+    # one - otherwise splitting the file up only makes checking it slower
+    BACKGROUND_CHECK_ROWS_PER_SHARD = 25000
+    # Each of the app's workers has a pool of its own, and checking a shard takes about as much memory as a worker,
+    # so the workers and their pools all have to fit in the app's memory (5 workers in 1G, see manifest-base.yml)
+    BACKGROUND_CHECK_MAX_WORKERS = int(os.environ.get('BACKGROUND_CHECK_MAX_WORKERS', 1))
+    # after which a file still being checked is assumed to have been lost, and is checked again
+    BACKGROUND_CHECK_TIMEOUT_SECONDS = 600
+
+    # stop calling an API endpoint for a while once this many calls in a row have failed or been slow - taken
+    # this much of the endpoint's read timeout (see API_ENDPOINT_READ_TIMEOUT_SECONDS)
+    CIRCUIT_BREAKER_ENABLED = True
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+    CIRCUIT_BREAKER_LATENCY_THRESHOLD = 0.5
+    CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS = 30
+
+    # how long API calls get, overridden for particular endpoints (as in 'GET /service/<id>/job')
+    API_CONNECT_TIMEOUT_SECONDS = 3.05
+    API_READ_TIMEOUT_SECONDS = 10
+    API_ENDPOINT_READ_TIMEOUT_SECONDS = {
+        # pages of notifications, including the ones CSV downloads are built from
+        'GET /service/<id>/notifications': 30,
+        'GET /service/<id>/job/<id>/notifications': 30,
+        'GET /service/<id>/billing/monthly-usage': 20,
+        'GET /service/<id>/billing/yearly-usage-summary': 20,
+        # the dashboard can do without this
+        'GET /service/<id>/inbound-sms/summary': 2,
+    }
+    # Independent API calls made by one page are made at the same time, within this budget - by default long enough
+    # for calls with the default timeouts. Pages calling endpoints given longer need a budget of their own
+    CONCURRENT_API_CALLS_MAX_WORKERS = 5
+    CONCURRENT_API_CALLS_TIMEOUT_SECONDS = API_CONNECT_TIMEOUT_SECONDS + API_READ_TIMEOUT_SECONDS
+
+    # send a second GET if the first is slower than this percentile of the endpoint’s recent responses. Off unless
+    # turned on, since it can mean more calls to the API when it’s already slow
+    API_HEDGE_GET_REQUESTS = os.environ.get('API_HEDGE_GET_REQUESTS') == '1'
+    API_HEDGE_PERCENTILE = 95
+    API_HEDGE_MIN_SAMPLES = 20
+    API_HEDGE_MAX_WORKERS = 10
+
+    # one of app.notify_client.json_decoder.SUPPORTED_BACKENDS - falls back to json if it isn’t installed
+    API_JSON_DECODER = 'ujson'
+
+    # the API accepts tokens issued up to 30 seconds either side of now, so reuse each one for half of that
+    API_TOKEN_VALIDITY_SECONDS = 30
+    API_TOKEN_REUSE_FRACTION = 0.5
+
+    # how often pages poll for updates while things are changing, and the longest they back off to when not
+    POLL_INTERVAL_SECONDS = 2
+    POLL_INTERVAL_MAX_SECONDS = 30
+
+    # pages watching a job get updates over a server-sent event stream, and fall back to polling without one.
+    # Only where there’s a separate app with gevent workers for the streams to be routed to - see manifest-base.yml
+    EVENT_STREAMS_ENABLED = os.environ.get('EVENT_STREAMS_ENABLED') == '1'
+    EVENT_STREAM_KEEP_ALIVE_SECONDS = 15
+    EVENT_STREAM_MAX_SECONDS = 300
+
     STATSD_ENABLED = False
     STATSD_HOST = "statsd.hostedgraphite.com"
     STATSD_PORT = 8125
@@ -107,11 +193,19 @@ class Development(Config):
     STATSD_ENABLED = False
     CSV_UPLOAD_BUCKET_NAME = 'development-notifications-csv-upload'
     LOGO_UPLOAD_BUCKET_NAME = 'public-logos-tools'
+    # the development server only handles one request at a time, so a stream would hold it up
+    EVENT_STREAMS_ENABLED = False
 
 
 class Test(Development):
     DEBUG = True
     TESTING = True
+    EVENT_STREAMS_ENABLED = True
+    SHARED_CACHE_BACKEND = 'local'
+    MICRO_CACHE_TTL_SECONDS = 0
+    PARSED_UPLOAD_CACHE_TTL_SECONDS = 0
+    BACKGROUND_CHECK_MIN_FILE_SIZE = 0
+    API_HEDGE_GET_REQUESTS = False
     STATSD_ENABLED = False
     WTF_CSRF_ENABLED = False
     CSV_UPLOAD_BUCKET_NAME = 'test-notifications-csv-upload'
@@ -0,0 +1,184 @@
+import json
+import logging
+from threading import Event, Lock, Thread
+from time import monotonic, sleep
+
+from notifications_python_client.errors import HTTPError
+
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription(object):
+    """
+    One viewer’s connection to a poller. Only the latest data is kept, so a viewer who falls behind skips
+    straight to the newest version rather than working through every one in between.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.finished = False
+        self._data = None
+        self._ready = Event()
+        self._lock = Lock()
+
+    def publish(self, data):
+        with self._lock:
+            self._data = data
+        self._ready.set()
+
+    def finish(self):
+        self.finished = True
+        self._ready.set()
+
+    def get(self, timeout=None):
+        """
+        Returns the newest data since the last call, or None if nothing new arrived within `timeout` seconds.
+        """
+        self._ready.wait(timeout)
+        with self._lock:
+            self._ready.clear()
+            data, self._data = self._data, None
+        if self.finished:
+            # don’t lose a `finish` which raced with the clear
+            self._ready.set()
+        return data
+
+
+class _Poller(Thread):
+
+    def __init__(self, streams, key, fetch):
+        super().__init__(name='event-stream-poller {}'.format(key), daemon=True)
+        self.streams = streams
+        self.key = key
+        self.fetch = fetch
+        self.subscriptions = set()
+        self.latest = None
+
+    def run(self):
+        interval = self.streams.poll_interval
+        while True:
+            with self.streams._lock:
+                if not self.subscriptions:
+                    del self.streams._pollers[self.key]
+                    return
+
+            try:
+                data, next_interval = self.fetch()
+            except Exception as e:
+                if isinstance(e, HTTPError) and e.status_code < 500:
+                    logger.warning('Stopped polling for {}: {}'.format(self.key, e))
+                    return self.streams._finish(self)
+                logger.exception('Failed to poll for {}'.format(self.key))
+                data, next_interval = None, None
+
+            changed = data is not None and data != self.latest
+            if changed:
+                self.latest = data
+                self.streams._publish(self, data)
+
+            if next_interval == 0:
+                return self.streams._finish(self)
+            if next_interval is None:
+                # same back off as the pages which poll for themselves
+                next_interval = (
+                    self.streams.poll_interval if changed
+                    else min(max(interval, self.streams.poll_interval) * 2, self.streams.max_poll_interval)
+                )
+            interval = next_interval
+            sleep(interval)
+
+
+class EventStreams(object):
+    """
+        Fans data out to everyone watching the same thing, so that however many of them there are, this worker only
+        polls the API for it once. The first subscriber to a key starts a poller thread; it stops once the last one
+        has gone, or `fetch` says there will be nothing more to send.
+
+        `fetch` returns a tuple of the data to send and how many seconds to wait before calling it again: 0 for
+        never, or None to back off while the data isn’t changing.
+
+        Usage:
+
+            event_streams = EventStreams()
+            event_streams.init_app(application, statsd_client)
+
+            return Response(event_streams.stream(('job', job_id), fetch), mimetype='text/event-stream')
+    """
+
+    def __init__(self):
+        self.statsd_client = None
+        self.poll_interval = 2
+        self.max_poll_interval = 30
+        self.keep_alive_interval = 15
+        self.max_duration = 300
+        self._pollers = {}
+        self._lock = Lock()
+
+    def init_app(self, application, statsd_client=None):
+        self.statsd_client = statsd_client
+        self.poll_interval = application.config['POLL_INTERVAL_SECONDS']
+        self.max_poll_interval = application.config['POLL_INTERVAL_MAX_SECONDS']
+        self.keep_alive_interval = application.config['EVENT_STREAM_KEEP_ALIVE_SECONDS']
+        self.max_duration = application.config['EVENT_STREAM_MAX_SECONDS']
+
+    def subscribe(self, key, fetch):
+        subscription = Subscription(key)
+        with self._lock:
+            poller = self._pollers.get(key)
+            started = poller is None
+            if started:
+                poller = self._pollers[key] = _Poller(self, key, fetch)
+            poller.subscriptions.add(subscription)
+            if poller.latest is not None:
+                subscription.publish(poller.latest)
+        if started:
+            self._incr('event-streams.poller.started')
+            poller.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            poller = self._pollers.get(subscription.key)
+            if poller:
+                poller.subscriptions.discard(subscription)
+
+    def stream(self, key, fetch):
+        """
+        Yields server-sent events: one with the data each time it changes, and a `finished` one once it won’t
+        change any more. Each stream lasts at most `max_duration` seconds, after which the browser reconnects.
+        """
+        subscription = self.subscribe(key, fetch)
+        try:
+            yield 'retry: {}\n\n'.format(int(self.poll_interval * 1000))
+            deadline = monotonic() + self.max_duration
+            while monotonic() < deadline:
+                data = subscription.get(timeout=self.keep_alive_interval)
+                if data is not None:
+                    yield 'data: {}\n\n'.format(json.dumps(data))
+                if subscription.finished:
+                    yield 'event: finished\ndata: {}\n\n'
+                    return
+                if data is None:
+                    # comments are ignored by the browser, but stop proxies timing out an idle connection
+                    yield ': keep-alive\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+    def _publish(self, poller, data):
+        with self._lock:
+            subscriptions = list(poller.subscriptions)
+        for subscription in subscriptions:
+            subscription.publish(data)
+
+    def _finish(self, poller):
+        with self._lock:
+            # anyone who subscribes from now on starts a new poller
+            del self._pollers[poller.key]
+            subscriptions = list(poller.subscriptions)
+        for subscription in subscriptions:
+            subscription.finish()
+
+    def _incr(self, metric):
+        if self.statsd_client:
+            self.statsd_client.incr(metric)
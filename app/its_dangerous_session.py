@@ -1,17 +1,33 @@
+from copy import deepcopy
 from datetime import timedelta, datetime
 
 from werkzeug.datastructures import CallbackDict
+from flask import request
 from flask.sessions import SessionInterface, SessionMixin
 from itsdangerous import URLSafeTimedSerializer, BadSignature
 
 
+def session_read_only(view):
+    """
+    Marks a view (normally one which pages poll) as not needing the session cookie sent back every time. It’s still
+    sent if the view changes the session, or the cookie is close to expiring.
+
+    Goes straight under `@main.route`, so it’s on the function Flask calls.
+    """
+    view.session_read_only = True
+    return view
+
+
 class ItsdangerousSession(CallbackDict, SessionMixin):
-    def __init__(self, initial=None):
+    def __init__(self, initial=None, issued_at=None):
         def on_update(self):
             self.modified = True
 
         CallbackDict.__init__(self, initial, on_update)
         self.modified = False
+        # what was in the cookie, and when it was signed, so we can tell if it needs sending again
+        self.original = deepcopy(dict(initial or {}))
+        self.issued_at = issued_at
 
 
 class ItsdangerousSessionInterface(SessionInterface):
@@ -33,8 +49,8 @@ class ItsdangerousSessionInterface(SessionInterface):
             return self.session_class()
         max_age = app.permanent_session_lifetime.total_seconds()
         try:
-            data = s.loads(val, max_age=max_age)
-            return self.session_class(data)
+            data, issued_at = s.loads(val, max_age=max_age, return_timestamp=True)
+            return self.session_class(data, issued_at=issued_at)
         except BadSignature:
             return self.session_class()
 
@@ -45,9 +61,22 @@ class ItsdangerousSessionInterface(SessionInterface):
                 response.delete_cookie(app.session_cookie_name,
                                        domain=domain)
             return
+        if self.can_skip_reissuing_cookie(app, session):
+            return
         session.permanent = True
         expires = datetime.utcnow() + timedelta(seconds=app.config.get('PERMANENT_SESSION_LIFETIME'))
         val = self.get_serializer(app).dumps(dict(session))
         response.set_cookie(app.session_cookie_name, val,
                             expires=expires, httponly=True,
                             domain=domain, secure=app.config.get('SESSION_COOKIE_SECURE'))
+
+    def can_skip_reissuing_cookie(self, app, session):
+        view = app.view_functions.get(request.endpoint)
+        if not getattr(view, 'session_read_only', False):
+            return False
+        if session.issued_at is None or dict(session) != session.original:
+            return False
+        expires_at = session.issued_at + timedelta(seconds=app.config.get('PERMANENT_SESSION_LIFETIME'))
+        return expires_at - datetime.utcnow() > timedelta(
+            seconds=app.config['SESSION_REISSUE_BEFORE_EXPIRY_SECONDS']
+        )
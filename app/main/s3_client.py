@@ -1,9 +1,12 @@
+import codecs
 import uuid
 import botocore
 from boto3 import resource
 from flask import current_app
 from notifications_utils.s3 import s3upload as utils_s3upload
 
+from app.utils import split_csv_lines
+
 FILE_LOCATION_STRUCTURE = 'service-{}-notify/{}.csv'
 TEMP_TAG = 'temp-{user_id}_'
 LOGO_LOCATION_STRUCTURE = '{temp}{unique_id}-{filename}'
@@ -60,6 +63,33 @@ def s3download(service_id, upload_id):
     return contents
 
 
+def s3download_lines(service_id, upload_id, chunk_size=8192):
+    """
+    Yields the lines of an upload as they arrive, so a caller which only needs the first few doesn’t have to
+    wait for the rest of the file. A newline inside quotes doesn’t end a line.
+    """
+    upload_file_name = FILE_LOCATION_STRUCTURE.format(service_id, upload_id)
+    try:
+        body = get_s3_object(current_app.config['CSV_UPLOAD_BUCKET_NAME'], upload_file_name).get()['Body']
+    except botocore.exceptions.ClientError as e:
+        current_app.logger.error("Unable to download s3 file {}".format(upload_file_name))
+        raise e
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    unfinished = ''
+    try:
+        while True:
+            chunk = body.read(chunk_size)
+            lines, unfinished = split_csv_lines(unfinished + decoder.decode(chunk, final=not chunk))
+            yield from lines
+            if not chunk:
+                break
+        if unfinished:
+            yield unfinished
+    finally:
+        # stop downloading whatever is left
+        body.close()
+
+
 def upload_logo(filename, filedata, region, user_id):
     upload_file_name = LOGO_LOCATION_STRUCTURE.format(
         temp=TEMP_TAG.format(user_id=user_id),
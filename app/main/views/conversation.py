@@ -1,5 +1,4 @@
 from flask import (
-    jsonify,
     session,
     redirect,
     render_template,
@@ -8,9 +7,10 @@ from flask import (
 from flask_login import login_required
 from notifications_utils.recipients import format_phone_number_human_readable
 from notifications_utils.template import SMSPreviewTemplate
+from app.its_dangerous_session import session_read_only
 from app.main import main
 from app.main.forms import SearchTemplatesForm
-from app.utils import user_has_permissions
+from app.utils import user_has_permissions, jsonify_partials
 from app import notification_api_client, service_api_client
 from notifications_python_client.errors import HTTPError
 
@@ -32,11 +32,12 @@ def conversation(service_id, notification_id):
 
 
 @main.route("/services/<service_id>/conversation/<notification_id>.json")
+@session_read_only
 @login_required
 @user_has_permissions('view_activity', admin_override=True)
 def conversation_updates(service_id, notification_id):
 
-    return jsonify(get_conversation_partials(
+    return jsonify_partials(get_conversation_partials(
         service_id,
         get_user_number(service_id, notification_id)
     ))
@@ -4,7 +4,6 @@ from flask import (
     render_template,
     url_for,
     session,
-    jsonify,
     request,
     abort,
     Response,
@@ -13,7 +12,9 @@ from flask_login import login_required
 
 from notifications_utils.recipients import format_phone_number_human_readable
 
+from app.its_dangerous_session import session_read_only
 from app.main import main
+from app.main.views.data_loader import load
 from app import (
     current_service,
     billing_api_client,
@@ -21,6 +22,8 @@ from app import (
     service_api_client,
     template_statistics_client,
     inbound_number_client,
+    partials_data_cache,
+    request_budgets,
     format_date_numeric,
     format_datetime_numeric,
 )
@@ -31,6 +34,10 @@ from app.utils import (
     FAILURE_STATUSES,
     REQUESTED_STATUSES,
     Spreadsheet,
+    run_concurrently,
+    jsonify_partials,
+    optional,
+    TEMPORARILY_UNAVAILABLE,
 )
 
 
@@ -65,9 +72,10 @@ def service_dashboard(service_id):
 
 
 @main.route("/services/<service_id>/dashboard.json")
+@session_read_only
 @user_has_permissions('view_activity', admin_override=True)
 def service_dashboard_updates(service_id):
-    return jsonify(**get_dashboard_partials(service_id))
+    return jsonify_partials(get_dashboard_partials(service_id))
 
 
 @main.route("/services/<service_id>/template-activity")
@@ -111,11 +119,19 @@ def template_history(service_id):
 @user_has_permissions('manage_settings', admin_override=True)
 def usage(service_id):
     year, current_financial_year = requested_and_current_financial_year(request)
+    data = load(
+        billable_units=partial(billing_api_client.get_billable_units, service_id, year),
+        service_usage=partial(billing_api_client.get_service_usage, service_id, year),
+        time_budget=request_budgets.get_time_budget(
+            'GET /service/<id>/billing/monthly-usage',
+            'GET /service/<id>/billing/yearly-usage-summary',
+        ),
+    )
 
     return render_template(
         'views/usage.html',
         months=list(get_free_paid_breakdown_for_billable_units(
-            year, billing_api_client.get_billable_units(service_id, year)
+            year, data['billable_units']
         )),
         selected_year=year,
         years=get_tuples_of_financial_years(
@@ -123,7 +139,7 @@ def usage(service_id):
             start=current_financial_year - 1,
             end=current_financial_year + 1,
         ),
-        **calculate_usage(billing_api_client.get_service_usage(service_id, year))
+        **calculate_usage(data['service_usage'])
     )
 
 
@@ -158,11 +174,12 @@ def inbox(service_id):
 
 
 @main.route("/services/<service_id>/inbox.json")
+@session_read_only
 @login_required
 @user_has_permissions('view_activity', admin_override=True)
 def inbox_updates(service_id):
 
-    return jsonify(get_inbox_partials(service_id))
+    return jsonify_partials(get_inbox_partials(service_id))
 
 
 @main.route("/services/<service_id>/inbox.csv")
@@ -195,9 +212,12 @@ def get_inbox_partials(service_id):
     if 'inbound_sms' not in current_service['permissions']:
         abort(403)
 
-    messages_to_show = list()
-    inbound_messages = service_api_client.get_inbound_sms(service_id)
+    inbound_messages, inbound_number = partials_data_cache.get_or_fetch(
+        'inbox/{}'.format(service_id),
+        partial(_get_inbox_data, service_id),
+    )
 
+    messages_to_show = list()
     for message in inbound_messages:
         if format_phone_number_human_readable(message['user_number']) not in {
             format_phone_number_human_readable(message['user_number'])
@@ -205,11 +225,6 @@ def get_inbox_partials(service_id):
         }:
             messages_to_show.append(message)
 
-    if not inbound_messages:
-        inbound_number = inbound_number_client.get_inbound_sms_number_for_service(service_id)['data']['number']
-    else:
-        inbound_number = None
-
     return {'messages': render_template(
         'views/dashboard/_inbox_messages.html',
         messages=messages_to_show,
@@ -219,6 +234,17 @@ def get_inbox_partials(service_id):
     )}
 
 
+def _get_inbox_data(service_id):
+    inbound_messages = service_api_client.get_inbound_sms(service_id)
+
+    if not inbound_messages:
+        inbound_number = inbound_number_client.get_inbound_sms_number_for_service(service_id)['data']['number']
+    else:
+        inbound_number = None
+
+    return inbound_messages, inbound_number
+
+
 def aggregate_usage(template_statistics, sort_key='count'):
     return sorted(
         template_statistics,
@@ -228,22 +254,24 @@ def aggregate_usage(template_statistics, sort_key='count'):
 
 
 def get_dashboard_partials(service_id):
-    # all but scheduled and cancelled
-    statuses_to_display = job_api_client.JOB_STATUSES - {'scheduled', 'cancelled'}
-
-    template_statistics = aggregate_usage(
-        template_statistics_client.get_template_statistics_for_service(service_id, limit_days=7)
+    template_statistics, scheduled_jobs, immediate_jobs, service, inbound_sms_summary = (
+        partials_data_cache.get_or_fetch(
+            'dashboard/{}'.format(service_id),
+            partial(_get_dashboard_data, service_id),
+            # try again next time, rather than showing it as unavailable for everyone until the cache expires
+            should_cache=lambda data: TEMPORARILY_UNAVAILABLE not in data,
+        )
     )
 
+    template_statistics = aggregate_usage(template_statistics)
     scheduled_jobs = sorted(
-        job_api_client.get_jobs(service_id, statuses=['scheduled'])['data'],
+        scheduled_jobs['data'],
         key=lambda job: job['scheduled_for']
     )
     immediate_jobs = [
         add_rate_to_job(job)
-        for job in job_api_client.get_jobs(service_id, limit_days=7, statuses=statuses_to_display)['data']
+        for job in immediate_jobs['data']
     ]
-    service = service_api_client.get_detailed_service(service_id)
     column_width = 'column-third' if 'letter' in current_service['permissions'] else 'column-half'
 
     return {
@@ -253,10 +281,8 @@ def get_dashboard_partials(service_id):
         ),
         'inbox': render_template(
             'views/dashboard/_inbox.html',
-            inbound_sms_summary=(
-                service_api_client.get_inbound_sms_summary(service_id)
-                if 'inbound_sms' in current_service['permissions'] else None
-            ),
+            inbound_sms_summary=inbound_sms_summary,
+            unavailable=(inbound_sms_summary is TEMPORARILY_UNAVAILABLE),
         ),
         'totals': render_template(
             'views/dashboard/_totals.html',
@@ -280,6 +306,23 @@ def get_dashboard_partials(service_id):
     }
 
 
+def _get_dashboard_data(service_id):
+    # all but scheduled and cancelled
+    statuses_to_display = job_api_client.JOB_STATUSES - {'scheduled', 'cancelled'}
+
+    # none of these depend on each other, so don’t wait for each one before starting the next
+    return run_concurrently(
+        partial(template_statistics_client.get_template_statistics_for_service, service_id, limit_days=7),
+        partial(job_api_client.get_jobs, service_id, statuses=['scheduled']),
+        partial(job_api_client.get_jobs, service_id, limit_days=7, statuses=statuses_to_display),
+        partial(service_api_client.get_detailed_service, service_id),
+        (
+            partial(optional(service_api_client.get_inbound_sms_summary), service_id)
+            if 'inbound_sms' in current_service['permissions'] else lambda: None
+        ),
+    )
+
+
 def get_dashboard_totals(statistics):
     for msg_type in statistics.values():
         msg_type['failed_percentage'] = get_formatted_percentage(msg_type['failed'], msg_type['requested'])
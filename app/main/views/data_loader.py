@@ -0,0 +1,75 @@
+from concurrent.futures import TimeoutError
+from functools import partial
+
+from flask import current_app
+from notifications_python_client.errors import HTTPError
+
+from app.utils import run_concurrently
+
+
+RAISE = 'raise'
+USE_DEFAULT = 'use-default'
+
+
+class Fetch(object):
+    """
+    One of the things a view needs to load. `on_error` says what to do if the API call fails or doesn’t finish in
+    time: `RAISE` it (the default) so the page errors as it would have, or `USE_DEFAULT` and carry on without it.
+    """
+
+    def __init__(self, call, on_error=RAISE, default=None):
+        if on_error not in {RAISE, USE_DEFAULT}:
+            raise ValueError('Unknown error policy {}'.format(on_error))
+        self.call = call
+        self.on_error = on_error
+        self.default = default
+
+
+def load(time_budget=None, **fetches):
+    """
+    Run a view’s independent fetches at the same time and return their results in a dict, by name.
+
+        data = load(
+            users=partial(user_api_client.get_users_for_service, service_id),
+            invites=Fetch(partial(invite_api_client.get_invites_for_service, service_id), on_error=USE_DEFAULT),
+            organisation=None,
+        )
+
+    Each fetch is a callable, a `Fetch` (to set its error policy), or None for something this view doesn’t need
+    this time (which loads as None). Anything still running after `time_budget` seconds (by default
+    `CONCURRENT_API_CALLS_TIMEOUT_SECONDS`) has timed out.
+    """
+    results = {name: None for name in fetches}
+    fetches = {
+        name: fetch if isinstance(fetch, Fetch) else Fetch(fetch)
+        for name, fetch in fetches.items()
+        if fetch is not None
+    }
+    if not fetches:
+        return results
+
+    names = list(fetches)
+    results.update(zip(names, run_concurrently(
+        *(partial(_fetch, name, fetches[name]) for name in names),
+        time_budget=time_budget,
+        on_timeout=lambda index: _timed_out(names[index], fetches[names[index]]),
+    )))
+    return results
+
+
+def _fetch(name, fetch):
+    try:
+        return fetch.call()
+    except HTTPError as e:
+        return _carry_on_without(name, fetch, e)
+
+
+def _timed_out(name, fetch):
+    return _carry_on_without(name, fetch, TimeoutError('{} did not finish in time'.format(name)))
+
+
+def _carry_on_without(name, fetch, error):
+    if fetch.on_error == RAISE:
+        raise error
+    current_app.logger.warning('Could not load {}, carrying on without it'.format(name))
+    return fetch.default
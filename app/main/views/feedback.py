@@ -1,8 +1,7 @@
-import requests
 import pytz
 from flask import render_template, url_for, redirect, current_app, abort, request, session
 from flask_login import current_user
-from app import convert_to_boolean, current_service, service_api_client
+from app import convert_to_boolean, current_service, service_api_client, pooled_sessions
 from app.main import main
 from app.main.forms import SupportType, Feedback, Problem, Triage
 from datetime import datetime
@@ -110,7 +109,7 @@ def feedback(ticket_type):
             "X-DeskPRO-API-Key": current_app.config.get('DESKPRO_API_KEY'),
             'Content-Type': "application/x-www-form-urlencoded"
         }
-        resp = requests.post(
+        resp = pooled_sessions.post(
             current_app.config.get('DESKPRO_API_HOST') + '/api/tickets',
             data=data,
             headers=headers)
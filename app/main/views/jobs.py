@@ -1,11 +1,11 @@
 # -*- coding: utf-8 -*-
+from functools import partial
 from orderedset import OrderedSet
 from itertools import chain
 
 from flask import (
     render_template,
     abort,
-    jsonify,
     request,
     url_for,
     current_app,
@@ -21,11 +21,14 @@ from notifications_utils.template import (
 from werkzeug.datastructures import MultiDict
 
 from app import (
+    event_streams,
     job_api_client,
     notification_api_client,
+    partials_data_cache,
     service_api_client,
     current_service,
     format_datetime_short)
+from app.its_dangerous_session import session_read_only
 from app.main import main
 from app.main.forms import SearchNotificationsForm
 from app.utils import (
@@ -40,6 +43,9 @@ from app.utils import (
     SENDING_STATUSES,
     DELIVERED_STATUSES,
     get_letter_timings,
+    jsonify_partials,
+    STOP_POLLING,
+    with_request_context_of_its_own,
 )
 from app.statistics_utils import add_rate_to_job
 
@@ -107,9 +113,6 @@ def view_job(service_id, job_id):
     filter_args = _parse_filter_args(request.args)
     filter_args['status'] = _set_status_filters(filter_args)
 
-    total_notifications = job.get('notification_count', 0)
-    processed_notifications = job.get('notifications_delivered', 0) + job.get('notifications_failed', 0)
-
     template = service_api_client.get_service_template(
         service_id=service_id,
         template_id=job['template'],
@@ -118,7 +121,7 @@ def view_job(service_id, job_id):
 
     return render_template(
         'views/jobs/job.html',
-        finished=(total_notifications == processed_notifications),
+        finished=job_api_client.is_finished(job),
         uploaded_file_name=job['original_file_name'],
         template_id=job['template'],
         status=request.args.get('status', ''),
@@ -128,6 +131,12 @@ def view_job(service_id, job_id):
             job_id=job['id'],
             status=request.args.get('status', ''),
         ),
+        events_url=url_for(
+            '.view_job_events',
+            service_id=service_id,
+            job_id=job['id'],
+            status=request.args.get('status', ''),
+        ) if current_app.config['EVENT_STREAMS_ENABLED'] else '',
         partials=get_job_partials(job, template),
         just_sent=bool(
             request.args.get('just_sent') == 'yes' and
@@ -179,19 +188,57 @@ def cancel_job(service_id, job_id):
 
 
 @main.route("/services/<service_id>/jobs/<job_id>.json")
+@session_read_only
 @user_has_permissions('view_activity', admin_override=True)
 def view_job_updates(service_id, job_id):
 
-    job = job_api_client.get_job(service_id, job_id)['data']
+    partials, poll_interval_seconds = _get_job_progress(service_id, job_id)
+
+    return jsonify_partials(partials, poll_interval_seconds=poll_interval_seconds)
 
-    return jsonify(**get_job_partials(
-        job,
-        service_api_client.get_service_template(
-            service_id=current_service['id'],
-            template_id=job['template'],
-            version=job['template_version']
-        )['data'],
-    ))
+
+# everything under /events is routed to the separate app which serves event streams - see manifest-base.yml
+@main.route("/events/services/<service_id>/jobs/<job_id>")
+@session_read_only
+@user_has_permissions('view_activity', admin_override=True)
+def view_job_events(service_id, job_id):
+    # everyone watching this job (with the same filter) shares one poller, rather than each polling the API
+    key = ('job', service_id, job_id, request.args.get('status', ''))
+
+    return Response(
+        stream_with_context(event_streams.stream(
+            key,
+            with_request_context_of_its_own(partial(_get_job_progress, service_id, job_id)),
+        )),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # otherwise nginx holds on to events until it has a buffer’s worth
+            'X-Accel-Buffering': 'no',
+        }
+    )
+
+
+def _get_job_progress(service_id, job_id):
+    job = partials_data_cache.get_or_fetch(
+        'job/{}/{}'.format(service_id, job_id),
+        partial(job_api_client.get_job, service_id, job_id),
+    )['data']
+    template = service_api_client.get_service_template(
+        service_id=service_id,
+        template_id=job['template'],
+        version=job['template_version']
+    )['data']
+    return get_job_partials(job, template), _get_poll_interval(job)
+
+
+def _get_poll_interval(job):
+    if job_api_client.is_finished(job):
+        return STOP_POLLING
+    if job['job_status'] == 'finished':
+        # every notification has been sent, so we’re only waiting for them to be delivered - back off
+        return None
+    return current_app.config['POLL_INTERVAL_SECONDS']
 
 
 @main.route('/services/<service_id>/notifications/<message_type>', methods=['GET', 'POST'])
@@ -210,9 +257,10 @@ def view_notifications(service_id, message_type):
 
 
 @main.route('/services/<service_id>/notifications/<message_type>.json', methods=['GET', 'POST'])
+@session_read_only
 @user_has_permissions('view_activity', admin_override=True)
 def get_notifications_as_json(service_id, message_type):
-    return jsonify(get_notifications(
+    return jsonify_partials(get_notifications(
         service_id, message_type, status_override=request.args.get('status')
     ))
 
@@ -363,8 +411,12 @@ def _get_job_counts(job):
 def get_job_partials(job, template):
     filter_args = _parse_filter_args(request.args)
     filter_args['status'] = _set_status_filters(filter_args)
-    notifications = notification_api_client.get_notifications_for_service(
-        job['service'], job['id'], status=filter_args['status']
+    notifications = partials_data_cache.get_or_fetch(
+        'job-notifications/{}/{}/{}'.format(job['service'], job['id'], ','.join(filter_args['status'])),
+        partial(
+            notification_api_client.get_notifications_for_service,
+            job['service'], job['id'], status=filter_args['status'],
+        ),
     )
 
     if template['template_type'] == 'letter':
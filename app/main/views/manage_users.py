@@ -1,3 +1,4 @@
+from functools import partial
 from itertools import chain
 from flask import (
     request,
@@ -15,6 +16,7 @@ from flask_login import (
 
 from notifications_python_client.errors import HTTPError
 from app.main import main
+from app.main.views.data_loader import load
 from app.main.forms import (
     InviteUserForm,
     PermissionsForm
@@ -35,12 +37,14 @@ roles = {
 @login_required
 @user_has_permissions('view_activity', admin_override=True)
 def manage_users(service_id):
-    users = user_api_client.get_users_for_service(service_id=service_id)
-    invited_users = [invite for invite in invite_api_client.get_invites_for_service(service_id=service_id)
-                     if invite.status != 'accepted']
+    data = load(
+        users=partial(user_api_client.get_users_for_service, service_id=service_id),
+        invites=partial(invite_api_client.get_invites_for_service, service_id=service_id),
+    )
+    invited_users = [invite for invite in data['invites'] if invite.status != 'accepted']
     return render_template(
         'views/manage-users.html',
-        users=users,
+        users=data['users'],
         current_user=current_user,
         invited_users=invited_users
     )
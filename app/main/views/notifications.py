@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from flask import (
     render_template,
-    jsonify,
     request,
     url_for,
     current_app
@@ -13,6 +12,7 @@ from app import (
     job_api_client,
     current_service
 )
+from app.its_dangerous_session import session_read_only
 from app.main import main
 from app.template_previews import TemplatePreview
 from app.utils import (
@@ -25,6 +25,8 @@ from app.utils import (
     FAILURE_STATUSES,
     SENDING_STATUSES,
     DELIVERED_STATUSES,
+    jsonify_partials,
+    STOP_POLLING,
 )
 
 
@@ -110,11 +112,16 @@ def view_letter_notification_as_image(service_id, notification_id):
 
 
 @main.route("/services/<service_id>/notification/<notification_id>.json")
+@session_read_only
 @user_has_permissions('view_activity', admin_override=True)
 def view_notification_updates(service_id, notification_id):
-    return jsonify(**get_single_notification_partials(
-        notification_api_client.get_notification(service_id, notification_id)
-    ))
+    notification = notification_api_client.get_notification(service_id, notification_id)
+    return jsonify_partials(
+        get_single_notification_partials(notification),
+        poll_interval_seconds=(
+            STOP_POLLING if notification['status'] in (DELIVERED_STATUSES + FAILURE_STATUSES) else None
+        ),
+    )
 
 
 def get_single_notification_partials(notification):
@@ -134,14 +141,16 @@ def get_single_notification_partials(notification):
 
 
 def get_all_personalisation_from_notification(notification):
-
+    # a copy, so the notification (which may be one the API client has kept) is left as it was
     if notification['template'].get('redact_personalisation'):
-        notification['personalisation'] = {}
+        personalisation = {}
+    else:
+        personalisation = dict(notification['personalisation'])
 
     if notification['template']['template_type'] == 'email':
-        notification['personalisation']['email_address'] = notification['to']
+        personalisation['email_address'] = notification['to']
 
     if notification['template']['template_type'] == 'sms':
-        notification['personalisation']['phone_number'] = notification['to']
+        personalisation['phone_number'] = notification['to']
 
-    return notification['personalisation']
+    return personalisation
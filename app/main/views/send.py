@@ -1,4 +1,7 @@
+import hashlib
 import itertools
+import json
+from functools import partial
 from string import ascii_uppercase
 
 from orderedset import OrderedSet
@@ -37,17 +40,33 @@ from app.main.forms import (
 )
 from app.main.s3_client import (
     s3upload,
-    s3download
+    s3download,
+    s3download_lines,
 )
-from app import job_api_client, service_api_client, current_service, user_api_client, notification_api_client
+from app import (
+    job_api_client,
+    service_api_client,
+    current_service,
+    user_api_client,
+    notification_api_client,
+    parsed_upload_cache,
+    upload_checks,
+)
+from app.upload_checks import CHECKING, FAILED, FINISHED
 from app.utils import (
     user_has_permissions,
     get_errors_for_csv,
+    RecipientsSummary,
     Spreadsheet,
+    split_into_shards,
+    is_blank_csv_line,
     get_help_argument,
     get_template,
     email_or_sms_not_enabled,
+    jsonify_partials,
+    STOP_POLLING,
 )
+from app.its_dangerous_session import session_read_only
 from app.template_previews import TemplatePreview, get_page_count_for_letter
 
 
@@ -127,7 +146,9 @@ def send_messages(service_id, template_id):
                 Spreadsheet.from_file(form.file.data, filename=form.file.data.filename).as_dict,
                 current_app.config['AWS_REGION']
             )
+            _forget_upload()
             session['upload_data'] = {
+                "upload_id": upload_id,
                 "template_id": template_id,
                 "original_file_name": form.file.data.filename
             }
@@ -432,7 +453,7 @@ def send_test_preview(service_id, template_id, filetype):
     return TemplatePreview.from_utils_template(template, filetype, page=request.args.get('page'))
 
 
-def _check_messages(service_id, template_type, upload_id, letters_as_pdf=False):
+def _check_messages(service_id, template_type, upload_id):
 
     if not session.get('upload_data'):
         # if we just return a `redirect` (302) object here, we'll get errors when we try and unpack in the
@@ -448,12 +469,12 @@ def _check_messages(service_id, template_type, upload_id, letters_as_pdf=False):
     statistics = service_api_client.get_detailed_service_for_today(service_id)['data']['statistics']
     remaining_messages = (current_service['message_limit'] - sum(stat['requested'] for stat in statistics.values()))
 
-    contents = s3download(service_id, upload_id)
+    db_template = service_api_client.get_service_template(
+        service_id,
+        session['upload_data'].get('template_id')
+    )['data']
     template = get_template(
-        service_api_client.get_service_template(
-            service_id,
-            session['upload_data'].get('template_id')
-        )['data'],
+        db_template,
         current_service,
         show_recipient=True,
         letter_preview_url=url_for(
@@ -462,21 +483,30 @@ def _check_messages(service_id, template_type, upload_id, letters_as_pdf=False):
             template_type=template_type,
             upload_id=upload_id,
             filetype='png',
-        ) if not letters_as_pdf else None,
+        ),
         email_reply_to=get_email_reply_to_address_from_session(service_id),
     )
-    recipients = RecipientCSV(
-        contents,
+    whitelist = list(itertools.chain.from_iterable(
+        [user.name, user.mobile_number, user.email_address] for user in users
+    )) if current_service['restricted'] else None
+    international_sms = 'international_sms' in current_service['permissions']
+
+    recipients_summary = _get_recipients_summary(
+        service_id,
+        upload_id,
+        cache_key=_get_parsed_upload_cache_key(upload_id, db_template, whitelist, international_sms),
         template_type=template.template_type,
-        placeholders=template.placeholders,
-        max_initial_rows_shown=50,
-        max_errors_shown=50,
-        whitelist=itertools.chain.from_iterable(
-            [user.name, user.mobile_number, user.email_address] for user in users
-        ) if current_service['restricted'] else None,
+        placeholders=list(template.placeholders),
+        whitelist=whitelist,
         remaining_messages=remaining_messages,
-        international_sms='international_sms' in current_service['permissions'],
+        international_sms=international_sms,
     )
+    if recipients_summary is None:
+        # still being checked in the background
+        return None
+
+    # the only thing which changes between one look at the file and the next
+    recipients_summary.remaining_messages = remaining_messages
 
     if request.args.get('from_test'):
         # only happens if generating a letter preview test
@@ -486,27 +516,27 @@ def _check_messages(service_id, template_type, upload_id, letters_as_pdf=False):
         back_link = url_for('.send_messages', service_id=service_id, template_id=template.id)
         choose_time_form = ChooseTimeForm()
 
-    with suppress(StopIteration):
-        first_recipient = None
-        template.values = next(recipients.rows)
+    first_recipient = None
+    if recipients_summary.first_row is not None:
+        template.values = recipients_summary.first_row
         first_recipient = template.values.get(
-            Columns.make_key(recipients.recipient_column_headers[0]),
+            Columns.make_key(recipients_summary.recipient_column_headers[0]),
             ''
         )
 
-    session['upload_data']['notification_count'] = len(list(recipients.rows))
-    session['upload_data']['valid'] = not recipients.has_errors
+    session['upload_data']['notification_count'] = recipients_summary.count
+    session['upload_data']['valid'] = not recipients_summary.has_errors
     return dict(
-        recipients=recipients,
+        recipients_summary=recipients_summary,
         first_recipient=first_recipient,
         template=template,
-        errors=recipients.has_errors,
-        row_errors=get_errors_for_csv(recipients, template.template_type),
+        errors=recipients_summary.has_errors,
+        row_errors=get_errors_for_csv(recipients_summary, template.template_type),
         count_of_recipients=session['upload_data']['notification_count'],
         count_of_displayed_recipients=(
-            len(list(recipients.initial_annotated_rows_with_errors))
-            if any(recipients.rows_with_errors) and not recipients.missing_column_headers else
-            len(list(recipients.initial_annotated_rows))
+            len(recipients_summary.initial_annotated_rows_with_errors)
+            if recipients_summary.rows_with_errors and not recipients_summary.missing_column_headers else
+            len(recipients_summary.initial_annotated_rows)
         ),
         original_file_name=session['upload_data'].get('original_file_name'),
         upload_id=upload_id,
@@ -520,10 +550,80 @@ def _check_messages(service_id, template_type, upload_id, letters_as_pdf=False):
             template.template_type == 'letter',
             not request.args.get('from_test'),
         )),
-        required_recipient_columns=OrderedSet(recipients.recipient_column_headers) - optional_address_columns
+        required_recipient_columns=(
+            OrderedSet(recipients_summary.recipient_column_headers) - optional_address_columns
+        ),
     )
 
 
+def _get_recipients_summary(service_id, upload_id, cache_key, **kwargs):
+    recipients_summary = parsed_upload_cache.get(cache_key)
+    if recipients_summary is not None:
+        return recipients_summary
+
+    if upload_checks.get_status(upload_id) == CHECKING:
+        return None
+
+    contents = s3download(service_id, upload_id)
+    # if checking it in the background failed (or its result has gone), check it here so that whatever went
+    # wrong shows up
+    if (
+        parsed_upload_cache.ttl and
+        upload_checks.get_status(upload_id) is None and
+        upload_checks.should_run_in_background(contents)
+    ):
+        upload_checks.start(
+            upload_id,
+            partial(_summarise_shard, **kwargs),
+            _split_for_checking(contents),
+            callback=partial(_save_recipients_summary, cache_key),
+        )
+        return None
+
+    recipients_summary = _summarise_recipients(contents, **kwargs)
+    parsed_upload_cache.set(cache_key, recipients_summary)
+    return recipients_summary
+
+
+def _summarise_recipients(contents, **kwargs):
+    shards = _split_for_checking(contents)
+    if len(shards) == 1:
+        return _summarise_shard(contents, **kwargs)
+    return RecipientsSummary.from_shards(upload_checks.map(partial(_summarise_shard, **kwargs), shards))
+
+
+def _split_for_checking(contents):
+    # one process checking the shards one after another is slower than checking the whole file, for the time it
+    # takes to split it up and pickle every shard
+    if upload_checks.max_workers > 1:
+        return split_into_shards(contents, upload_checks.rows_per_shard)
+    return [contents]
+
+
+def _save_recipients_summary(cache_key, shard_summaries):
+    parsed_upload_cache.set(cache_key, RecipientsSummary.from_shards(shard_summaries))
+
+
+def _summarise_shard(contents, **kwargs):
+    # one pass through the file, rather than one for each thing we need to know about it
+    return RecipientsSummary(RecipientCSV(
+        contents,
+        max_initial_rows_shown=50,
+        max_errors_shown=50,
+        **kwargs
+    ))
+
+
+def _get_parsed_upload_cache_key(upload_id, db_template, whitelist, international_sms):
+    # anything which changes how the file is checked means checking it again
+    return '{}/{}'.format(upload_id, hashlib.sha1(json.dumps([
+        db_template['id'],
+        db_template.get('version'),
+        whitelist,
+        international_sms,
+    ]).encode('utf-8')).hexdigest())
+
+
 @main.route("/services/<service_id>/<template_type>/check/<upload_id>", methods=['GET'])
 @login_required
 @user_has_permissions('send_texts', 'send_emails', 'send_letters')
@@ -531,11 +631,20 @@ def check_messages(service_id, template_type, upload_id):
 
     data = _check_messages(service_id, template_type, upload_id)
 
+    if data is None:
+        return render_template(
+            'views/check/in-progress.html',
+            partials=_get_check_progress(template_type, upload_id)[0],
+            original_file_name=session['upload_data'].get('original_file_name'),
+            upload_id=upload_id,
+            template_type=template_type,
+        )
+
     if (
-        data['recipients'].too_many_rows or
+        data['recipients_summary'].too_many_rows or
         not data['count_of_recipients'] or
-        not data['recipients'].has_recipient_columns or
-        data['recipients'].missing_column_headers
+        not data['recipients_summary'].has_recipient_columns or
+        data['recipients_summary'].missing_column_headers
     ):
         return render_template('views/check/column-errors.html', **data)
 
@@ -551,6 +660,35 @@ def check_messages(service_id, template_type, upload_id):
     return render_template('views/check/ok.html', **data)
 
 
+@main.route("/services/<service_id>/<template_type>/check/<upload_id>/progress.json")
+@session_read_only
+@login_required
+@user_has_permissions('send_texts', 'send_emails', 'send_letters')
+def check_messages_progress(service_id, template_type, upload_id):
+
+    partials, poll_interval_seconds = _get_check_progress(template_type, upload_id)
+
+    return jsonify_partials(partials, poll_interval_seconds=poll_interval_seconds)
+
+
+def _get_check_progress(template_type, upload_id):
+    status = upload_checks.get_status(upload_id)
+    # failing counts as finished, since the check page then checks the file itself
+    finished = status in {FINISHED, FAILED}
+    # the check was lost (or this instance can’t see it), so the check page needs to start it again
+    lost = status is None
+    return {
+        'progress': render_template(
+            'partials/check/progress.html',
+            finished=finished,
+            lost=lost,
+            original_file_name=session.get('upload_data', {}).get('original_file_name'),
+            template_type=template_type,
+            upload_id=upload_id,
+        ),
+    }, STOP_POLLING if finished or lost else None
+
+
 @main.route("/services/<service_id>/<template_type>/check/<upload_id>.<filetype>", methods=['GET'])
 @login_required
 @user_has_permissions('send_texts', 'send_emails', 'send_letters')
@@ -558,12 +696,42 @@ def check_messages_preview(service_id, template_type, upload_id, filetype):
     if filetype not in ('pdf', 'png'):
         abort(404)
 
-    template = _check_messages(
-        service_id, template_type, upload_id, letters_as_pdf=True
-    )['template']
+    if not session.get('upload_data'):
+        return redirect(url_for('main.choose_template', service_id=service_id))
+
+    # the preview only shows the first row, so there’s no need to check the whole file like the check page does
+    template = get_template(
+        service_api_client.get_service_template(
+            service_id,
+            session['upload_data'].get('template_id')
+        )['data'],
+        current_service,
+        show_recipient=True,
+    )
+    first_row = _get_first_row(service_id, upload_id, template)
+    if first_row is not None:
+        template.values = first_row
     return TemplatePreview.from_utils_template(template, filetype)
 
 
+def _get_first_row(service_id, upload_id, template):
+    lines = s3download_lines(service_id, upload_id)
+    try:
+        # blank lines before the column headers are left out, same as when the whole file is checked
+        header = next((line for line in lines if not is_blank_csv_line(line)), '')
+        for line in lines:
+            # rows without any data in don’t count, same as when the whole file is checked
+            with suppress(StopIteration):
+                return next(RecipientCSV(
+                    header + line,
+                    template_type=template.template_type,
+                    placeholders=template.placeholders,
+                ).rows)
+        return None
+    finally:
+        lines.close()
+
+
 @main.route("/services/<service_id>/<template_type>/check/<upload_id>", methods=['POST'])
 @login_required
 @user_has_permissions('send_texts', 'send_emails', 'send_letters')
@@ -585,6 +753,7 @@ def start_job(service_id, upload_id):
         # The csv was invalid, validate the csv again
         return send_messages(service_id, upload_data.get('template_id'))
 
+    _forget_upload()
     session.pop('upload_data')
 
     job_api_client.create_job(
@@ -658,7 +827,9 @@ def make_and_upload_csv_file(service_id, template):
         ).as_dict,
         current_app.config['AWS_REGION'],
     )
+    _forget_upload()
     session['upload_data'] = {
+        "upload_id": upload_id,
         "template_id": template.id,
         "original_file_name": current_app.config['TEST_MESSAGE_FILENAME']
     }
@@ -672,6 +843,13 @@ def make_and_upload_csv_file(service_id, template):
     ))
 
 
+def _forget_upload():
+    # the upload in the session is being replaced or sent, so nobody will look at it again
+    upload_id = session.get('upload_data', {}).get('upload_id')
+    if upload_id:
+        parsed_upload_cache.delete_prefix(upload_id)
+
+
 def all_placeholders_in_session(placeholders):
     return all(
         get_normalised_placeholders_from_session().get(placeholder, False) not in (False, None)
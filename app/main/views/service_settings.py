@@ -1,6 +1,6 @@
+from functools import partial
 from urllib.parse import urlparse
 
-import requests
 from flask import (
     render_template,
     redirect,
@@ -20,8 +20,9 @@ from flask_login import (
 from notifications_utils.field import Field
 from notifications_python_client.errors import HTTPError
 
-from app import service_api_client
+from app import service_api_client, pooled_sessions
 from app.main import main
+from app.main.views.data_loader import load
 from app.utils import user_has_permissions, email_safe, get_cdn_domain
 from app.main.forms import (
     ConfirmPasswordForm,
@@ -56,13 +57,22 @@ def get_inbound_api():
 @login_required
 @user_has_permissions('manage_settings', admin_override=True)
 def service_settings(service_id):
-    letter_branding_organisations = organisations_client.get_letter_organisations()
-    if current_service['organisation']:
-        organisation = organisations_client.get_organisation(current_service['organisation'])['organisation']
-    else:
-        organisation = None
+    data = load(
+        letter_branding_organisations=organisations_client.get_letter_organisations,
+        organisation=(
+            partial(organisations_client.get_organisation, current_service['organisation'])
+            if current_service['organisation'] else None
+        ),
+        inbound_api=get_inbound_api,
+        inbound_number=partial(inbound_number_client.get_inbound_sms_number_for_service, service_id),
+        reply_to_email_addresses=partial(service_api_client.get_reply_to_email_addresses, service_id),
+        letter_contact_details=partial(service_api_client.get_letter_contacts, service_id),
+    )
 
-    inbound_api = get_inbound_api()
+    letter_branding_organisations = data['letter_branding_organisations']
+    organisation = data['organisation']['organisation'] if data['organisation'] else None
+
+    inbound_api = data['inbound_api']
     if inbound_api:
         parsed_url = urlparse(inbound_api.get('url')) if inbound_api else ''
         inbound_api_url = '{uri.scheme}://{uri.netloc}{elide_token}'.format(
@@ -70,14 +80,13 @@ def service_settings(service_id):
     else:
         inbound_api_url = ''
 
-    inbound_number = inbound_number_client.get_inbound_sms_number_for_service(service_id)
-    disp_inbound_number = inbound_number['data'].get('number', '')
-    reply_to_email_addresses = service_api_client.get_reply_to_email_addresses(service_id)
+    disp_inbound_number = data['inbound_number']['data'].get('number', '')
+    reply_to_email_addresses = data['reply_to_email_addresses']
     reply_to_email_address_count = len(reply_to_email_addresses)
     default_reply_to_email_address = next(
         (x['email_address'] for x in reply_to_email_addresses if x['is_default']), "Not set"
     )
-    letter_contact_details = service_api_client.get_letter_contacts(service_id)
+    letter_contact_details = data['letter_contact_details']
     letter_contact_details_count = len(letter_contact_details)
     default_letter_contact_block = next(
         (Field(x['contact_block'], html='escape') for x in letter_contact_details if x['is_default']), "Not set"
@@ -193,7 +202,7 @@ def service_request_to_go_live(service_id):
             "X-DeskPRO-API-Key": current_app.config.get('DESKPRO_API_KEY'),
             'Content-Type': "application/x-www-form-urlencoded"
         }
-        resp = requests.post(
+        resp = pooled_sessions.post(
             current_app.config.get('DESKPRO_API_HOST') + '/api/tickets',
             data=data,
             headers=headers
@@ -1,9 +1,23 @@
+from copy import deepcopy
+from functools import partial
+from threading import Event, Lock
+from time import monotonic
+import json
+import logging
+from urllib.parse import urljoin
+
+import requests
 from flask_login import current_user
 from flask import has_request_context, request, abort
+from flask.globals import _request_ctx_stack
 from notifications_python_client.base import BaseAPIClient
+from notifications_python_client.errors import HTTPError, InvalidResponse
 from notifications_python_client.version import __version__
 
 
+logger = logging.getLogger(__name__)
+
+
 def _attach_current_user(data):
     return dict(
         created_by=current_user.id,
@@ -11,10 +25,102 @@ def _attach_current_user(data):
     )
 
 
+class RequestMemo(object):
+    """
+    Responses to GET requests made while handling a single incoming request, so that the same
+    upstream call made twice by one page load only goes over the wire once.
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.hits = 0
+        self.misses = 0
+        self.written = False
+
+    @staticmethod
+    def make_key(base_url, url, params):
+        return (base_url, url, json.dumps(params, sort_keys=True, default=str))
+
+    def flush(self):
+        # something has been written, so nothing fetched before it can be used for the rest of the request
+        self.responses.clear()
+        self.written = True
+
+
+def get_request_memo():
+    if not has_request_context():
+        return None
+    top = _request_ctx_stack.top
+    if not hasattr(top, 'api_request_memo'):
+        top.api_request_memo = RequestMemo()
+    return top.api_request_memo
+
+
+class SingleFlight(object):
+    """
+    Makes concurrent calls with the same key share one call: the first caller does the work, and anyone who
+    asks for the same key before it has finished waits for it and gets a copy of its result (or its exception).
+    """
+
+    class _Call(object):
+        def __init__(self):
+            self.done = Event()
+            self.waiters = 0
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = Lock()
+
+    def do(self, key, function):
+        """
+        Returns a tuple of the result and whether it was shared with a call already in flight.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            in_flight = call is not None
+            if in_flight:
+                call.waiters += 1
+            else:
+                call = self._calls[key] = self._Call()
+
+        if in_flight:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return deepcopy(call.result), True
+
+        try:
+            result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            try:
+                # only pay for a copy if someone is waiting for one - nobody new can join once the key has gone
+                if call.waiters and call.error is None:
+                    call.result = deepcopy(result)
+            finally:
+                call.done.set()
+        return result, False
+
+
+_in_flight_gets = SingleFlight()
+
+
 class NotifyAdminAPIClient(BaseAPIClient):
+    # concurrent identical GETs from this worker share one request to the API - except once this request has written
+    # something, since a GET started earlier (by another request) might not see it. Set this to False on a client
+    # (or pass `coalesce=False` to `get`) for anything which mustn’t be answered by a request that started earlier
+    coalesce_get_requests = True
+
     def generate_headers(self, api_token):
         headers = {
             "Content-type": "application/json",
+            "Accept-Encoding": "gzip",
             "Authorization": "Bearer {}".format(api_token),
             "User-agent": "NOTIFY-API-PYTHON-CLIENT/{}".format(__version__)
         }
@@ -37,14 +143,122 @@ class NotifyAdminAPIClient(BaseAPIClient):
         if current_service and not current_service['active'] and not current_user.platform_admin:
             abort(403)
 
+    def request(self, method, url, data=None, params=None):
+        # the same as `BaseAPIClient.request`, but sent through a pooled keep-alive session for the API host rather
+        # than a new connection every time, and not sent at all if the endpoint’s circuit breaker is open. It’s given
+        # the endpoint’s timeout, and slow GETs may be hedged with a second attempt. The token is reused for a while
+        # rather than signed again for every call
+        from app import api_token_cache, circuit_breakers, json_decoder, pooled_sessions, request_budgets
+
+        logger.debug("API request {} {}".format(method, url))
+
+        payload = json.dumps(data)
+
+        api_token = api_token_cache.get(
+            self.api_key,
+            self.service_id
+        )
+
+        circuit_breaker = circuit_breakers.get(method, url)
+        circuit_breakers.before_call(circuit_breaker)
+
+        url = urljoin(str(self.base_url), str(url))
+
+        start_time = monotonic()
+        upstream_failed = True
+        try:
+            response = request_budgets.send(method, circuit_breaker.endpoint, partial(
+                pooled_sessions.request,
+                method,
+                url,
+                headers=self.generate_headers(api_token),
+                data=payload,
+                params=params
+            ))
+            response.raise_for_status()
+            upstream_failed = False
+        except requests.RequestException as e:
+            api_error = HTTPError.create(e)
+            # a 4xx means the API is working, it just didn’t like what we asked for
+            upstream_failed = api_error.status_code >= 500
+            logger.error(
+                "API {} request on {} failed with {} '{}'".format(
+                    method,
+                    url,
+                    api_error.status_code,
+                    api_error.message
+                )
+            )
+            raise api_error
+        finally:
+            elapsed_time = monotonic() - start_time
+            circuit_breakers.record(circuit_breaker, elapsed_time, failed=upstream_failed)
+            logger.debug("API {} request on {} finished in {}".format(method, url, elapsed_time))
+
+        try:
+            if response.status_code == 204:
+                return
+            return json_decoder.decode(response.content)
+        except ValueError:
+            raise InvalidResponse(
+                response,
+                message="No JSON response object could be decoded"
+            )
+
+    def get(self, url, params=None, coalesce=True, memo=True):
+        """
+        Pass `memo=False` for anything big which is only looked at once, like one of many pages of a download, so
+        it isn’t kept (and copied) for the rest of the request.
+        """
+        request_memo = get_request_memo() if memo else None
+        if request_memo is None:
+            return self._coalesced_get(url, params, coalesce)
+
+        from app import statsd_client
+
+        key = RequestMemo.make_key(self.base_url, url, params)
+        if key in request_memo.responses:
+            request_memo.hits += 1
+            statsd_client.incr('notify-admin-api-client.request-memo.hit')
+            return deepcopy(request_memo.responses[key])
+
+        request_memo.misses += 1
+        statsd_client.incr('notify-admin-api-client.request-memo.miss')
+        response = self._coalesced_get(url, params, coalesce)
+        # callers are free to mutate what they get back, so keep our own copy
+        request_memo.responses[key] = deepcopy(response)
+        return response
+
+    def _coalesced_get(self, url, params, coalesce):
+        request_memo = get_request_memo()
+        if not (coalesce and self.coalesce_get_requests) or (request_memo is not None and request_memo.written):
+            return super().get(url, params=params)
+
+        response, shared = _in_flight_gets.do(
+            RequestMemo.make_key(self.base_url, url, params),
+            partial(super().get, url, params=params),
+        )
+        if shared:
+            from app import statsd_client
+            statsd_client.incr('notify-admin-api-client.get.coalesced')
+        return response
+
+    def _flush_request_memo(self):
+        memo = get_request_memo()
+        if memo is not None:
+            memo.flush()
+
     def post(self, *args, **kwargs):
         self.check_inactive_service()
+        self._flush_request_memo()
         return super().post(*args, **kwargs)
 
     def put(self, *args, **kwargs):
         self.check_inactive_service()
+        self._flush_request_memo()
         return super().put(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
         self.check_inactive_service()
+        self._flush_request_memo()
         return super().delete(*args, **kwargs)
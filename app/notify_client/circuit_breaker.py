@@ -0,0 +1,153 @@
+import logging
+import re
+from threading import Lock
+from time import monotonic
+from urllib.parse import urlparse
+
+from notifications_python_client.errors import HTTP503Error
+
+
+logger = logging.getLogger(__name__)
+
+# ids in the path are replaced, so that (for example) every service’s inbound SMS summary shares one breaker
+ID_IN_PATH = re.compile(r'/(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|\d+)(?=/|$)', re.IGNORECASE)
+
+
+class CircuitOpenError(HTTP503Error):
+    """
+    Raised instead of calling an API endpoint which has recently been failing or slow. It’s a 503, so anything
+    which doesn’t handle it gets the same error page as the API itself being down.
+    """
+
+    def __init__(self, endpoint):
+        super().__init__(message='{} is temporarily unavailable'.format(endpoint))
+        self.endpoint = endpoint
+
+
+class CircuitBreaker(object):
+    """
+    Stops calling an endpoint once `failure_threshold` calls in a row have failed (with a 5xx or no response at
+    all) or taken longer than `latency_threshold` seconds. After `reset_timeout` seconds one call is let through
+    to see if the endpoint has recovered: if it has the breaker closes again, if not it stays open for another
+    `reset_timeout` seconds.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, endpoint, failure_threshold=5, latency_threshold=5, reset_timeout=30):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._lock = Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and monotonic() - self.opened_at >= self.reset_timeout:
+                # let this call through as a trial - everyone else keeps being turned away until it’s finished
+                self.state = self.HALF_OPEN
+                return
+        raise CircuitOpenError(self.endpoint)
+
+    def record(self, elapsed_time, failed=False):
+        """
+        Returns True if this call opened the breaker.
+        """
+        failed = failed or elapsed_time > self.latency_threshold
+        with self._lock:
+            if not failed:
+                self.state = self.CLOSED
+                self.consecutive_failures = 0
+                return False
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = monotonic()
+                return True
+            return False
+
+
+class CircuitBreakers(object):
+    """
+        One `CircuitBreaker` per API endpoint, for this worker process. A call counts as slow once it has taken
+        `latency_threshold` of the endpoint’s read timeout, so endpoints which are given longer are allowed longer.
+
+        Usage:
+
+            circuit_breakers = CircuitBreakers()
+            circuit_breakers.init_app(application, statsd_client)
+
+            circuit_breaker = circuit_breakers.get('GET', '/service/1234/inbound-sms/summary')
+    """
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = Lock()
+        self.statsd_client = None
+        self.enabled = True
+        self.failure_threshold = 5
+        self.latency_threshold = 0.5
+        self.read_timeout = 10
+        self.endpoint_read_timeouts = {}
+        self.reset_timeout = 30
+
+    def init_app(self, application, statsd_client=None):
+        self.statsd_client = statsd_client
+        self.enabled = application.config['CIRCUIT_BREAKER_ENABLED']
+        self.failure_threshold = application.config['CIRCUIT_BREAKER_FAILURE_THRESHOLD']
+        self.latency_threshold = application.config['CIRCUIT_BREAKER_LATENCY_THRESHOLD']
+        self.read_timeout = application.config['API_READ_TIMEOUT_SECONDS']
+        self.endpoint_read_timeouts = application.config['API_ENDPOINT_READ_TIMEOUT_SECONDS']
+        self.reset_timeout = application.config['CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS']
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._breakers.clear()
+
+    @staticmethod
+    def get_endpoint(method, url):
+        return '{} {}'.format(method.upper(), ID_IN_PATH.sub('/<id>', urlparse(url).path))
+
+    def get(self, method, url):
+        endpoint = self.get_endpoint(method, url)
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(
+                    endpoint,
+                    failure_threshold=self.failure_threshold,
+                    latency_threshold=self.latency_threshold * self.endpoint_read_timeouts.get(
+                        endpoint, self.read_timeout
+                    ),
+                    reset_timeout=self.reset_timeout,
+                )
+            return self._breakers[endpoint]
+
+    def before_call(self, circuit_breaker):
+        if not self.enabled:
+            return
+        try:
+            circuit_breaker.before_call()
+        except CircuitOpenError:
+            self._incr('circuit-breaker.rejected')
+            raise
+
+    def record(self, circuit_breaker, elapsed_time, failed=False):
+        if not self.enabled:
+            return
+        if circuit_breaker.record(elapsed_time, failed=failed):
+            logger.warning('Circuit breaker opened for {}'.format(circuit_breaker.endpoint))
+            self._incr('circuit-breaker.opened')
+
+    def _incr(self, metric):
+        if self.statsd_client:
+            self.statsd_client.incr(metric)
@@ -18,7 +18,19 @@ class InboundNumberClient(NotifyAdminAPIClient):
         return self.get('/inbound-number/service/{}'.format(service_id))
 
     def activate_inbound_sms_service(self, service_id):
-        return self.post(url='/inbound-number/service/{}'.format(service_id), data={})
+        try:
+            return self.post(url='/inbound-number/service/{}'.format(service_id), data={})
+        finally:
+            self._forget_service(service_id)
 
     def deactivate_inbound_sms_permission(self, service_id):
-        return self.post(url='/inbound-number/service/{}/off'.format(service_id), data={})
+        try:
+            return self.post(url='/inbound-number/service/{}/off'.format(service_id), data={})
+        finally:
+            self._forget_service(service_id)
+
+    @staticmethod
+    def _forget_service(service_id):
+        # changing the inbound number changes the service’s SMS sender and permissions
+        from app import service_api_client
+        service_api_client.forget_service(service_id)
@@ -1,5 +1,6 @@
 from collections import defaultdict
 
+from app.cache import LRUCache, create_immutable_cache
 from app.notify_client import _attach_current_user, NotifyAdminAPIClient
 
 
@@ -18,11 +19,17 @@ class JobApiClient(NotifyAdminAPIClient):
 
     def __init__(self):
         super().__init__("a" * 73, "b")
+        self.finished_job_cache = LRUCache()
 
     def init_app(self, app):
         self.base_url = app.config['API_HOST_NAME']
         self.service_id = app.config['ADMIN_CLIENT_USER_NAME']
         self.api_key = app.config['ADMIN_CLIENT_SECRET']
+        self.finished_job_cache = create_immutable_cache(
+            app.config['FINISHED_CACHE_MAX_SIZE'],
+            redis_url=app.config['REDIS_URL'],
+            key_prefix='finished-job/',
+        )
 
     @staticmethod
     def __convert_statistics(job):
@@ -37,7 +44,22 @@ class JobApiClient(NotifyAdminAPIClient):
             results['requested'] += outcome['count']
         return results
 
+    @staticmethod
+    def is_finished(job):
+        processed_notifications = job.get('notifications_delivered', 0) + job.get('notifications_failed', 0)
+        return job.get('notification_count', 0) == processed_notifications
+
     def get_job(self, service_id, job_id):
+        from app import statsd_client
+
+        # once every notification in a job has been delivered or has failed its counts never change again
+        cache_key = '{}/{}'.format(service_id, job_id)
+        job = self.finished_job_cache.get(cache_key)
+        if job is not None:
+            statsd_client.incr('finished-cache.job.hit')
+            return job
+
+        statsd_client.incr('finished-cache.job.miss')
         params = {}
         job = self.get(url='/service/{}/job/{}'.format(service_id, job_id), params=params)
         stats = self.__convert_statistics(job['data'])
@@ -46,6 +68,8 @@ class JobApiClient(NotifyAdminAPIClient):
         job['data']['notifications_failed'] = stats['failed']
         job['data']['notifications_requested'] = stats['requested']
 
+        if self.is_finished(job['data']):
+            self.finished_job_cache.set(cache_key, job)
         return job
 
     def get_jobs(self, service_id, limit_days=None, statuses=None, page=1):
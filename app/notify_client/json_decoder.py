@@ -0,0 +1,42 @@
+import json
+import logging
+from importlib import import_module
+
+
+logger = logging.getLogger(__name__)
+
+# any module with a `loads` which takes a string and raises a ValueError for something that isn’t JSON will do
+SUPPORTED_BACKENDS = ('ujson', 'rapidjson', 'simplejson', 'json')
+
+
+class JSONDecoder(object):
+    """
+        Decodes API responses with a faster JSON library if one is installed, or the standard library’s if not.
+
+        Usage:
+
+            json_decoder = JSONDecoder()
+            json_decoder.init_app(application)
+
+            data = json_decoder.decode(response.content)
+    """
+
+    def __init__(self):
+        self.backend = 'json'
+        self.loads = json.loads
+
+    def init_app(self, application):
+        self.backend, self.loads = get_loads(application.config['API_JSON_DECODER'])
+
+    def decode(self, content):
+        return self.loads(content.decode('utf-8'))
+
+
+def get_loads(backend):
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError('Unknown JSON decoder {}'.format(backend))
+    try:
+        return backend, import_module(backend).loads
+    except ImportError:
+        logger.warning('{} is not installed, decoding API responses with json instead'.format(backend))
+        return 'json', json.loads
@@ -1,14 +1,22 @@
+from app.cache import LRUCache, create_immutable_cache
 from app.notify_client import _attach_current_user, NotifyAdminAPIClient
+from app.utils import DELIVERED_STATUSES, FAILURE_STATUSES
 
 
 class NotificationApiClient(NotifyAdminAPIClient):
     def __init__(self):
         super().__init__("a" * 73, "b")
+        self.finished_notification_cache = LRUCache()
 
     def init_app(self, app):
         self.base_url = app.config['API_HOST_NAME']
         self.service_id = app.config['ADMIN_CLIENT_USER_NAME']
         self.api_key = app.config['ADMIN_CLIENT_SECRET']
+        self.finished_notification_cache = create_immutable_cache(
+            app.config['FINISHED_CACHE_MAX_SIZE'],
+            redis_url=app.config['REDIS_URL'],
+            key_prefix='finished-notification/',
+        )
 
     def get_notifications_for_service(
         self,
@@ -41,17 +49,21 @@ class NotificationApiClient(NotifyAdminAPIClient):
             params['format_for_csv'] = format_for_csv
         if to is not None:
             params['to'] = to
+        # big pages (like the ones a CSV download is made of) are only looked at once
+        memo = page_size is None and not format_for_csv
         if job_id:
             return self.get(
                 url='/service/{}/job/{}/notifications'.format(service_id, job_id),
-                params=params
+                params=params,
+                memo=memo,
             )
         else:
             if limit_days is not None:
                 params['limit_days'] = limit_days
             return self.get(
                 url='/service/{}/notifications'.format(service_id),
-                params=params
+                params=params,
+                memo=memo,
             )
 
     def send_notification(self, service_id, *, template_id, recipient, personalisation, sender_id):
@@ -66,7 +78,20 @@ class NotificationApiClient(NotifyAdminAPIClient):
         return self.post(url='/service/{}/send-notification'.format(service_id), data=data)
 
     def get_notification(self, service_id, notification_id):
-        return self.get(url='/service/{}/notifications/{}'.format(service_id, notification_id))
+        from app import statsd_client
+
+        # once a notification has been delivered or has failed it never changes, so we can keep it
+        cache_key = '{}/{}'.format(service_id, notification_id)
+        notification = self.finished_notification_cache.get(cache_key)
+        if notification is not None:
+            statsd_client.incr('finished-cache.notification.hit')
+            return notification
+
+        statsd_client.incr('finished-cache.notification.miss')
+        notification = self.get(url='/service/{}/notifications/{}'.format(service_id, notification_id))
+        if notification['status'] in (DELIVERED_STATUSES + FAILURE_STATUSES):
+            self.finished_notification_cache.set(cache_key, notification)
+        return notification
 
     def get_api_notifications_for_service(self, service_id):
         ret = self.get_notifications_for_service(service_id, include_jobs=False, include_from_test_key=True)
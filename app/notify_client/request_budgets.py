@@ -0,0 +1,140 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+
+
+class LatencyTracker(object):
+    """
+    The last `window` response times for one endpoint, to work out how long is unusually long for it.
+    """
+
+    def __init__(self, window=200):
+        self._latencies = deque(maxlen=window)
+        self._lock = Lock()
+
+    def record(self, elapsed_time):
+        with self._lock:
+            self._latencies.append(elapsed_time)
+
+    def percentile(self, percentile, min_samples=1):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < max(min_samples, 1):
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile / 100))]
+
+
+class RequestBudgets(object):
+    """
+        How long each API endpoint gets to answer, and (for GETs, which are safe to send twice) whether to hedge:
+        if the first attempt has taken longer than the endpoint’s usual slowest responses, send a second one and
+        use whichever answers first.
+
+        Usage:
+
+            request_budgets = RequestBudgets()
+            request_budgets.init_app(application, statsd_client)
+
+            response = request_budgets.send('GET', 'GET /service/<id>/job', send)
+
+        where `send` makes the request, and takes the `timeout` to pass to requests.
+    """
+
+    def __init__(self):
+        self.statsd_client = None
+        self.connect_timeout = 3.05
+        self.read_timeout = 10
+        self.endpoint_read_timeouts = {}
+        self.hedge_get_requests = False
+        self.hedge_percentile = 95
+        self.hedge_min_samples = 20
+        self._latencies = {}
+        self._lock = Lock()
+        self._executor = None
+        self._free_threads = None
+
+    def init_app(self, application, statsd_client=None):
+        self.statsd_client = statsd_client
+        self.connect_timeout = application.config['API_CONNECT_TIMEOUT_SECONDS']
+        self.read_timeout = application.config['API_READ_TIMEOUT_SECONDS']
+        self.endpoint_read_timeouts = application.config['API_ENDPOINT_READ_TIMEOUT_SECONDS']
+        self.hedge_get_requests = application.config['API_HEDGE_GET_REQUESTS']
+        self.hedge_percentile = application.config['API_HEDGE_PERCENTILE']
+        self.hedge_min_samples = application.config['API_HEDGE_MIN_SAMPLES']
+        with self._lock:
+            self._latencies.clear()
+        if self.hedge_get_requests and self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=application.config['API_HEDGE_MAX_WORKERS'])
+            self._free_threads = BoundedSemaphore(application.config['API_HEDGE_MAX_WORKERS'])
+
+    def get_timeout(self, endpoint):
+        return (self.connect_timeout, self.endpoint_read_timeouts.get(endpoint, self.read_timeout))
+
+    def get_time_budget(self, *endpoints):
+        """
+        How long a page should wait for calls to these endpoints made at the same time: as long as the slowest of
+        them could take to connect and answer.
+        """
+        return max(sum(self.get_timeout(endpoint)) for endpoint in endpoints or (None,))
+
+    def _get_latency_tracker(self, endpoint):
+        with self._lock:
+            if endpoint not in self._latencies:
+                self._latencies[endpoint] = LatencyTracker()
+            return self._latencies[endpoint]
+
+    def get_hedge_delay(self, method, endpoint):
+        if not (self.hedge_get_requests and self._executor and method.upper() == 'GET'):
+            return None
+        return self._get_latency_tracker(endpoint).percentile(self.hedge_percentile, self.hedge_min_samples)
+
+    def send(self, method, endpoint, send):
+        timeout = self.get_timeout(endpoint)
+        hedge_delay = self.get_hedge_delay(method, endpoint)
+
+        start_time = monotonic()
+        if hedge_delay is None:
+            response = send(timeout=timeout)
+        else:
+            response = self._send_hedged(lambda: send(timeout=timeout), hedge_delay)
+        self._get_latency_tracker(endpoint).record(monotonic() - start_time)
+        return response
+
+    def _send_hedged(self, send, hedge_delay):
+        # each attempt only goes to another thread if one is free straight away - time spent queueing for a thread
+        # would look like a slow response, and set off more hedges just when the API is busiest
+        first_attempt = self._submit_if_free(send)
+        if first_attempt is None:
+            return send()
+        try:
+            return first_attempt.result(timeout=hedge_delay)
+        except TimeoutError:
+            pass
+
+        second_attempt = self._submit_if_free(send)
+        if second_attempt is None:
+            return first_attempt.result()
+        self._incr('api-client.hedged-request.sent')
+        for attempt in as_completed([first_attempt, second_attempt]):
+            if attempt.exception() is None:
+                if attempt is second_attempt:
+                    self._incr('api-client.hedged-request.won')
+                return attempt.result()
+        # neither worked, so go with what went wrong the first time
+        return first_attempt.result()
+
+    def _submit_if_free(self, send):
+        if not self._free_threads.acquire(blocking=False):
+            return None
+        return self._executor.submit(self._send_and_free_thread, send)
+
+    def _send_and_free_thread(self, send):
+        try:
+            return send()
+        finally:
+            self._free_threads.release()
+
+    def _incr(self, metric):
+        if self.statsd_client:
+            self.statsd_client.incr(metric)
@@ -1,20 +1,46 @@
 from __future__ import unicode_literals
+from functools import wraps
 
 from flask import url_for
+from app.cache import LRUCache, create_immutable_cache, create_shared_cache
 from app.utils import BrowsableItem
 from app.notify_client import _attach_current_user, NotifyAdminAPIClient
 
 
+def _forgets_service(method):
+    # for anything which changes what `get_service` returns
+    @wraps(method)
+    def wrapped(self, service_id, *args, **kwargs):
+        try:
+            return method(self, service_id, *args, **kwargs)
+        finally:
+            self.forget_service(service_id)
+    return wrapped
+
+
 class ServiceAPIClient(NotifyAdminAPIClient):
     # Fudge assert in the super __init__ so
     # we can set those variables later.
     def __init__(self):
         super().__init__("a" * 73, "b")
+        self.template_version_cache = LRUCache()
+        self.service_cache = LRUCache()
+        self.service_cache_ttl = 30
 
     def init_app(self, application):
         self.base_url = application.config['API_HOST_NAME']
         self.service_id = application.config['ADMIN_CLIENT_USER_NAME']
         self.api_key = application.config['ADMIN_CLIENT_SECRET']
+        self.template_version_cache = create_immutable_cache(
+            application.config['TEMPLATE_VERSION_CACHE_MAX_SIZE'],
+            redis_url=application.config['REDIS_URL'],
+            key_prefix='template-version/',
+        )
+        self.service_cache = create_shared_cache(application, key_prefix='service/')
+        # forgetting a service once it has changed has to reach every instance of the app, which only Redis can do
+        self.service_cache_ttl = application.config['SERVICE_CACHE_TTL_SECONDS'] if (
+            application.config['SHARED_CACHE_BACKEND'] == 'redis'
+        ) else 0
 
     def create_service(
         self,
@@ -43,7 +69,18 @@ class ServiceAPIClient(NotifyAdminAPIClient):
         return self.post("/service", data)['data']['id']
 
     def get_service(self, service_id):
-        return self._get_service(service_id, detailed=False, today_only=False)
+        # fetched on almost every request, so kept for a short while (by every worker) - and forgotten whenever we
+        # change the service. So it’s fetched again straight after a change, which mustn’t be answered by a GET that
+        # started before it
+        service = self.service_cache.get(str(service_id)) if self.service_cache_ttl else None
+        if service is None:
+            service = self._get_service(service_id, detailed=False, today_only=False, coalesce=False)
+            if self.service_cache_ttl:
+                self.service_cache.set(str(service_id), service, ttl=self.service_cache_ttl)
+        return service
+
+    def forget_service(self, service_id):
+        self.service_cache.delete(str(service_id))
 
     def get_detailed_service(self, service_id):
         return self._get_service(service_id, detailed=True, today_only=False)
@@ -51,7 +88,7 @@ class ServiceAPIClient(NotifyAdminAPIClient):
     def get_detailed_service_for_today(self, service_id):
         return self._get_service(service_id, detailed=True, today_only=True)
 
-    def _get_service(self, service_id, detailed, today_only):
+    def _get_service(self, service_id, detailed, today_only, coalesce=True):
         """
         Retrieve a service.
 
@@ -66,7 +103,8 @@ class ServiceAPIClient(NotifyAdminAPIClient):
 
         return self.get(
             '/service/{0}'.format(service_id),
-            params=params)
+            params=params,
+            coalesce=coalesce)
 
     def get_services(self, params_dict=None):
         """
@@ -81,6 +119,7 @@ class ServiceAPIClient(NotifyAdminAPIClient):
         params_dict['only_active'] = True
         return self.get_services(params_dict)
 
+    @_forgets_service
     def update_service(
         self,
         service_id,
@@ -119,24 +158,34 @@ class ServiceAPIClient(NotifyAdminAPIClient):
     def update_service_with_properties(self, service_id, properties):
         return self.update_service(service_id, **properties)
 
+    @_forgets_service
     def archive_service(self, service_id):
         return self.post('/service/{}/archive'.format(service_id), data=None)
 
+    @_forgets_service
     def suspend_service(self, service_id):
         return self.post('/service/{}/suspend'.format(service_id), data=None)
 
+    @_forgets_service
     def resume_service(self, service_id):
         return self.post('/service/{}/resume'.format(service_id), data=None)
 
+    @_forgets_service
     def remove_user_from_service(self, service_id, user_id):
         """
         Remove a user from a service
         """
+        # imported here to prevent cyclical imports
+        from app import user_api_client
+
         endpoint = '/service/{service_id}/users/{user_id}'.format(
             service_id=service_id,
             user_id=user_id)
         data = _attach_current_user({})
-        return self.delete(endpoint, data)
+        response = self.delete(endpoint, data)
+        # their permissions for this service have gone
+        user_api_client.forget_user(user_id)
+        return response
 
     def create_service_template(self, name, type_, content, service_id, subject=None, process_type='normal'):
         """
@@ -197,8 +246,21 @@ class ServiceAPIClient(NotifyAdminAPIClient):
             template_id=template_id)
         if version:
             endpoint = '{base}/version/{version}'.format(base=endpoint, version=version)
+            return self._get_service_template_version(service_id, template_id, version, endpoint, *params)
         return self.get(endpoint, *params)
 
+    def _get_service_template_version(self, service_id, template_id, version, endpoint, *params):
+        # a version of a template never changes, so once we’ve fetched it we can keep it - apart from whether the
+        # template is redacted, which changes without a new version and can’t be taken back out of every worker’s
+        # cache. So that’s left out: ask for the template without a version to find out
+        cache_key = '{}/{}/{}'.format(service_id, template_id, version)
+        template = self.template_version_cache.get(cache_key)
+        if template is None:
+            template = self.get(endpoint, *params)
+            template['data'].pop('redact_personalisation', None)
+            self.template_version_cache.set(cache_key, template)
+        return template
+
     def get_service_template_versions(self, service_id, template_id, *params):
         """
         Retrieve a list of versions for a template
@@ -270,6 +332,7 @@ class ServiceAPIClient(NotifyAdminAPIClient):
             '/service/{}/inbound-sms/summary'.format(service_id)
         )
 
+    @_forgets_service
     def create_service_inbound_api(self, service_id, url, bearer_token, user_id):
         data = {
             "url": url,
@@ -278,6 +341,7 @@ class ServiceAPIClient(NotifyAdminAPIClient):
         }
         return self.post("/service/{}/inbound-api".format(service_id), data)
 
+    @_forgets_service
     def update_service_inbound_api(self, service_id, url, bearer_token, user_id, inbound_api_id):
         data = {
             "url": url,
@@ -309,6 +373,7 @@ class ServiceAPIClient(NotifyAdminAPIClient):
             )
         )
 
+    @_forgets_service
     def add_reply_to_email_address(self, service_id, email_address, is_default=False):
         return self.post(
             "/service/{}/email-reply-to".format(service_id),
@@ -318,6 +383,7 @@ class ServiceAPIClient(NotifyAdminAPIClient):
             }
         )
 
+    @_forgets_service
     def update_reply_to_email_address(self, service_id, reply_to_email_id, email_address, is_default=False):
         return self.post(
             "/service/{}/email-reply-to/{}".format(
@@ -345,6 +411,7 @@ class ServiceAPIClient(NotifyAdminAPIClient):
             )
         )
 
+    @_forgets_service
     def add_letter_contact(self, service_id, contact_block, is_default=False):
         return self.post(
             "/service/{}/letter-contact".format(service_id),
@@ -354,6 +421,7 @@ class ServiceAPIClient(NotifyAdminAPIClient):
             }
         )
 
+    @_forgets_service
     def update_letter_contact(self, service_id, letter_contact_id, contact_block, is_default=False):
         return self.post(
             "/service/{}/letter-contact/{}".format(
@@ -0,0 +1,51 @@
+from threading import Lock
+from time import time
+
+from notifications_python_client.authentication import create_jwt_token
+
+
+class TokenCache(object):
+    """
+        Signs a JWT for the API once and reuses it for `reuse_fraction` of the time the API accepts it for, rather
+        than signing a new one for every call.
+
+        The API accepts a token issued up to `validity` seconds either side of its own clock, so whatever isn’t
+        used of the window is left as headroom for the clocks disagreeing. A new token is signed if our clock goes
+        backwards, or the secret changes.
+
+        Usage:
+
+            api_token_cache = TokenCache()
+            api_token_cache.init_app(application)
+
+            token = api_token_cache.get(secret, client_id)
+    """
+
+    def __init__(self):
+        self.validity = 30
+        self.reuse_fraction = 0.5
+        self._tokens = {}
+        self._lock = Lock()
+
+    def init_app(self, application):
+        self.validity = application.config['API_TOKEN_VALIDITY_SECONDS']
+        self.reuse_fraction = application.config['API_TOKEN_REUSE_FRACTION']
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+    @property
+    def max_age(self):
+        return self.validity * self.reuse_fraction
+
+    def get(self, secret, client_id):
+        now = time()
+        with self._lock:
+            cached_secret, token, issued_at = self._tokens.get(client_id, (None, None, None))
+            if cached_secret != secret or not 0 <= now - issued_at < self.max_age:
+                # `iat` is in whole seconds, rounded down, so age the token from that
+                token, issued_at = create_jwt_token(secret, client_id), int(now)
+                self._tokens[client_id] = (secret, token, issued_at)
+            return token
@@ -1,5 +1,7 @@
+from flask import has_request_context, session
 from notifications_python_client.errors import HTTPError
 
+from app.cache import LRUCache, create_shared_cache
 from app.notify_client import NotifyAdminAPIClient
 from app.notify_client.models import User
 
@@ -13,12 +15,20 @@ ALLOWED_ATTRIBUTES = {
 class UserApiClient(NotifyAdminAPIClient):
     def __init__(self):
         super().__init__("a" * 73, "b")
+        self.user_cache = LRUCache()
+        self.user_cache_ttl = 10
 
     def init_app(self, app):
         self.base_url = app.config['API_HOST_NAME']
         self.service_id = app.config['ADMIN_CLIENT_USER_NAME']
         self.api_key = app.config['ADMIN_CLIENT_SECRET']
         self.max_failed_login_count = app.config["MAX_FAILED_LOGIN_COUNT"]
+        self.user_cache = create_shared_cache(app, key_prefix='user/')
+        # forgetting a user (because they’ve signed in somewhere else, say) has to reach every instance of the app
+        # straight away, which only Redis can do
+        self.user_cache_ttl = app.config['USER_CACHE_TTL_SECONDS'] if (
+            app.config['SHARED_CACHE_BACKEND'] == 'redis'
+        ) else 0
 
     def register_user(self, name, email_address, mobile_number, password):
         data = {
@@ -31,9 +41,25 @@ class UserApiClient(NotifyAdminAPIClient):
         return User(user_data['data'], max_failed_login_count=self.max_failed_login_count)
 
     def get_user(self, id):
-        url = "/user/{}".format(id)
-        user_data = self.get(url)
-        return User(user_data['data'], max_failed_login_count=self.max_failed_login_count)
+        # every request from a signed in user (including every poll) loads them, so keep them for a short while.
+        # We only use what we’ve kept if it was fetched for the same session as this one - if the user has signed
+        # in somewhere else since then we’ll have forgotten it, so `logged_in_elsewhere` still works
+        current_session_id = session.get('current_session_id') if has_request_context() else None
+        user_data = self.user_cache.get(str(id)) if self.user_cache_ttl else None
+        if (
+            user_data is None or
+            current_session_id is None or
+            user_data.get('current_session_id') != current_session_id
+        ):
+            url = "/user/{}".format(id)
+            # not shared with a GET already in flight, which might have started before whatever made us forget it
+            user_data = self.get(url, coalesce=False)['data']
+            if self.user_cache_ttl:
+                self.user_cache.set(str(id), user_data, ttl=self.user_cache_ttl)
+        return User(user_data, max_failed_login_count=self.max_failed_login_count)
+
+    def forget_user(self, user_id):
+        self.user_cache.delete(str(user_id))
 
     def get_user_by_email(self, email_address):
         user_data = self.get('/user/email', params={'email': email_address})
@@ -57,6 +83,7 @@ class UserApiClient(NotifyAdminAPIClient):
         data = user.serialize()
         url = "/user/{}".format(user.id)
         user_data = self.put(url, data=data)
+        self.forget_user(user.id)
         return User(user_data['data'], max_failed_login_count=self.max_failed_login_count)
 
     def update_user_attribute(self, user_id, **kwargs):
@@ -70,17 +97,20 @@ class UserApiClient(NotifyAdminAPIClient):
         data = dict(**kwargs)
         url = "/user/{}".format(user_id)
         user_data = self.post(url, data=data)
+        self.forget_user(user_id)
         return User(user_data['data'], max_failed_login_count=self.max_failed_login_count)
 
     def reset_failed_login_count(self, user_id):
         url = "/user/{}/reset-failed-login-count".format(user_id)
         user_data = self.post(url, data={})
+        self.forget_user(user_id)
         return User(user_data['data'], max_failed_login_count=self.max_failed_login_count)
 
     def update_password(self, user_id, password):
         data = {"_password": password}
         url = "/user/{}/update-password".format(user_id)
         user_data = self.post(url, data=data)
+        self.forget_user(user_id)
         return User(user_data['data'], max_failed_login_count=self.max_failed_login_count)
 
     def verify_password(self, user_id, password):
@@ -92,6 +122,9 @@ class UserApiClient(NotifyAdminAPIClient):
         except HTTPError as e:
             if e.status_code == 400 or e.status_code == 404:
                 return False
+        finally:
+            # checking a password changes the user’s failed login count
+            self.forget_user(user_id)
 
     def send_verify_code(self, user_id, code_type, to):
         data = {'to': to}
@@ -124,6 +157,9 @@ class UserApiClient(NotifyAdminAPIClient):
                     # TODO what is the default message?
                     return False, 'Code not found'
             raise e
+        finally:
+            # a right code gives the user a new session, a wrong one changes their failed login count
+            self.forget_user(user_id)
 
     def get_users_for_service(self, service_id):
         endpoint = '/service/{}/users'.format(service_id)
@@ -134,12 +170,14 @@ class UserApiClient(NotifyAdminAPIClient):
         endpoint = '/service/{}/users/{}'.format(service_id, user_id)
         data = [{'permission': x} for x in permissions]
         resp = self.post(endpoint, data=data)
+        self.forget_user(user_id)
         return User(resp['data'], max_failed_login_count=self.max_failed_login_count)
 
     def set_user_permissions(self, user_id, service_id, permissions):
         data = [{'permission': x} for x in permissions]
         endpoint = '/user/{}/service/{}/permission'.format(user_id, service_id)
         self.post(endpoint, data=data)
+        self.forget_user(user_id)
 
     def send_reset_password_url(self, email_address):
         endpoint = '/user/reset-password'
@@ -0,0 +1,94 @@
+from threading import Lock
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+
+class PooledSessions(object):
+    """
+        Keeps one keep-alive `requests.Session` per upstream host, so that each worker process reuses
+        its TCP/TLS connections rather than opening a new one for every call.
+
+        Usage:
+
+            pooled_sessions = PooledSessions()
+            pooled_sessions.init_app(application, statsd_client)
+
+            response = pooled_sessions.post('https://example.com/foo', json={})
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = Lock()
+        self.statsd_client = None
+        self.pool_connections = 10
+        self.pool_maxsize = 10
+        self.max_retries = 0
+        self.retry_backoff_factor = 0
+
+    def init_app(self, application, statsd_client=None):
+        self.statsd_client = statsd_client
+        self.pool_connections = application.config['HTTP_POOL_CONNECTIONS']
+        self.pool_maxsize = application.config['HTTP_POOL_MAXSIZE']
+        self.max_retries = application.config['HTTP_MAX_RETRIES']
+        self.retry_backoff_factor = application.config['HTTP_RETRY_BACKOFF_FACTOR']
+        self.close()
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    @staticmethod
+    def get_host(url):
+        parsed_url = urlparse(url)
+        return '{}://{}'.format(parsed_url.scheme, parsed_url.netloc)
+
+    def get_session(self, url):
+        host = self.get_host(url)
+        with self._lock:
+            if host not in self._sessions:
+                self._sessions[host] = self._create_session()
+            return self._sessions[host]
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            # only retry failures to connect - anything else might not be safe to send twice
+            max_retries=Retry(
+                total=self.max_retries,
+                connect=self.max_retries,
+                read=False,
+                redirect=False,
+                status=False,
+                backoff_factor=self.retry_backoff_factor,
+            ),
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def request(self, method, url, **kwargs):
+        session = self.get_session(url)
+        connection_pool = session.get_adapter(url).poolmanager.connection_from_url(url)
+        connections_before = connection_pool.num_connections
+
+        response = session.request(method, url, **kwargs)
+
+        self._record_connection_reuse(connection_pool.num_connections == connections_before)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def _record_connection_reuse(self, reused):
+        if self.statsd_client:
+            self.statsd_client.incr('pooled-sessions.connection.{}'.format('reused' if reused else 'new'))
@@ -1,7 +1,6 @@
 from flask import current_app, json
-import requests
 
-from app import current_service
+from app import current_service, pooled_sessions
 
 
 class TemplatePreview:
@@ -13,7 +12,7 @@ class TemplatePreview:
             'values': values,
             'dvla_org_id': current_service['dvla_organisation'],
         }
-        resp = requests.post(
+        resp = pooled_sessions.post(
             '{}/preview.{}{}'.format(
                 current_app.config['TEMPLATE_PREVIEW_API_HOST'],
                 filetype,
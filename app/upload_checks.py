@@ -0,0 +1,126 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+from app.cache import LRUCache, create_shared_cache
+
+
+logger = logging.getLogger(__name__)
+
+CHECKING = 'checking'
+FINISHED = 'finished'
+FAILED = 'failed'
+
+
+class UploadChecks(object):
+    """
+        Checks uploaded files without holding up the worker. The rows of a big file are split between a pool of
+        other processes (see `map`), so checking it uses more than one core, and the worker is free to serve other
+        requests while it waits. Files of `min_size` characters or more take long enough that the page shouldn’t
+        wait either: `start` checks them in the background while the page polls for progress.
+
+        Whether a file is being checked is kept in a cache shared between workers, so any of them can answer the
+        page polling for it. Once the check has finished, `callback` is called with the results in the worker which
+        started it - they need to go somewhere shared too. Nothing is run in the background if
+        `min_size` is 0, which it always is unless the cache is Redis: the page can poll any instance of the app,
+        not just the one checking the file.
+
+        Usage:
+
+            upload_checks = UploadChecks()
+            upload_checks.init_app(application, statsd_client)
+
+            if upload_checks.should_run_in_background(contents):
+                shards = split_into_shards(contents, upload_checks.rows_per_shard)
+                upload_checks.start(upload_id, check_shard, shards, callback=save_results)
+    """
+
+    def __init__(self):
+        self.statsd_client = None
+        self.min_size = 0
+        self.max_workers = 1
+        self.rows_per_shard = 25000
+        self.timeout = 600
+        self.statuses = LRUCache()
+        self._executor = None
+        self._lock = Lock()
+
+    def init_app(self, application, statsd_client=None):
+        self.statsd_client = statsd_client
+        # a filesystem cache is only shared by the workers of one instance, but the page can poll any of them
+        self.min_size = application.config['BACKGROUND_CHECK_MIN_FILE_SIZE'] if (
+            application.config['SHARED_CACHE_BACKEND'] == 'redis'
+        ) else 0
+        self.max_workers = application.config['BACKGROUND_CHECK_MAX_WORKERS']
+        self.rows_per_shard = application.config['BACKGROUND_CHECK_ROWS_PER_SHARD']
+        self.timeout = application.config['BACKGROUND_CHECK_TIMEOUT_SECONDS']
+        self.statuses = create_shared_cache(application, key_prefix='upload-checks/')
+
+    def should_run_in_background(self, contents):
+        return bool(self.min_size) and len(contents) >= self.min_size
+
+    def get_status(self, upload_id):
+        """
+        `CHECKING`, `FINISHED` (the result is wherever `callback` put it), `FAILED`, or None if nothing is known
+        about the file - either it was never checked in the background, or the check was lost and has expired.
+        """
+        return self.statuses.get(upload_id)
+
+    def start(self, upload_id, function, iterable, *, callback):
+        """
+        Calls `function` with each item in `iterable` in other processes, then `callback` with the results in the
+        same order. Nothing in this worker waits for them - `callback` is called from the pool’s own thread.
+        """
+        # only whichever worker adds the status first starts checking the file. If it goes away part way through,
+        # the file is checked again once the status has expired
+        if not self.statuses.add(upload_id, CHECKING, ttl=self.timeout):
+            return
+        self._incr('upload-checks.started')
+        try:
+            futures = [self._get_executor().submit(function, item) for item in iterable]
+        except Exception:
+            self._failed(upload_id)
+            return
+
+        unfinished, lock = set(futures), Lock()
+
+        def finished(future):
+            with lock:
+                unfinished.discard(future)
+                if unfinished:
+                    return
+            self._finish(upload_id, futures, callback)
+
+        for future in futures:
+            future.add_done_callback(finished)
+
+    def map(self, function, iterable):
+        """
+        Calls `function` with each item in `iterable` in other processes, returning the results in the same order.
+        """
+        return list(self._get_executor().map(function, iterable))
+
+    def _finish(self, upload_id, futures, callback):
+        try:
+            callback([future.result() for future in futures])
+        except Exception:
+            self._failed(upload_id)
+        else:
+            self._incr('upload-checks.finished')
+            self.statuses.set(upload_id, FINISHED, ttl=self.timeout)
+
+    def _failed(self, upload_id):
+        logger.exception('Failed to check upload {}'.format(upload_id))
+        self._incr('upload-checks.failed')
+        self.statuses.set(upload_id, FAILED, ttl=self.timeout)
+
+    def _get_executor(self):
+        # started the first time it’s needed, so the processes are forked from the worker rather than the master
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _incr(self, metric):
+        if self.statsd_client:
+            self.statsd_client.incr(metric)
@@ -1,12 +1,16 @@
 import re
 import csv
+import hashlib
+import json
 import pytz
 from io import StringIO
 from os import path
 from functools import wraps
 import unicodedata
+from contextlib import suppress
 from urllib.parse import urlparse
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
 from datetime import datetime, timedelta, timezone
 
 import dateutil
@@ -14,14 +18,21 @@ import ago
 from flask import (
     abort,
     current_app,
+    jsonify,
+    make_response,
     redirect,
     request,
     session,
     url_for
 )
+from flask.globals import _request_ctx_stack
 from flask_login import current_user
+from werkzeug.test import EnvironBuilder
+from notifications_python_client.errors import HTTPError
 import pyexcel
 
+from notifications_utils.columns import Columns
+from notifications_utils.recipients import allowed_to_send_to
 from notifications_utils.template import (
     SMSPreviewTemplate,
     EmailPreviewTemplate,
@@ -92,11 +103,15 @@ def redirect_to_sign_in(f):
 
 
 def get_errors_for_csv(recipients, template_type):
+    """
+    `recipients` is anything with `rows_with_bad_recipients` and `rows_with_missing_data` - normally a
+    `RecipientsSummary`, since asking a `RecipientCSV` for each of those goes through the whole file again.
+    """
 
     errors = []
 
-    if recipients.rows_with_bad_recipients:
-        number_of_bad_recipients = len(list(recipients.rows_with_bad_recipients))
+    number_of_bad_recipients = len(list(recipients.rows_with_bad_recipients))
+    if number_of_bad_recipients:
         if 'sms' == template_type:
             if 1 == number_of_bad_recipients:
                 errors.append("fix 1 phone number")
@@ -113,8 +128,8 @@ def get_errors_for_csv(recipients, template_type):
             else:
                 errors.append("fix {} addresses".format(number_of_bad_recipients))
 
-    if recipients.rows_with_missing_data:
-        number_of_rows_with_missing_data = len(list(recipients.rows_with_missing_data))
+    number_of_rows_with_missing_data = len(list(recipients.rows_with_missing_data))
+    if number_of_rows_with_missing_data:
         if 1 == number_of_rows_with_missing_data:
             errors.append("enter missing data in 1 row")
         else:
@@ -123,6 +138,162 @@ def get_errors_for_csv(recipients, template_type):
     return errors
 
 
+class RecipientsSummary(object):
+    """
+    Everything the check page needs to know about a `RecipientCSV`, worked out in one pass through its rows. Each
+    of the `RecipientCSV` properties this stands in for parses and validates the whole file again.
+
+    It doesn’t keep the `RecipientCSV`, so it can be cached without the file. `remaining_messages` is the only
+    thing which can change afterwards, so set it before asking about `has_errors`.
+    """
+
+    def __init__(self, recipients):
+        self.column_headers = recipients.column_headers
+        self.recipient_column_headers = recipients.recipient_column_headers
+        self.missing_column_headers = recipients.missing_column_headers
+        self.has_recipient_columns = recipients.has_recipient_columns
+        self.allowed_to_send_to = True
+        self.max_rows = recipients.max_rows
+        self.remaining_messages = recipients.remaining_messages
+        self.max_initial_rows_shown = recipients.max_initial_rows_shown
+        self.max_errors_shown = recipients.max_errors_shown
+
+        self.count = 0
+        self.first_row = None
+        self.rows_with_bad_recipients = set()
+        self.rows_with_missing_data = set()
+        self.initial_annotated_rows = []
+        self.initial_annotated_rows_with_errors = []
+
+        with suppress(StopIteration):
+            self.first_row = next(recipients.rows)
+
+        recipient_column_keys = {
+            Columns.make_key(column_header) for column_header in recipients.recipient_column_headers
+        }
+        # as `RecipientCSV.allowed_to_send_to` does: letters can be sent to anyone, anything else only to the
+        # whitelist, if there is one
+        whitelist = recipients.whitelist if recipients.template_type != 'letter' else None
+        if whitelist:
+            recipient_key = Columns.make_key(recipients.recipient_column_headers[0])
+
+        for row in recipients.annotated_rows:
+            self.count += 1
+            if whitelist and self.allowed_to_send_to:
+                self.allowed_to_send_to = allowed_to_send_to(
+                    row['columns'].get(recipient_key, {}).get('data') or '', whitelist
+                )
+            columns_with_errors = {key for key, column in row['columns'].items() if column.get('error')}
+            if columns_with_errors & recipient_column_keys:
+                self.rows_with_bad_recipients.add(row['index'])
+            if columns_with_errors - recipient_column_keys:
+                self.rows_with_missing_data.add(row['index'])
+
+            if len(self.initial_annotated_rows) < recipients.max_initial_rows_shown:
+                self.initial_annotated_rows.append(row)
+            if columns_with_errors and len(self.initial_annotated_rows_with_errors) < recipients.max_errors_shown:
+                self.initial_annotated_rows_with_errors.append(row)
+
+        self.rows_with_errors = self.rows_with_bad_recipients | self.rows_with_missing_data
+
+    @classmethod
+    def from_shards(cls, shards):
+        """
+        Puts together the summaries of the pieces of a file from `split_into_shards`, in order, to get the same
+        summary as for the whole file.
+        """
+        summary = cls.__new__(cls)
+        summary.__dict__.update(shards[0].__dict__)
+        summary.count = 0
+        summary.first_row = None
+        summary.allowed_to_send_to = True
+        summary.rows_with_bad_recipients = set()
+        summary.rows_with_missing_data = set()
+        summary.initial_annotated_rows = []
+        summary.initial_annotated_rows_with_errors = []
+
+        for shard in shards:
+            # rows are numbered from 0 in each shard
+            offset = summary.count
+            summary.count += shard.count
+            if summary.first_row is None:
+                summary.first_row = shard.first_row
+            summary.allowed_to_send_to = summary.allowed_to_send_to and shard.allowed_to_send_to
+            summary.rows_with_bad_recipients |= {index + offset for index in shard.rows_with_bad_recipients}
+            summary.rows_with_missing_data |= {index + offset for index in shard.rows_with_missing_data}
+            summary.initial_annotated_rows += [
+                dict(row, index=row['index'] + offset) for row in shard.initial_annotated_rows
+            ]
+            summary.initial_annotated_rows_with_errors += [
+                dict(row, index=row['index'] + offset) for row in shard.initial_annotated_rows_with_errors
+            ]
+
+        summary.initial_annotated_rows = summary.initial_annotated_rows[:summary.max_initial_rows_shown]
+        summary.initial_annotated_rows_with_errors = (
+            summary.initial_annotated_rows_with_errors[:summary.max_errors_shown]
+        )
+        summary.rows_with_errors = summary.rows_with_bad_recipients | summary.rows_with_missing_data
+        return summary
+
+    @property
+    def too_many_rows(self):
+        return self.count > self.max_rows
+
+    @property
+    def more_rows_than_can_send(self):
+        return self.count > self.remaining_messages
+
+    @property
+    def has_errors(self):
+        # the same checks as `RecipientCSV.has_errors`
+        return bool(
+            self.missing_column_headers or
+            self.more_rows_than_can_send or
+            self.too_many_rows or
+            self.rows_with_errors or
+            not self.allowed_to_send_to
+        )
+
+
+def split_csv_lines(text):
+    """
+    Splits CSV into lines, keeping their line endings - a newline inside quotes doesn’t end a line. Returns the
+    complete lines, and whatever comes after the last of them.
+    """
+    lines, line, quotes = [], '', 0
+    pieces = text.split('\n')
+    for piece in pieces[:-1]:
+        line += piece + '\n'
+        quotes += piece.count('"')
+        if quotes % 2 == 0:
+            lines.append(line)
+            line, quotes = '', 0
+    return lines, line + pieces[-1]
+
+
+def is_blank_csv_line(line):
+    return not any(value.strip() for value in next(csv.reader([line]), []))
+
+
+def split_into_shards(contents, rows_per_shard):
+    """
+    Splits a CSV file into pieces of up to `rows_per_shard` rows, each with the file’s column headers, to be
+    checked separately. Blank lines before the column headers are left out, like `RecipientCSV` does.
+    """
+    lines, unfinished = split_csv_lines(contents)
+    if unfinished:
+        lines.append(unfinished)
+    while lines and is_blank_csv_line(lines[0]):
+        lines.pop(0)
+    if len(lines) <= rows_per_shard + 1:
+        return [contents]
+    header = lines[0]
+    return [
+        header + ''.join(lines[start:start + rows_per_shard])
+        for start in range(1, len(lines), rows_per_shard)
+    ]
+
+
 def generate_notifications_csv(**kwargs):
     from app import notification_api_client
 
@@ -154,6 +325,158 @@ def generate_notifications_csv(**kwargs):
     raise Exception("Should never reach here")
 
 
+def _copy_request_context(request_context, attributes=('service_id', 'service', 'user', 'api_request_memo')):
+    copied_request_context = request_context.copy()
+    # things we attach to the request context in `before_request` (and Flask-Login’s `user`) aren’t copied
+    # by Flask, so bring them along so `current_service` and `current_user` still work in the other thread
+    for attribute in attributes:
+        if hasattr(request_context, attribute):
+            setattr(copied_request_context, attribute, getattr(request_context, attribute))
+    return copied_request_context
+
+
+def with_copy_of_request_context(call):
+    copied_request_context = _copy_request_context(_request_ctx_stack.top)
+
+    def wrapped():
+        with copied_request_context:
+            return call()
+    return wrapped
+
+
+def with_request_context_of_its_own(call):
+    """
+    For something which will be called over and over again, long after the request has finished, on behalf of
+    whoever is listening at the time rather than whoever started it. Each call gets a new request context for the
+    same URL and service, but without the cookies - so nobody is signed in and there’s no session - and with its
+    own memo of API responses.
+    """
+    application = current_app._get_current_object()
+    service_id = getattr(_request_ctx_stack.top, 'service_id', None)
+    environ = dict(
+        path=request.path,
+        base_url=request.url_root,
+        query_string=request.query_string.decode('utf-8'),
+    )
+
+    def wrapped():
+        with application.request_context(EnvironBuilder(**environ).get_environ()) as request_context:
+            request_context.service_id = service_id
+            return call()
+    return wrapped
+
+
+def run_concurrently(*calls, time_budget=None, on_timeout=None):
+    """
+    Make a handful of independent calls (normally to the API) at the same time, rather than one after the other,
+    and return their results in the order the calls were given.
+
+    Raises `concurrent.futures.TimeoutError` if they haven’t all finished within `time_budget` seconds (by default
+    `CONCURRENT_API_CALLS_TIMEOUT_SECONDS`), unless there’s an `on_timeout` - which is called with the position of
+    each call that hasn’t finished, and returns the result to use for it instead (or raises).
+    """
+    if time_budget is None:
+        time_budget = current_app.config['CONCURRENT_API_CALLS_TIMEOUT_SECONDS']
+    executor = ThreadPoolExecutor(
+        max_workers=min(len(calls), current_app.config['CONCURRENT_API_CALLS_MAX_WORKERS'])
+    )
+    try:
+        futures = [executor.submit(with_copy_of_request_context(call)) for call in calls]
+        _, not_done = wait(futures, timeout=time_budget)
+        if not_done and on_timeout is None:
+            raise TimeoutError('{} of {} calls did not finish in time'.format(len(not_done), len(calls)))
+        return [
+            on_timeout(index) if future in not_done else future.result()
+            for index, future in enumerate(futures)
+        ]
+    finally:
+        executor.shutdown(wait=False)
+
+
+TEMPORARILY_UNAVAILABLE = object()
+
+
+def optional(call):
+    """
+    Wrap a call whose result a page can do without, so that if the API is down, or the endpoint’s circuit breaker
+    is open, it returns `TEMPORARILY_UNAVAILABLE` rather than failing the whole page.
+    """
+    @wraps(call)
+    def wrapped(*args, **kwargs):
+        try:
+            return call(*args, **kwargs)
+        except HTTPError as e:
+            if e.status_code < 500:
+                raise
+            current_app.logger.warning('Optional API call failed, showing it as temporarily unavailable')
+            return TEMPORARILY_UNAVAILABLE
+    return wrapped
+
+
+def jsonify_with_etag(*args, **kwargs):
+    """
+    Like `jsonify`, but with a strong ETag, and an empty 304 response if the browser already has the same content.
+
+    The ETag is worked out from what we’ve rendered rather than the data from the API, because partials can
+    change when the data doesn’t (for example ‘1 minute ago’ becoming ‘2 minutes ago’).
+
+    This is for the `.json` endpoints pages poll, some of which are POSTed to, so unlike
+    `Response.make_conditional` it doesn’t only work for GET requests.
+    """
+    response = jsonify(*args, **kwargs)
+    etag = hashlib.sha256(response.get_data()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    response.set_etag(etag)
+    return response
+
+
+STOP_POLLING = 0
+
+
+def jsonify_partials(partials, poll_interval_seconds=None):
+    """
+    Respond to a poll with the partials for a page, leaving out any the browser says (in the `X-Partial-Hashes`
+    header) it already has. The hash of every partial is sent back as `hashes`, for the browser to send next time.
+
+    The `X-Poll-Interval-Seconds` header tells the browser when to poll next - `STOP_POLLING` if nothing on the
+    page can change any more. If the view doesn’t say, it’s `POLL_INTERVAL_SECONDS` if something has changed, and
+    double whatever the browser is polling at now (up to `POLL_INTERVAL_MAX_SECONDS`) if not.
+    """
+    hashes = {
+        key: hashlib.sha1(json.dumps(partial, sort_keys=True).encode('utf-8')).hexdigest()
+        for key, partial in partials.items()
+    }
+    try:
+        hashes_in_browser = json.loads(request.headers.get('X-Partial-Hashes', '{}'))
+    except ValueError:
+        hashes_in_browser = {}
+    if not isinstance(hashes_in_browser, dict):
+        hashes_in_browser = {}
+    changed_partials = {
+        key: partial for key, partial in partials.items()
+        if hashes_in_browser.get(key) != hashes[key]
+    }
+
+    if poll_interval_seconds is None:
+        poll_interval_seconds = get_next_poll_interval(changed=bool(changed_partials))
+
+    response = jsonify_with_etag(hashes=hashes, **changed_partials)
+    response.headers['X-Poll-Interval-Seconds'] = str(poll_interval_seconds)
+    return response
+
+
+def get_next_poll_interval(changed):
+    interval = current_app.config['POLL_INTERVAL_SECONDS']
+    if changed:
+        return interval
+    try:
+        current_interval = float(request.headers.get('X-Poll-Interval-Seconds', interval))
+    except ValueError:
+        current_interval = interval
+    return min(max(current_interval, interval) * 2, current_app.config['POLL_INTERVAL_MAX_SECONDS'])
+
+
 def get_page_from_request():
     if 'page' in request.args:
         try:
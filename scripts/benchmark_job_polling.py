@@ -0,0 +1,80 @@
+"""
+For one poll of a busy job’s page (50 notifications shown, 10,000 in the job), how long the partials take to
+render, and how many bytes the response is when:
+
+- the browser has nothing (the first poll)
+- only the counts and status have changed (the job is still sending)
+- nothing has changed (the browser sent the hashes of everything it has)
+
+    NOTIFY_ENVIRONMENT=test python -m scripts.benchmark_job_polling
+"""
+import json
+import os
+import statistics
+import uuid
+from time import monotonic
+from unittest.mock import patch
+
+os.environ.setdefault('NOTIFY_ENVIRONMENT', 'test')
+
+from app import create_app  # noqa
+from app.main.views.jobs import get_job_partials  # noqa
+from app.notify_client.models import User  # noqa
+from app.utils import jsonify_partials  # noqa
+from tests import job_json, notification_json, service_json, template_json  # noqa
+
+REPEATS = 50
+
+
+def main():
+    application = create_app()
+    user = User({
+        'id': str(uuid.uuid4()),
+        'name': 'Test User',
+        'email_address': 'test@user.gov.uk',
+        'permissions': {},
+        'state': 'active',
+        'platform_admin': False,
+    })
+    service = service_json(str(uuid.uuid4()), users=[user.id])
+    template = template_json(service['id'], str(uuid.uuid4()), type_='sms')
+    job = job_json(
+        service['id'],
+        user,
+        template_id=template['id'],
+        notification_count=10000,
+        notifications_sent=4000,
+        notifications_requested=10000,
+        job_status='in progress',
+    )
+    notifications = notification_json(service['id'], job=job, template=template, rows=50, with_links=True)
+
+    def poll(hashes=None):
+        headers = {'X-Partial-Hashes': json.dumps(hashes)} if hashes else {}
+        with application.test_request_context(headers=headers) as request_context:
+            request_context.service = service
+            request_context.user = user
+            return jsonify_partials(get_job_partials(job, template)).get_data()
+
+    with patch('app.notification_api_client.get_notifications_for_service', return_value=notifications):
+        timings = []
+        for _ in range(REPEATS):
+            start_time = monotonic()
+            first_poll = poll()
+            timings.append(monotonic() - start_time)
+        hashes = json.loads(first_poll.decode('utf-8'))['hashes']
+
+        job['notifications_sent'] += 100
+        still_sending = poll(hashes)
+        hashes = json.loads(still_sending.decode('utf-8'))['hashes']
+        nothing_changed = poll(hashes)
+
+    print('Render time for one poll (median of {}): {:.1f}ms'.format(REPEATS, statistics.median(timings) * 1000))
+    print('Response size:')
+    print('  first poll       {:>8,} bytes'.format(len(first_poll)))
+    print('  still sending    {:>8,} bytes'.format(len(still_sending)))
+    print('  nothing changed  {:>8,} bytes (0 with a matching ETag)'.format(len(nothing_changed)))
+
+
+if __name__ == '__main__':
+    main()
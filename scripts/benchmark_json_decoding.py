@@ -0,0 +1,86 @@
+"""
+Compares how long it takes to decode a page of 5,000 notifications (the page size used for CSV downloads) with
+each JSON backend which is installed, and how many bytes it takes on the wire with and without gzip.
+
+    python -m scripts.benchmark_json_decoding
+"""
+import gzip
+import json
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from importlib import import_module
+
+from app.notify_client.json_decoder import SUPPORTED_BACKENDS
+
+PAGE_SIZE = 5000
+REPEATS = 20
+
+
+def notifications_page(page_size=PAGE_SIZE):
+    service_id, template_id, job_id = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+    created_at = datetime(2017, 10, 1, 12)
+    return {
+        'notifications': [
+            {
+                'id': str(uuid.uuid4()),
+                'row_number': row_number,
+                'to': '07700 900{:03}'.format(row_number % 1000),
+                'recipient': '07700 900{:03}'.format(row_number % 1000),
+                'template': {
+                    'id': template_id,
+                    'name': 'Appointment reminder',
+                    'template_type': 'sms',
+                    'version': 3,
+                },
+                'template_name': 'Appointment reminder',
+                'template_type': 'sms',
+                'template_version': 3,
+                'job': {'id': job_id, 'original_file_name': 'appointments.csv'},
+                'job_name': 'appointments.csv',
+                'job_row_number': row_number,
+                'service': service_id,
+                'status': 'delivered' if row_number % 10 else 'temporary-failure',
+                'created_at': (created_at + timedelta(seconds=row_number)).isoformat(),
+                'updated_at': (created_at + timedelta(seconds=row_number + 5)).isoformat(),
+                'sent_at': (created_at + timedelta(seconds=row_number + 1)).isoformat(),
+                'sent_by': 'mmg',
+                'billable_units': 1,
+                'key_type': 'normal',
+                'notification_type': 'sms',
+                'reference': None,
+                'personalisation': {},
+            }
+            for row_number in range(page_size)
+        ],
+        'page_size': page_size,
+        'total': page_size,
+        'links': {},
+    }
+
+
+def main():
+    content = json.dumps(notifications_page()).encode('utf-8')
+    compressed = gzip.compress(content)
+
+    print('Bytes on the wire for {} notifications:'.format(PAGE_SIZE))
+    print('  uncompressed  {:>10,}'.format(len(content)))
+    print('  gzip          {:>10,} ({:.0%})'.format(len(compressed), len(compressed) / len(content)))
+    print('  gunzip time   {:>10.1f}ms'.format(
+        timeit.timeit(lambda: gzip.decompress(compressed), number=REPEATS) / REPEATS * 1000
+    ))
+
+    print('Decode time (mean of {}):'.format(REPEATS))
+    for backend in SUPPORTED_BACKENDS:
+        try:
+            loads = import_module(backend).loads
+        except ImportError:
+            print('  {:<12}  not installed'.format(backend))
+            continue
+        assert loads(content.decode('utf-8')) == json.loads(content.decode('utf-8'))
+        elapsed_time = timeit.timeit(lambda: loads(content.decode('utf-8')), number=REPEATS) / REPEATS
+        print('  {:<12}  {:>10.1f}ms'.format(backend, elapsed_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+For one poll of the dashboard by a signed in user, how long it takes to open and save the session, and how many
+bytes of `Set-Cookie` header go back to the browser, when the cookie is:
+
+- re-issued (what every page still does, and what polls used to do)
+- left alone (a `session_read_only` view, when the session hasn’t changed and isn’t close to expiring)
+
+    NOTIFY_ENVIRONMENT=test python -m scripts.benchmark_session_cookie
+"""
+import os
+import statistics
+import uuid
+from time import process_time
+
+from flask import Response
+
+os.environ.setdefault('NOTIFY_ENVIRONMENT', 'test')
+
+from app import create_app  # noqa
+
+REPEATS = 2000
+
+
+def main():
+    application = create_app()
+    interface = application.session_interface
+    service_id = str(uuid.uuid4())
+    session_data = {
+        'user_id': str(uuid.uuid4()),
+        'service_id': service_id,
+        'current_session_id': str(uuid.uuid4()),
+        'csrf_token': uuid.uuid4().hex * 2,
+        '_fresh': True,
+        '_id': uuid.uuid4().hex * 4,
+    }
+    with application.test_request_context():
+        cookie = interface.get_serializer(application).dumps(session_data)
+
+    def poll(path):
+        with application.test_request_context(
+            path,
+            headers={'Cookie': '{}={}'.format(application.session_cookie_name, cookie)},
+        ) as request_context:
+            request_context.match_request()
+            response = Response()
+            start_time = process_time()
+            session = interface.open_session(application, request_context.request)
+            interface.save_session(application, session, response)
+            elapsed_time = process_time() - start_time
+            return elapsed_time, sum(len(header) for header in response.headers.getlist('Set-Cookie'))
+
+    for name, path in (
+        ('re-issued', '/services/{}/dashboard'.format(service_id)),
+        ('left alone', '/services/{}/dashboard.json'.format(service_id)),
+    ):
+        results = [poll(path) for _ in range(REPEATS)]
+        print('{:<11} {:>6.1f}µs CPU (median of {}), {:>4} bytes of Set-Cookie'.format(
+            name,
+            statistics.median(elapsed_time for elapsed_time, _ in results) * 1000000,
+            REPEATS,
+            results[0][1],
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compares how long it takes to check uploaded files of 10,000, 100,000 and 1,000,000 rows all in one process with
+splitting them between a pool of processes, one per core, and that both give the same result.
+
+    python -m scripts.benchmark_sharded_checks
+"""
+import os
+from time import perf_counter
+
+from notifications_utils.recipients import RecipientCSV
+
+from app.upload_checks import UploadChecks
+from app.utils import RecipientsSummary, split_into_shards
+
+ROWS = (10000, 100000, 1000000)
+ROWS_PER_SHARD = 25000
+
+
+def recipients_file(rows):
+    # mostly good rows, with a bad phone number and a missing placeholder every so often
+    return 'phone number,name,reference\n' + ''.join(
+        '{},{},{}\n'.format(
+            'not a number' if row % 97 == 0 else '07700 900{:03}'.format(row % 1000),
+            '' if row % 89 == 0 else 'Name {}'.format(row),
+            'REF-{:07}'.format(row),
+        )
+        for row in range(rows)
+    )
+
+
+def summarise(contents):
+    return RecipientsSummary(RecipientCSV(
+        contents,
+        template_type='sms',
+        placeholders=['name', 'reference'],
+        max_initial_rows_shown=50,
+        max_errors_shown=50,
+        remaining_messages=250000,
+        international_sms=False,
+    ))
+
+
+def main():
+    upload_checks = UploadChecks()
+    upload_checks.max_workers = os.cpu_count()
+    # start the processes before timing anything
+    upload_checks.map(len, range(upload_checks.max_workers))
+
+    for rows in ROWS:
+        contents = recipients_file(rows)
+
+        start_time = perf_counter()
+        in_one_process = summarise(contents)
+        one_process_time = perf_counter() - start_time
+
+        start_time = perf_counter()
+        shards = split_into_shards(contents, ROWS_PER_SHARD)
+        sharded = RecipientsSummary.from_shards(upload_checks.map(summarise, shards))
+        sharded_time = perf_counter() - start_time
+
+        print('{:>9,} rows: {:>7.2f}s in one process, {:>7.2f}s in {} shards across {} processes ({})'.format(
+            rows,
+            one_process_time,
+            sharded_time,
+            len(shards),
+            upload_checks.max_workers,
+            'same result' if vars(sharded) == vars(in_one_process) else 'DIFFERENT RESULT',
+        ))
+
+
+if __name__ == '__main__':
+    main()
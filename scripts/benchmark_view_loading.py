@@ -0,0 +1,70 @@
+"""
+Compares how long the API calls behind the service settings, team members and usage pages take when made one
+after another (as they used to be) and all at once with `app.main.views.data_loader.load`, with every call
+taking `--latency` seconds.
+
+    python -m scripts.benchmark_view_loading --latency 0.05
+"""
+import argparse
+import statistics
+from time import monotonic, sleep
+
+from flask import Flask
+
+from app.main.views.data_loader import load
+
+VIEWS = {
+    'service_settings': [
+        'letter_branding_organisations',
+        'organisation',
+        'inbound_api',
+        'inbound_number',
+        'reply_to_email_addresses',
+        'letter_contact_details',
+    ],
+    'manage_users': [
+        'users',
+        'invites',
+    ],
+    'usage': [
+        'billable_units',
+        'service_usage',
+    ],
+}
+
+
+def time_it(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start_time = monotonic()
+        function()
+        timings.append(monotonic() - start_time)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds each API call takes')
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--max-workers', type=int, default=5, help='CONCURRENT_API_CALLS_MAX_WORKERS')
+    args = parser.parse_args()
+
+    application = Flask('benchmark')
+    application.config.update(
+        CONCURRENT_API_CALLS_MAX_WORKERS=args.max_workers,
+        CONCURRENT_API_CALLS_TIMEOUT_SECONDS=10,
+    )
+
+    def api_call():
+        sleep(args.latency)
+
+    print('{:<20} {:>6} {:>12} {:>12}'.format('view', 'calls', 'before (ms)', 'after (ms)'))
+    with application.test_request_context():
+        for view, fetches in VIEWS.items():
+            before = time_it(lambda: [api_call() for _ in fetches], args.repeats)
+            after = time_it(lambda: load(**{name: api_call for name in fetches}), args.repeats)
+            print('{:<20} {:>6} {:>12.0f} {:>12.0f}'.format(view, len(fetches), before * 1000, after * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,7 @@ from app.main.s3_client import (
     delete_temp_file,
     delete_temp_files_created_by,
     get_temp_truncated_filename,
+    s3download_lines,
     LOGO_LOCATION_STRUCTURE,
     TEMP_TAG
 )
@@ -93,3 +94,33 @@ def test_does_not_delete_non_temp_file(client, mocker, fake_uuid):
 
     assert mocked_delete_s3_object.called_with_args(filename)
     assert str(error.value) == 'Not a temp file: {}'.format(filename)
+
+
+def test_s3download_lines_only_reads_as_much_of_the_file_as_it_needs(client, mocker):
+    body = mocker.Mock()
+    body.read.side_effect = [
+        'phone number,name\r\n07700 900'.encode('utf-8'),
+        '001,"Firstname\nLastname"\r\n07700 900002,'.encode('utf-8'),
+        'Pete\r\n'.encode('utf-8'),
+        b'',
+    ]
+    mocker.patch('app.main.s3_client.get_s3_object').return_value.get.return_value = {'Body': body}
+
+    lines = s3download_lines('service-id', 'upload-id', chunk_size=32)
+
+    assert next(lines) == 'phone number,name\r\n'
+    assert next(lines) == '07700 900001,"Firstname\nLastname"\r\n'
+    assert body.read.call_count == 2
+
+    lines.close()
+
+    body.close.assert_called_once_with()
+
+
+def test_s3download_lines_doesnt_split_characters_across_chunks(client, mocker):
+    contents = 'name\nZoë\n'.encode('utf-8')
+    body = mocker.Mock()
+    body.read.side_effect = [contents[:8], contents[8:], b'']
+    mocker.patch('app.main.s3_client.get_s3_object').return_value.get.return_value = {'Body': body}
+
+    assert list(s3download_lines('service-id', 'upload-id')) == ['name\n', 'Zoë\n']
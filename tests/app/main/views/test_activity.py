@@ -132,7 +132,8 @@ def test_can_show_notifications(
         status=status_argument
     ))
     json_content = json.loads(json_response.get_data(as_text=True))
-    assert json_content.keys() == {'counts', 'notifications'}
+    assert json_content.keys() == {'counts', 'notifications', 'hashes'}
+    assert json_content['hashes'].keys() == {'counts', 'notifications'}
 
 
 def test_shows_message_when_no_notifications(
@@ -1,14 +1,17 @@
+from concurrent.futures import TimeoutError
 import json
 from functools import partial
 import copy
-from unittest.mock import call, ANY
+from unittest.mock import call, ANY, Mock
 
 from flask import url_for
+from notifications_python_client.errors import HTTPError
 import pytest
 from bs4 import BeautifulSoup
 from freezegun import freeze_time
 from datetime import datetime
 
+from app import partials_data_cache
 from app.main.views.dashboard import (
     get_dashboard_totals,
     format_monthly_stats_to_list,
@@ -17,6 +20,7 @@ from app.main.views.dashboard import (
     format_template_stats_to_list,
     get_tuples_of_financial_years
 )
+from app.notify_client.circuit_breaker import CircuitOpenError
 
 from tests import validate_route_permission, validate_route_permission_with_client
 from tests.conftest import (
@@ -134,6 +138,53 @@ def test_inbound_messages_shows_count_of_messages(
     )
 
 
+@pytest.mark.parametrize('error', [
+    CircuitOpenError('GET /service/<id>/inbound-sms/summary'),
+    HTTPError(response=Mock(status_code=500)),
+])
+def test_inbound_messages_shown_as_unavailable_if_api_is_failing(
+    logged_in_client,
+    mocker,
+    service_one,
+    mock_get_service_templates_when_no_templates_exist,
+    mock_get_jobs,
+    mock_get_detailed_service,
+    mock_get_template_statistics,
+    mock_get_usage,
+    error,
+):
+    service_one['permissions'] = ['inbound_sms']
+    mocker.patch('app.service_api_client.get_inbound_sms_summary', side_effect=error)
+
+    response = logged_in_client.get(url_for('main.service_dashboard', service_id=SERVICE_ONE_ID))
+    page = BeautifulSoup(response.data.decode('utf-8'), 'html.parser')
+
+    assert response.status_code == 200
+    assert not page.select('.big-number-meta-wrapper')
+    assert 'Received text messages are temporarily unavailable' in normalize_spaces(page.text)
+
+
+def test_inbound_messages_still_error_if_api_is_working(
+    logged_in_client,
+    mocker,
+    service_one,
+    mock_get_service_templates_when_no_templates_exist,
+    mock_get_jobs,
+    mock_get_detailed_service,
+    mock_get_template_statistics,
+    mock_get_usage,
+):
+    service_one['permissions'] = ['inbound_sms']
+    mocker.patch(
+        'app.service_api_client.get_inbound_sms_summary',
+        side_effect=HTTPError(response=Mock(status_code=404, json=Mock(return_value={}))),
+    )
+
+    response = logged_in_client.get(url_for('main.service_dashboard', service_id=SERVICE_ONE_ID))
+
+    assert response.status_code == 404
+
+
 @pytest.mark.parametrize('index, expected_row', enumerate([
     '07900 900000 message-1 1 hour ago',
     '07900 900002 message-4 3 hours ago',
@@ -415,9 +466,8 @@ def test_should_show_upcoming_jobs_on_dashboard(
 ):
     response = logged_in_client.get(url_for('main.service_dashboard', service_id=SERVICE_ONE_ID))
 
-    first_call = mock_get_jobs.call_args_list[0]
-    assert first_call[0] == (SERVICE_ONE_ID,)
-    assert first_call[1]['statuses'] == ['scheduled']
+    # the calls are made concurrently, so could be in either order
+    assert call(SERVICE_ONE_ID, statuses=['scheduled']) in mock_get_jobs.call_args_list
 
     assert response.status_code == 200
 
@@ -473,7 +523,10 @@ def test_should_show_recent_jobs_on_dashboard(
 ):
     response = logged_in_client.get(url_for('main.service_dashboard', service_id=SERVICE_ONE_ID))
 
-    second_call = mock_get_jobs.call_args_list[1]
+    second_call, = [
+        call_args for call_args in mock_get_jobs.call_args_list
+        if call_args[1]['statuses'] != ['scheduled']
+    ]
     assert second_call[0] == (SERVICE_ONE_ID,)
     assert second_call[1]['limit_days'] == 7
     assert 'scheduled' not in second_call[1]['statuses']
@@ -537,6 +590,19 @@ def test_usage_page(
     assert '1,230 text messages at 1.65p' in table
 
 
+def test_usage_page_waits_as_long_as_the_billing_endpoints_are_given(
+    logged_in_client,
+    mocker,
+):
+    mock_load = mocker.patch('app.main.views.dashboard.load', side_effect=TimeoutError)
+
+    response = logged_in_client.get(url_for('main.usage', service_id=SERVICE_ONE_ID))
+
+    assert response.status_code == 503
+    assert 'Sorry, this page is temporarily unavailable' in response.get_data(as_text=True)
+    assert mock_load.call_args[1]['time_budget'] == pytest.approx(3.05 + 20)
+
+
 def test_usage_page_with_year_argument(
     logged_in_client,
     mock_get_usage,
@@ -763,6 +829,84 @@ def test_service_dashboard_updates_gets_dashboard_totals(
     assert '456' in numbers
 
 
+def test_service_dashboard_updates_returns_304_if_nothing_has_changed(
+    logged_in_client,
+    mock_get_service_templates,
+    mock_get_template_statistics,
+    mock_get_detailed_service,
+    mock_get_jobs,
+    mock_get_usage,
+    mock_get_inbound_sms_summary
+):
+    url = url_for('main.service_dashboard_updates', service_id=SERVICE_ONE_ID)
+    first_response = logged_in_client.get(url)
+    etag = first_response.headers['ETag']
+
+    second_response = logged_in_client.get(url, headers={'If-None-Match': etag})
+
+    assert first_response.status_code == 200
+    assert second_response.status_code == 304
+    assert second_response.get_data() == b''
+    assert second_response.headers['ETag'] == etag
+
+
+@pytest.fixture
+def micro_cache(mocker):
+    mocker.patch.object(partials_data_cache, 'ttl', 2)
+    yield partials_data_cache
+    partials_data_cache.cache.clear()
+
+
+def test_service_dashboard_updates_share_data_for_a_couple_of_seconds(
+    logged_in_client,
+    micro_cache,
+    mock_get_service_templates,
+    mock_get_template_statistics,
+    mock_get_detailed_service,
+    mock_get_jobs,
+    mock_get_usage,
+    mock_get_inbound_sms_summary
+):
+    url = url_for('main.service_dashboard_updates', service_id=SERVICE_ONE_ID)
+
+    with freeze_time('2017-01-01 12:00:00'):
+        first_response = logged_in_client.get(url)
+    with freeze_time('2017-01-01 12:00:01'):
+        second_response = logged_in_client.get(url)
+    with freeze_time('2017-01-01 12:00:03'):
+        logged_in_client.get(url)
+
+    assert first_response.get_data() == second_response.get_data()
+    assert mock_get_template_statistics.call_count == 2
+    assert mock_get_detailed_service.call_count == 2
+    assert mock_get_jobs.call_count == 4
+
+
+def test_service_dashboard_updates_do_not_share_unavailable_data(
+    logged_in_client,
+    service_one,
+    micro_cache,
+    mocker,
+    mock_get_service_templates,
+    mock_get_template_statistics,
+    mock_get_detailed_service,
+    mock_get_jobs,
+    mock_get_usage,
+):
+    service_one['permissions'] = ['inbound_sms']
+    inbound_sms_summary = mocker.patch(
+        'app.service_api_client.get_inbound_sms_summary',
+        side_effect=HTTPError(response=Mock(status_code=500)),
+    )
+    url = url_for('main.service_dashboard_updates', service_id=SERVICE_ONE_ID)
+
+    logged_in_client.get(url)
+    logged_in_client.get(url)
+
+    assert inbound_sms_summary.call_count == 2
+    assert mock_get_detailed_service.call_count == 2
+
+
 def test_get_dashboard_totals_adds_percentages():
     stats = {
         'sms': {
@@ -975,16 +1119,16 @@ def test_should_show_all_jobs_with_valid_statuses(
 ):
     logged_in_client.get(url_for('main.service_dashboard', service_id=SERVICE_ONE_ID))
 
-    first_call = mock_get_jobs.call_args_list[0]
-    # first call - scheduled jobs only
-    assert first_call == call(ANY, statuses=['scheduled'])
-    # second call - everything but scheduled and cancelled
-    second_call = mock_get_jobs.call_args_list[1]
-    assert second_call == call(ANY, limit_days=ANY, statuses={
+    # the calls are made concurrently, so could be in either order
+    assert len(mock_get_jobs.call_args_list) == 2
+    # one call - scheduled jobs only
+    assert call(ANY, statuses=['scheduled']) in mock_get_jobs.call_args_list
+    # other call - everything but scheduled and cancelled
+    assert call(ANY, limit_days=ANY, statuses={
         'pending',
         'in progress',
         'finished',
         'sending limits exceeded',
         'ready to send',
         'sent to dvla'
-    })
+    }) in mock_get_jobs.call_args_list
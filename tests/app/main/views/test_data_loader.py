@@ -0,0 +1,107 @@
+from concurrent.futures import TimeoutError
+from time import sleep
+from unittest.mock import Mock
+
+import pytest
+from notifications_python_client.errors import HTTPError
+
+from app.main.views.data_loader import Fetch, USE_DEFAULT, load
+
+
+def _raise(error):
+    def call():
+        raise error
+    return call
+
+
+def test_load_returns_results_by_name(app_):
+    with app_.test_request_context():
+        assert load(
+            slow=lambda: sleep(0.02) or 'slow',
+            fast=lambda: 'fast',
+            not_needed=None,
+        ) == {
+            'slow': 'slow',
+            'fast': 'fast',
+            'not_needed': None,
+        }
+
+
+def test_load_with_nothing_to_fetch(app_):
+    with app_.test_request_context():
+        assert load(not_needed=None) == {'not_needed': None}
+
+
+def test_load_runs_fetches_at_the_same_time(app_):
+    with app_.test_request_context():
+        results = load(**{
+            str(index): (lambda: sleep(0.1) or 'done')
+            for index in range(3)
+        }, time_budget=0.25)
+
+    assert set(results.values()) == {'done'}
+
+
+def test_load_raises_errors_by_default(app_):
+    with app_.test_request_context(), pytest.raises(HTTPError):
+        load(
+            ok=lambda: 1,
+            broken=_raise(HTTPError(response=Mock(status_code=500))),
+        )
+
+
+def test_load_raises_other_errors_even_if_fetch_has_a_default(app_):
+    with app_.test_request_context(), pytest.raises(ValueError):
+        load(broken=Fetch(_raise(ValueError('bug')), on_error=USE_DEFAULT))
+
+
+@pytest.mark.parametrize('error', [
+    HTTPError(response=Mock(status_code=500)),
+    HTTPError(response=Mock(status_code=404)),
+])
+def test_load_uses_default_for_failed_fetch_if_asked_to(app_, error):
+    with app_.test_request_context():
+        assert load(
+            ok=lambda: 1,
+            broken=Fetch(_raise(error), on_error=USE_DEFAULT, default=[]),
+        ) == {
+            'ok': 1,
+            'broken': [],
+        }
+
+
+def test_load_has_a_time_budget(app_):
+    with app_.test_request_context(), pytest.raises(TimeoutError):
+        load(slow=lambda: sleep(0.1), time_budget=0.01)
+
+
+def test_load_uses_default_for_slow_fetch_if_asked_to(app_):
+    with app_.test_request_context():
+        assert load(
+            fast=lambda: 'fast',
+            slow=Fetch(lambda: sleep(0.1) or 'slow', on_error=USE_DEFAULT, default='default'),
+            time_budget=0.05,
+        ) == {
+            'fast': 'fast',
+            'slow': 'default',
+        }
+
+
+def test_load_time_budget_defaults_to_config(app_, mocker):
+    mocker.patch.dict(app_.config, values={'CONCURRENT_API_CALLS_TIMEOUT_SECONDS': 0.01})
+
+    with app_.test_request_context(), pytest.raises(TimeoutError):
+        load(slow=lambda: sleep(0.1))
+
+
+def test_load_can_see_the_current_service(app_):
+    from app import current_service
+
+    with app_.test_request_context() as request_context:
+        request_context.service = {'id': '1234'}
+        assert load(service_id=lambda: current_service['id']) == {'service_id': '1234'}
+
+
+def test_fetch_rejects_unknown_error_policy():
+    with pytest.raises(ValueError):
+        Fetch(lambda: 1, on_error='ignore')
@@ -81,7 +81,7 @@ def test_get_feedback_page(client, ticket_type, expected_status_code):
 @pytest.mark.parametrize('ticket_type', ['problem', 'question'])
 def test_passed_non_logged_in_user_details_through_flow(client, mocker, ticket_type):
     mock_post = mocker.patch(
-        'app.main.views.feedback.requests.post',
+        'app.main.views.feedback.pooled_sessions.post',
         return_value=Mock(status_code=201)
     )
 
@@ -123,7 +123,7 @@ def test_passes_user_details_through_flow(
     data
 ):
     mock_post = mocker.patch(
-        'app.main.views.feedback.requests.post',
+        'app.main.views.feedback.pooled_sessions.post',
         return_value=Mock(status_code=201)
     )
 
@@ -179,7 +179,7 @@ def test_email_address_required_for_problems(
     expected_error
 ):
     mocker.patch(
-        'app.main.views.feedback.requests.post',
+        'app.main.views.feedback.pooled_sessions.post',
         return_value=Mock(status_code=201)
     )
     response = client.post(
@@ -221,7 +221,7 @@ def test_urgency(
     is_urgent,
 ):
     mocker.patch('app.main.views.feedback.in_business_hours', return_value=is_in_business_hours)
-    mock_post = mocker.patch('app.main.views.feedback.requests.post', return_value=Mock(status_code=201))
+    mock_post = mocker.patch('app.main.views.feedback.pooled_sessions.post', return_value=Mock(status_code=201))
     response = logged_in_client.post(
         url_for('main.feedback', ticket_type=ticket_type, severe=severe),
         data={'feedback': 'blah', 'email_address': 'test@example.com'},
@@ -466,7 +466,7 @@ def test_bat_email_page(
 @pytest.mark.parametrize('ticket_type', ['problem', 'question'])
 def test_log_error_on_post(app_, mocker, ticket_type):
     mock_post = mocker.patch(
-        'app.main.views.feedback.requests.post',
+        'app.main.views.feedback.pooled_sessions.post',
         return_value=Mock(
             status_code=401,
             json=lambda: {
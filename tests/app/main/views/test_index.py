@@ -28,6 +28,56 @@ def test_static_pages(
     assert response.status_code == 200
 
 
+@pytest.mark.parametrize('view', [
+    'trial_mode', 'delivery_and_failure',
+])
+def test_service_is_not_fetched_for_pages_which_do_not_use_it(
+    logged_in_client,
+    mocker,
+    view,
+):
+    mock_get_service = mocker.patch('app.service_api_client.get_service')
+
+    response = logged_in_client.get(url_for('main.{}'.format(view)))
+
+    assert response.status_code == 301
+    assert mock_get_service.called is False
+
+
+@pytest.mark.parametrize('view', [
+    'pricing', 'support', 'features', 'sign_in',
+])
+def test_service_is_not_fetched_just_for_the_layout_of_pages_which_arent_for_it(
+    logged_in_client,
+    mocker,
+    view,
+):
+    mock_get_service = mocker.patch('app.service_api_client.get_service')
+
+    response = logged_in_client.get(url_for('main.{}'.format(view)))
+
+    assert response.status_code in {200, 302}
+    assert mock_get_service.called is False
+
+
+def test_layout_fetches_service_for_pages_which_are_for_it(
+    app_,
+    mocker,
+    service_one,
+):
+    from app import current_service_for_page
+    mock_get_service = mocker.patch('app.service_api_client.get_service', return_value={'data': service_one})
+
+    with app_.test_request_context('/pricing') as request_context:
+        request_context.service_id = service_one['id']
+        assert not current_service_for_page
+    with app_.test_request_context('/services/{}/dashboard'.format(service_one['id'])) as request_context:
+        request_context.service_id = service_one['id']
+        assert current_service_for_page['id'] == service_one['id']
+
+    mock_get_service.assert_called_once_with(service_one['id'])
+
+
 @pytest.mark.parametrize('view, expected_anchor', [
     ('delivery_and_failure', 'messagedeliveryandfailure'),
     ('trial_mode', 'trial-mode'),
@@ -5,6 +5,7 @@ from flask import url_for
 from bs4 import BeautifulSoup
 
 from app.main.views.jobs import get_time_left
+from tests import job_json
 from tests.conftest import SERVICE_ONE_ID, normalize_spaces, mock_get_notifications
 from freezegun import freeze_time
 
@@ -97,6 +98,12 @@ def test_should_show_page_for_one_job(
         job_id=fake_uuid,
         status=status_argument,
     )
+    assert page.find('div', {'data-key': 'notifications'})['data-events-url'] == url_for(
+        'main.view_job_events',
+        service_id=service_one['id'],
+        job_id=fake_uuid,
+        status=status_argument,
+    )
     csv_link = page.find('a', {'download': 'download'})
     assert csv_link['href'] == url_for(
         'main.view_job_csv',
@@ -319,6 +326,94 @@ def test_should_show_updates_for_one_job_as_json(
     assert 'Sent by Test User on 1 January at midnight' in content['status']
 
 
+@freeze_time("2016-01-01 00:00:00.000001")
+def test_should_only_send_partials_for_one_job_which_have_changed(
+    logged_in_client,
+    service_one,
+    active_user_with_permissions,
+    mock_get_notifications,
+    mock_get_service_template,
+    mock_get_job,
+    mocker,
+    fake_uuid,
+):
+    url = url_for('main.view_job_updates', service_id=service_one['id'], job_id=fake_uuid)
+    hashes = json.loads(logged_in_client.get(url).get_data(as_text=True))['hashes']
+
+    unchanged = json.loads(logged_in_client.get(url, headers={
+        'X-Partial-Hashes': json.dumps(hashes),
+    }).get_data(as_text=True))
+    counts_changed = json.loads(logged_in_client.get(url, headers={
+        'X-Partial-Hashes': json.dumps(dict(hashes, counts='out-of-date')),
+    }).get_data(as_text=True))
+
+    assert hashes.keys() == {'counts', 'notifications', 'status'}
+    assert unchanged == {'hashes': hashes}
+    assert counts_changed.keys() == {'counts', 'hashes'}
+
+
+@pytest.mark.parametrize('job_status, notifications_delivered, expected_interval', [
+    ('in progress', 0, '2'),
+    # every notification has been sent, so it backs off until they’ve all been delivered
+    ('finished', 0, '4'),
+    ('finished', 1, '0'),
+])
+@freeze_time("2016-01-01 00:00:00.000001")
+def test_should_tell_browser_how_often_to_poll_for_one_job(
+    logged_in_client,
+    service_one,
+    active_user_with_permissions,
+    mock_get_notifications,
+    mock_get_service_template,
+    mock_get_job,
+    fake_uuid,
+    job_status,
+    notifications_delivered,
+    expected_interval,
+):
+    mock_get_job.side_effect = lambda service_id, job_id: {'data': dict(
+        job_json(service_id, active_user_with_permissions, job_id=job_id, job_status=job_status),
+        notifications_delivered=notifications_delivered,
+    )}
+    url = url_for('main.view_job_updates', service_id=service_one['id'], job_id=fake_uuid)
+    hashes = json.loads(logged_in_client.get(url).get_data(as_text=True))['hashes']
+
+    response = logged_in_client.get(url, headers={'X-Partial-Hashes': json.dumps(hashes)})
+
+    assert response.headers['X-Poll-Interval-Seconds'] == expected_interval
+
+
+@freeze_time("2016-01-01 00:00:00.000001")
+def test_should_stream_updates_for_one_job_until_it_has_finished(
+    logged_in_client,
+    service_one,
+    active_user_with_permissions,
+    mock_get_notifications,
+    mock_get_service_template,
+    mock_get_job,
+    fake_uuid,
+):
+    mock_get_job.side_effect = lambda service_id, job_id: {'data': dict(
+        job_json(service_id, active_user_with_permissions, job_id=job_id),
+        notifications_delivered=1,
+    )}
+
+    response = logged_in_client.get(url_for(
+        'main.view_job_events',
+        service_id=service_one['id'],
+        job_id=fake_uuid,
+    ))
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    retry, data, finished, _ = response.get_data(as_text=True).split('\n\n')
+    assert retry == 'retry: 2000'
+    assert json.loads(data[len('data: '):]).keys() == {'counts', 'notifications', 'status'}
+    assert 'Delivered' in json.loads(data[len('data: '):])['notifications']
+    assert finished == 'event: finished\ndata: {}'
+    mock_get_job.assert_called_once_with(service_one['id'], fake_uuid)
+
+
 @pytest.mark.parametrize(
     "job_created_at, expected_message", [
         ("2016-01-10 11:09:00.000000+00:00", "Data available for 7 days"),
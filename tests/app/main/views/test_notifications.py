@@ -87,6 +87,35 @@ def test_notification_status_page_respects_redaction(
     )
 
 
+@pytest.mark.parametrize('notification_status, expected_interval', [
+    ('created', None),
+    ('sending', None),
+    ('delivered', '0'),
+    ('temporary-failure', '0'),
+])
+def test_notification_updates_stop_polling_once_notification_has_finished(
+    logged_in_client,
+    mocker,
+    service_one,
+    fake_uuid,
+    notification_status,
+    expected_interval,
+):
+    mock_get_notification(mocker, fake_uuid, notification_status=notification_status)
+
+    response = logged_in_client.get(url_for(
+        'main.view_notification_updates',
+        service_id=service_one['id'],
+        notification_id=fake_uuid,
+    ))
+
+    assert response.status_code == 200
+    if expected_interval:
+        assert response.headers['X-Poll-Interval-Seconds'] == expected_interval
+    else:
+        assert response.headers['X-Poll-Interval-Seconds'] != '0'
+
+
 @freeze_time("2012-01-01 01:01")
 def test_notification_page_doesnt_link_to_template_in_tour(
     client_request,
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import json
 import uuid
 from io import BytesIO
 from os import path
@@ -13,6 +14,8 @@ from notifications_python_client.errors import HTTPError
 from notifications_utils.template import LetterPreviewTemplate, LetterImageTemplate
 from notifications_utils.recipients import RecipientCSV
 
+from app import parsed_upload_cache, upload_checks
+from app.upload_checks import CHECKING, FAILED, FINISHED
 from tests import validate_route_permission, validate_route_permission_with_client
 from tests.conftest import (
     fake_uuid,
@@ -1271,6 +1274,41 @@ def test_can_start_letters_job(
     assert 'just_sent=yes' in response.location
 
 
+def test_preview_letter_message_skips_blank_lines_before_the_column_headers(
+    logged_in_platform_admin_client,
+    mock_get_service_letter_template,
+    service_one,
+    fake_uuid,
+    mocker,
+):
+    service_one['permissions'] = ['letter']
+    mocker.patch('app.service_api_client.get_service', return_value={"data": service_one})
+    mocker.patch('app.main.views.send.get_page_count_for_letter', return_value=1)
+    mocker.patch('app.main.views.send.s3download_lines', return_value=(line for line in [
+        '\n',
+        ',\n',
+        'address line 1, postcode\n',
+        '123 street, abc123\n',
+    ]))
+    mocked_preview = mocker.patch(
+        'app.main.views.send.TemplatePreview.from_utils_template',
+        return_value='foo'
+    )
+
+    with logged_in_platform_admin_client.session_transaction() as session:
+        session['upload_data'] = {'original_file_name': 'example.csv', 'template_id': fake_uuid}
+    response = logged_in_platform_admin_client.get(url_for(
+        'main.check_messages_preview',
+        service_id=service_one['id'],
+        template_type='letter',
+        upload_id=fake_uuid,
+        filetype='png',
+    ))
+
+    assert response.status_code == 200
+    assert mocked_preview.call_args[0][0].values['addressline1'] == '123 street'
+
+
 @pytest.mark.parametrize('filetype', ['pdf', 'png'])
 def test_should_show_preview_letter_message(
     filetype,
@@ -1278,6 +1316,7 @@ def test_should_show_preview_letter_message(
     mock_get_service_letter_template,
     mock_get_users_by_service,
     mock_get_detailed_service_for_today,
+    mock_s3_download,
     service_one,
     fake_uuid,
     mocker,
@@ -1286,13 +1325,13 @@ def test_should_show_preview_letter_message(
     mocker.patch('app.service_api_client.get_service', return_value={"data": service_one})
     mocker.patch('app.main.views.send.get_page_count_for_letter', return_value=1)
 
-    mocker.patch(
-        'app.main.views.send.s3download',
-        return_value='\n'.join(
-            ['address line 1, postcode'] +
-            ['123 street, abc123']
-        )
-    )
+    # a generator, like `s3download_lines`, so it can be closed before the end of the file
+    mocker.patch('app.main.views.send.s3download_lines', return_value=(line for line in [
+        'address line 1, postcode\n',
+        ',\n',
+        '123 street, abc123\n',
+        '456 street, def456\n',
+    ]))
     mocked_preview = mocker.patch(
         'app.main.views.send.TemplatePreview.from_utils_template',
         return_value='foo'
@@ -1324,6 +1363,232 @@ def test_should_show_preview_letter_message(
     assert mocked_preview.call_args[0][0].id == template_id
     assert type(mocked_preview.call_args[0][0]) == LetterPreviewTemplate
     assert mocked_preview.call_args[0][1] == filetype
+    assert mocked_preview.call_args[0][0].values['addressline1'] == '123 street'
+    assert not mock_get_users_by_service.called
+    assert not mock_get_detailed_service_for_today.called
+    assert not mock_s3_download.called
+
+
+def test_looking_at_the_check_page_again_doesnt_check_the_file_again(
+    logged_in_client,
+    mock_get_service_letter_template,
+    mock_get_users_by_service,
+    mock_get_detailed_service_for_today,
+    service_one,
+    fake_uuid,
+    mocker,
+):
+    service_one['permissions'] = ['letter']
+    mocker.patch('app.service_api_client.get_service', return_value={"data": service_one})
+    mocker.patch('app.main.views.send.get_page_count_for_letter', return_value=1)
+    mocker.patch.object(parsed_upload_cache, 'ttl', 60)
+    mock_s3_download = mocker.patch(
+        'app.main.views.send.s3download',
+        return_value='\n'.join(
+            ['address line 1, postcode'] +
+            ['123 street, abc123']
+        )
+    )
+    with logged_in_client.session_transaction() as session:
+        session['upload_data'] = {
+            'upload_id': fake_uuid,
+            'original_file_name': 'example.csv',
+            'template_id': fake_uuid,
+        }
+    for _ in range(2):
+        response = logged_in_client.get(url_for(
+            'main.check_messages', service_id=service_one['id'], template_type='letter', upload_id=fake_uuid
+        ))
+        assert response.status_code == 200
+        assert '123 street' in response.get_data(as_text=True)
+
+    assert mock_s3_download.call_count == 1
+
+    parsed_upload_cache.delete_prefix(fake_uuid)
+
+
+def test_check_messages_checks_big_files_in_the_background(
+    logged_in_client,
+    service_one,
+    mock_get_service_template,
+    mock_get_users_by_service,
+    mock_get_detailed_service_for_today,
+    fake_uuid,
+    mocker,
+):
+    mocker.patch.object(parsed_upload_cache, 'ttl', 60)
+    mocker.patch.object(upload_checks, 'min_size', 10)
+    mock_start = mocker.patch.object(upload_checks, 'start')
+    mock_set = mocker.patch.object(parsed_upload_cache, 'set')
+    mocker.patch('app.main.views.send.s3download', return_value='phone number\n07700900001\n')
+
+    with logged_in_client.session_transaction() as session:
+        session['upload_data'] = {'template_id': fake_uuid, 'original_file_name': 'big.csv'}
+    response = logged_in_client.get(url_for(
+        'main.check_messages', service_id=service_one['id'], template_type='sms', upload_id=fake_uuid
+    ))
+
+    assert response.status_code == 200
+    page = BeautifulSoup(response.data.decode('utf-8'), 'html.parser')
+    assert page.h1.text.strip() == 'Checking big.csv'
+    assert page.select_one('[data-module=update-content]')['data-resource'] == url_for(
+        'main.check_messages_progress', service_id=service_one['id'], template_type='sms', upload_id=fake_uuid
+    )
+    upload_id, check_shard, shards = mock_start.call_args[0]
+    assert upload_id == fake_uuid
+    assert shards == ['phone number\n07700900001\n']
+
+    mock_start.call_args[1]['callback']([check_shard(shard) for shard in shards])
+    cache_key, recipients_summary = mock_set.call_args[0]
+    assert cache_key.startswith(fake_uuid + '/')
+    assert recipients_summary.count == 1
+
+
+@pytest.mark.parametrize('status', [FINISHED, FAILED])
+def test_check_messages_checks_file_itself_if_the_background_check_has_nothing_to_show(
+    logged_in_client,
+    service_one,
+    mock_get_service_template,
+    mock_get_users_by_service,
+    mock_get_detailed_service_for_today,
+    fake_uuid,
+    mocker,
+    status,
+):
+    mocker.patch.object(parsed_upload_cache, 'ttl', 60)
+    mocker.patch.object(upload_checks, 'min_size', 10)
+    mocker.patch.object(upload_checks, 'get_status', return_value=status)
+    mock_start = mocker.patch.object(upload_checks, 'start')
+    mocker.patch('app.main.views.send.s3download', return_value='phone number\n07700900001\n')
+
+    with logged_in_client.session_transaction() as session:
+        session['upload_data'] = {'template_id': fake_uuid, 'original_file_name': 'big.csv'}
+    response = logged_in_client.get(url_for(
+        'main.check_messages', service_id=service_one['id'], template_type='sms', upload_id=fake_uuid
+    ))
+
+    assert response.status_code == 200
+    assert not mock_start.called
+    with logged_in_client.session_transaction() as session:
+        assert session['upload_data']['notification_count'] == 1
+
+    parsed_upload_cache.delete_prefix(fake_uuid)
+
+
+@pytest.mark.parametrize('max_workers, expected_shards', [
+    (1, None),
+    (2, 3),
+])
+def test_check_messages_splits_files_between_processes(
+    logged_in_client,
+    service_one,
+    mock_get_service_template,
+    mock_get_users_by_service,
+    mock_get_detailed_service_for_today,
+    fake_uuid,
+    mocker,
+    max_workers,
+    expected_shards,
+):
+    mocker.patch.object(upload_checks, 'max_workers', max_workers)
+    mocker.patch.object(upload_checks, 'rows_per_shard', 1)
+    mock_map = mocker.patch.object(upload_checks, 'map', side_effect=lambda function, shards: [
+        function(shard) for shard in shards
+    ])
+    mocker.patch(
+        'app.main.views.send.s3download',
+        return_value='phone number\n07700900001\n07700900002\nnot a number\n',
+    )
+
+    with logged_in_client.session_transaction() as session:
+        session['upload_data'] = {'template_id': fake_uuid, 'original_file_name': 'example.csv'}
+    response = logged_in_client.get(url_for(
+        'main.check_messages', service_id=service_one['id'], template_type='sms', upload_id=fake_uuid
+    ))
+
+    assert response.status_code == 200
+    if expected_shards:
+        assert len(mock_map.call_args[0][1]) == expected_shards
+    else:
+        assert not mock_map.called
+    with logged_in_client.session_transaction() as session:
+        assert session['upload_data']['notification_count'] == 3
+        assert session['upload_data']['valid'] is False
+
+
+def test_check_messages_shows_progress_without_downloading_the_file_again(
+    logged_in_client,
+    service_one,
+    mock_get_service_template,
+    mock_get_users_by_service,
+    mock_get_detailed_service_for_today,
+    fake_uuid,
+    mocker,
+):
+    mocker.patch.object(upload_checks, 'get_status', return_value=CHECKING)
+    mock_s3_download = mocker.patch('app.main.views.send.s3download')
+
+    with logged_in_client.session_transaction() as session:
+        session['upload_data'] = {'template_id': fake_uuid, 'original_file_name': 'big.csv'}
+    response = logged_in_client.get(url_for(
+        'main.check_messages', service_id=service_one['id'], template_type='sms', upload_id=fake_uuid
+    ))
+
+    assert response.status_code == 200
+    assert 'Checking big.csv' in response.get_data(as_text=True)
+    assert not mock_s3_download.called
+
+
+@pytest.mark.parametrize('status, expected_poll_interval, expected_text', [
+    (CHECKING, '2', 'Checking big.csv. Big files can take a minute or so.'),
+    (FINISHED, '0', 'We’ve checked big.csv. Continue'),
+    (None, '0', 'We couldn’t finish checking big.csv. Check it again'),
+    (FAILED, '0', 'We’ve checked big.csv. Continue'),
+])
+def test_check_messages_progress(
+    logged_in_client,
+    service_one,
+    fake_uuid,
+    mocker,
+    status,
+    expected_poll_interval,
+    expected_text,
+):
+    mocker.patch.object(upload_checks, 'get_status', return_value=status)
+
+    with logged_in_client.session_transaction() as session:
+        session['upload_data'] = {'template_id': fake_uuid, 'original_file_name': 'big.csv'}
+    response = logged_in_client.get(url_for(
+        'main.check_messages_progress', service_id=service_one['id'], template_type='sms', upload_id=fake_uuid
+    ))
+
+    assert response.status_code == 200
+    assert response.headers['X-Poll-Interval-Seconds'] == expected_poll_interval
+    progress = BeautifulSoup(json.loads(response.get_data(as_text=True))['progress'], 'html.parser')
+    assert ' '.join(progress.text.split()) == expected_text
+
+
+def test_uploading_a_new_file_forgets_the_old_one(
+    logged_in_client,
+    mock_get_service_template,
+    mock_s3_upload,
+    fake_uuid,
+    mocker,
+):
+    mock_delete_prefix = mocker.patch.object(parsed_upload_cache, 'delete_prefix')
+    with logged_in_client.session_transaction() as session:
+        session['upload_data'] = {'upload_id': 'old-upload-id', 'template_id': fake_uuid}
+
+    response = logged_in_client.post(
+        url_for('main.send_messages', service_id=fake_uuid, template_id=fake_uuid),
+        data={'file': (BytesIO(''.encode('utf-8')), 'example.csv')},
+        content_type='multipart/form-data',
+    )
+
+    assert response.status_code == 302
+    mock_delete_prefix.assert_called_once_with('old-upload-id')
+    with logged_in_client.session_transaction() as session:
+        assert session['upload_data']['upload_id'] == fake_uuid
 
 
 def test_dont_show_preview_letter_templates_for_bad_filetype(
@@ -1837,8 +2102,8 @@ def test_check_messages_shows_over_max_row_error(
 ):
     mock_recipients = mocker.patch('app.main.views.send.RecipientCSV').return_value
     mock_recipients.max_rows = 11111
-    mock_recipients.__len__.return_value = 99999
-    mock_recipients.too_many_rows.return_value = True
+    mock_recipients.rows = iter([])
+    mock_recipients.annotated_rows = ({'index': index, 'columns': {}} for index in range(99999))
 
     with logged_in_client.session_transaction() as session:
         session['upload_data'] = {'template_id': fake_uuid}
@@ -475,7 +475,7 @@ def test_should_redirect_after_request_to_go_live(
     mock_get_inbound_number_for_service,
 ):
     mock_post = mocker.patch(
-        'app.main.views.feedback.requests.post',
+        'app.main.views.feedback.pooled_sessions.post',
         return_value=Mock(status_code=201),
     )
     page = client_request.post(
@@ -527,7 +527,7 @@ def test_log_error_on_request_to_go_live(
         mocker,
 ):
     mock_post = mocker.patch(
-        'app.main.views.service_settings.requests.post',
+        'app.main.views.service_settings.pooled_sessions.post',
         return_value=Mock(
             status_code=401,
             json=lambda: {
@@ -0,0 +1,138 @@
+import pytest
+
+from app.notify_client.circuit_breaker import CircuitBreaker, CircuitBreakers, CircuitOpenError
+
+
+def _open(circuit_breaker):
+    for _ in range(circuit_breaker.failure_threshold):
+        circuit_breaker.record(0.1, failed=True)
+
+
+def test_circuit_breaker_opens_after_failures_in_a_row():
+    circuit_breaker = CircuitBreaker('GET /foo', failure_threshold=3)
+
+    assert circuit_breaker.record(0.1, failed=True) is False
+    assert circuit_breaker.record(0.1, failed=True) is False
+    circuit_breaker.before_call()
+    assert circuit_breaker.record(0.1, failed=True) is True
+
+    with pytest.raises(CircuitOpenError) as error:
+        circuit_breaker.before_call()
+    assert error.value.status_code == 503
+    assert error.value.message == 'GET /foo is temporarily unavailable'
+
+
+def test_circuit_breaker_success_resets_failure_count():
+    circuit_breaker = CircuitBreaker('GET /foo', failure_threshold=2)
+
+    circuit_breaker.record(0.1, failed=True)
+    circuit_breaker.record(0.1)
+    circuit_breaker.record(0.1, failed=True)
+
+    circuit_breaker.before_call()
+    assert circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_counts_slow_calls_as_failures():
+    circuit_breaker = CircuitBreaker('GET /foo', failure_threshold=2, latency_threshold=1)
+
+    circuit_breaker.record(1.5)
+    circuit_breaker.record(1.5)
+
+    assert circuit_breaker.state == CircuitBreaker.OPEN
+
+
+def test_circuit_breaker_lets_one_trial_call_through_after_reset_timeout(mocker):
+    monotonic = mocker.patch('app.notify_client.circuit_breaker.monotonic', return_value=100)
+    circuit_breaker = CircuitBreaker('GET /foo', reset_timeout=30)
+    _open(circuit_breaker)
+
+    monotonic.return_value = 129
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_call()
+
+    monotonic.return_value = 130
+    circuit_breaker.before_call()
+    assert circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_call()
+
+
+@pytest.mark.parametrize('trial_failed, expected_state', [
+    (False, CircuitBreaker.CLOSED),
+    (True, CircuitBreaker.OPEN),
+])
+def test_circuit_breaker_trial_call_closes_or_reopens_it(mocker, trial_failed, expected_state):
+    monotonic = mocker.patch('app.notify_client.circuit_breaker.monotonic', return_value=100)
+    circuit_breaker = CircuitBreaker('GET /foo', reset_timeout=30)
+    _open(circuit_breaker)
+    monotonic.return_value = 130
+    circuit_breaker.before_call()
+
+    circuit_breaker.record(0.1, failed=trial_failed)
+
+    assert circuit_breaker.state == expected_state
+
+
+@pytest.mark.parametrize('method, url, expected_endpoint', [
+    (
+        'get',
+        '/service/596364a0-858e-42c8-9062-a8fe822260eb/inbound-sms/summary',
+        'GET /service/<id>/inbound-sms/summary',
+    ),
+    ('GET', '/service/596364a0-858e-42c8-9062-a8fe822260eb/job/1234?page=2', 'GET /service/<id>/job/<id>'),
+    ('POST', 'http://localhost:6011/user/email', 'POST /user/email'),
+])
+def test_circuit_breakers_are_per_endpoint(method, url, expected_endpoint):
+    assert CircuitBreakers.get_endpoint(method, url) == expected_endpoint
+
+
+def test_circuit_breakers_share_breaker_for_endpoint():
+    circuit_breakers = CircuitBreakers()
+
+    assert circuit_breakers.get('GET', '/service/1/users') is circuit_breakers.get('GET', '/service/2/users')
+    assert circuit_breakers.get('GET', '/service/1/users') is not circuit_breakers.get('POST', '/service/1/users')
+
+
+@pytest.mark.parametrize('url, expected_latency_threshold', [
+    ('/service/1234/users', 5),
+    ('/service/1234/notifications', 15),
+    ('/service/1234/inbound-sms/summary', 1),
+])
+def test_circuit_breakers_allow_endpoints_with_longer_timeouts_longer(url, expected_latency_threshold):
+    circuit_breakers = CircuitBreakers()
+    circuit_breakers.endpoint_read_timeouts = {
+        'GET /service/<id>/notifications': 30,
+        'GET /service/<id>/inbound-sms/summary': 2,
+    }
+
+    assert circuit_breakers.get('GET', url).latency_threshold == expected_latency_threshold
+
+
+def test_disabled_circuit_breakers_never_open(mocker):
+    circuit_breakers = CircuitBreakers()
+    circuit_breakers.enabled = False
+    circuit_breaker = circuit_breakers.get('GET', '/foo')
+
+    for _ in range(10):
+        circuit_breakers.record(circuit_breaker, 0.1, failed=True)
+
+    circuit_breakers.before_call(circuit_breaker)
+    assert circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breakers_record_when_opened_and_rejected(mocker):
+    statsd_client = mocker.Mock()
+    circuit_breakers = CircuitBreakers()
+    circuit_breakers.statsd_client = statsd_client
+    circuit_breaker = circuit_breakers.get('GET', '/foo')
+
+    for _ in range(circuit_breakers.failure_threshold):
+        circuit_breakers.record(circuit_breaker, 0.1, failed=True)
+    with pytest.raises(CircuitOpenError):
+        circuit_breakers.before_call(circuit_breaker)
+
+    assert [call[0][0] for call in statsd_client.incr.call_args_list] == [
+        'circuit-breaker.opened',
+        'circuit-breaker.rejected',
+    ]
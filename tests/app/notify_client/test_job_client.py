@@ -1,6 +1,8 @@
 import uuid
 from unittest.mock import ANY
 
+import pytest
+
 from app.notify_client.job_api_client import JobApiClient
 
 
@@ -165,6 +167,39 @@ def test_client_parses_empty_job_stats(mocker):
     assert result['data']['notifications_failed'] == 0
 
 
+@pytest.mark.parametrize('statistics, expected_api_calls', [
+    ([{'status': 'sending', 'count': 1}, {'status': 'delivered', 'count': 1}], 2),
+    ([{'status': 'delivered', 'count': 1}, {'status': 'permanent-failure', 'count': 1}], 1),
+])
+def test_client_keeps_jobs_once_finished(app_, mocker, statistics, expected_api_calls):
+    client = JobApiClient()
+    mock_get = mocker.patch(
+        'app.notify_client.job_api_client.JobApiClient.get',
+        side_effect=lambda url, params: {'data': {'notification_count': 2, 'statistics': statistics}},
+    )
+
+    first = client.get_job('service_id', 'job_id')
+    second = client.get_job('service_id', 'job_id')
+
+    assert first == second
+    assert mock_get.call_count == expected_api_calls
+
+
+def test_client_keeps_its_own_copy_of_finished_jobs(app_, mocker):
+    client = JobApiClient()
+    mocker.patch(
+        'app.notify_client.job_api_client.JobApiClient.get',
+        return_value={'data': {'notification_count': 1, 'statistics': [{'status': 'delivered', 'count': 1}]}},
+    )
+
+    first = client.get_job('service_id', 'job_id')
+    first['data']['notification_count'] = 99
+    second = client.get_job('service_id', 'job_id')
+
+    assert second['data']['notification_count'] == 1
+    assert client.get_job('service_id', 'job_id') is not second
+
+
 def test_client_parses_job_stats_for_service(mocker):
     service_id = 'service_id'
     job_1_id = 'job_id_1'
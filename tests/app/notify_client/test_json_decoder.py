@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from app.notify_client.json_decoder import JSONDecoder, get_loads
+
+
+def test_json_decoder_uses_standard_library_by_default():
+    json_decoder = JSONDecoder()
+
+    assert json_decoder.backend == 'json'
+    assert json_decoder.decode('{"a": ["€", 1, null]}'.encode('utf-8')) == {'a': ['€', 1, None]}
+
+
+def test_json_decoder_uses_configured_backend(app_, mocker):
+    fake_backend = mocker.Mock()
+    mocker.patch('app.notify_client.json_decoder.import_module', return_value=fake_backend)
+    json_decoder = JSONDecoder()
+
+    app_.config['API_JSON_DECODER'] = 'rapidjson'
+    json_decoder.init_app(app_)
+    app_.config['API_JSON_DECODER'] = 'ujson'
+
+    assert json_decoder.backend == 'rapidjson'
+    assert json_decoder.decode(b'{}') == fake_backend.loads.return_value
+    fake_backend.loads.assert_called_once_with('{}')
+
+
+def test_get_loads_falls_back_to_standard_library_if_backend_not_installed(mocker):
+    mocker.patch('app.notify_client.json_decoder.import_module', side_effect=ImportError)
+
+    assert get_loads('ujson') == ('json', json.loads)
+
+
+def test_get_loads_rejects_unknown_backends():
+    with pytest.raises(ValueError):
+        get_loads('os')
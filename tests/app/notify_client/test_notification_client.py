@@ -10,28 +10,36 @@ from tests import single_notification_json, notification_json
 @pytest.mark.parametrize("arguments,expected_call", [
     (
         {},
-        {'url': '/service/abcd1234/notifications', 'params': {}}
+        {'url': '/service/abcd1234/notifications', 'params': {}, 'memo': True}
     ),
     (
         {'page': 99},
-        {'url': '/service/abcd1234/notifications', 'params': {'page': 99}}
+        {'url': '/service/abcd1234/notifications', 'params': {'page': 99}, 'memo': True}
     ),
     (
         {'include_jobs': False},
-        {'url': '/service/abcd1234/notifications', 'params': {'include_jobs': False}}
+        {'url': '/service/abcd1234/notifications', 'params': {'include_jobs': False}, 'memo': True}
     ),
     (
         {'include_from_test_key': True},
-        {'url': '/service/abcd1234/notifications', 'params': {'include_from_test_key': True}}
+        {'url': '/service/abcd1234/notifications', 'params': {'include_from_test_key': True}, 'memo': True}
     ),
     (
         {'job_id': 'efgh5678'},
-        {'url': '/service/abcd1234/job/efgh5678/notifications', 'params': {}}
+        {'url': '/service/abcd1234/job/efgh5678/notifications', 'params': {}, 'memo': True}
     ),
     (
         {'job_id': 'efgh5678', 'page': 48},
-        {'url': '/service/abcd1234/job/efgh5678/notifications', 'params': {'page': 48}}
-    )
+        {'url': '/service/abcd1234/job/efgh5678/notifications', 'params': {'page': 48}, 'memo': True}
+    ),
+    (
+        {'job_id': 'efgh5678', 'page': 2, 'page_size': 5000, 'format_for_csv': True},
+        {
+            'url': '/service/abcd1234/job/efgh5678/notifications',
+            'params': {'page': 2, 'page_size': 5000, 'format_for_csv': True},
+            'memo': False,
+        }
+    ),
 ])
 def test_client_gets_notifications_for_service_and_job_by_page(mocker, arguments, expected_call):
 
@@ -68,6 +76,47 @@ def test_get_notification(mocker):
     )
 
 
+@pytest.mark.parametrize('status, expected_api_calls', [
+    ('created', 2),
+    ('sending', 2),
+    ('delivered', 1),
+    ('permanent-failure', 1),
+])
+def test_get_notification_keeps_notifications_once_finished(app_, mocker, status, expected_api_calls):
+    client = NotificationApiClient()
+    mock_get = mocker.patch(
+        'app.notify_client.notification_api_client.NotificationApiClient.get',
+        return_value=single_notification_json('foo', status=status),
+    )
+    mock_incr = mocker.patch('app.statsd_client.incr')
+
+    first = client.get_notification('foo', 'bar')
+    second = client.get_notification('foo', 'bar')
+
+    assert first == second
+    assert mock_get.call_count == expected_api_calls
+    assert [call[0][0] for call in mock_incr.call_args_list] == [
+        'finished-cache.notification.miss',
+        'finished-cache.notification.{}'.format('hit' if expected_api_calls == 1 else 'miss'),
+    ]
+
+
+def test_get_notification_keeps_its_own_copy(app_, mocker):
+    client = NotificationApiClient()
+    mocker.patch(
+        'app.notify_client.notification_api_client.NotificationApiClient.get',
+        return_value=single_notification_json('foo', status='delivered'),
+    )
+    mocker.patch('app.statsd_client.incr')
+
+    first = client.get_notification('foo', 'bar')
+    first['personalisation'] = {'changed': 'by the caller'}
+    second = client.get_notification('foo', 'bar')
+
+    assert second['personalisation'] != first['personalisation']
+    assert client.get_notification('foo', 'bar') is not second
+
+
 def test_get_api_notifications_changes_letter_statuses(mocker):
     service_id = str(uuid.uuid4())
     sms_notification = single_notification_json(service_id, notification_type='sms', status='created')
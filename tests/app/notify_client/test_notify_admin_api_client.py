@@ -1,12 +1,17 @@
 import uuid
 import pytest
+from threading import Event, Thread
+from time import sleep
 from unittest.mock import patch
 
+import requests
 import werkzeug
+from notifications_python_client.errors import HTTPError, InvalidResponse
 
 from tests import service_json
 from tests.conftest import api_user_active, platform_admin_user
-from app.notify_client import NotifyAdminAPIClient
+from app.notify_client import NotifyAdminAPIClient, SingleFlight, get_request_memo
+from app.notify_client.circuit_breaker import CircuitOpenError
 
 
 SAMPLE_API_KEY = '{}-{}'.format('a' * 36, 's' * 36)
@@ -83,9 +88,10 @@ def test_generate_headers_sets_standard_headers():
     # with patch('app.notify_client.has_request_context', return_value=False):
     headers = api_client.generate_headers('api_token')
 
-    assert set(headers.keys()) == {'Authorization', 'Content-type', 'User-agent'}
+    assert set(headers.keys()) == {'Authorization', 'Content-type', 'Accept-Encoding', 'User-agent'}
     assert headers['Authorization'] == 'Bearer api_token'
     assert headers['Content-type'] == 'application/json'
+    assert headers['Accept-Encoding'] == 'gzip'
     assert headers['User-agent'].startswith('NOTIFY-API-PYTHON-CLIENT')
 
 
@@ -95,5 +101,275 @@ def test_generate_headers_sets_request_id_if_in_request_context(app_):
     with app_.test_request_context() as request_context:
         headers = api_client.generate_headers('api_token')
 
-    assert set(headers.keys()) == {'Authorization', 'Content-type', 'User-agent', 'NotifyRequestID'}
+    assert set(headers.keys()) == {'Authorization', 'Content-type', 'Accept-Encoding', 'User-agent', 'NotifyRequestID'}
     assert headers['NotifyRequestID'] == request_context.request.request_id
+
+
+def test_get_is_memoised_within_a_request(app_):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'base_url')
+
+    with app_.test_request_context():
+        with patch.object(api_client, 'request', return_value={'data': 'foo'}) as request:
+            first = api_client.get('url', params={'a': 1})
+            second = api_client.get('url', params={'a': 1})
+
+        memo = get_request_memo()
+        assert (memo.hits, memo.misses) == (1, 1)
+
+    assert first == second == {'data': 'foo'}
+    request.assert_called_once_with('GET', 'url', params={'a': 1})
+
+
+def test_get_memo_is_keyed_on_url_and_params(app_):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'base_url')
+
+    with app_.test_request_context():
+        with patch.object(api_client, 'request', return_value={}) as request:
+            api_client.get('url', params={'a': 1})
+            api_client.get('url', params={'a': 2})
+            api_client.get('other-url', params={'a': 1})
+
+    assert request.call_count == 3
+
+
+def test_get_memo_returns_copies(app_):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'base_url')
+
+    with app_.test_request_context():
+        with patch.object(api_client, 'request', return_value={'data': {'a': 1}}):
+            api_client.get('url')['data']['a'] = 2
+            assert api_client.get('url') == {'data': {'a': 1}}
+
+
+def test_get_can_leave_responses_out_of_the_memo(app_):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'base_url')
+
+    with app_.test_request_context():
+        with patch.object(api_client, 'request', return_value={'data': 'a big page'}) as request:
+            api_client.get('url', params={'page': 1}, memo=False)
+            api_client.get('url', params={'page': 1}, memo=False)
+
+        assert get_request_memo().responses == {}
+
+    assert request.call_count == 2
+
+
+def test_get_memo_is_not_shared_between_requests(app_):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'base_url')
+
+    with patch.object(api_client, 'request', return_value={}) as request:
+        with app_.test_request_context():
+            api_client.get('url')
+        with app_.test_request_context():
+            api_client.get('url')
+
+    assert request.call_count == 2
+
+
+@pytest.mark.parametrize('method', [
+    'put',
+    'post',
+    'delete'
+])
+def test_get_memo_is_flushed_by_writes(app_, platform_admin_user, method):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'base_url')
+
+    with app_.test_request_context() as request_context, app_.test_client() as client:
+        client.login(platform_admin_user)
+        request_context.service = None
+        with patch.object(api_client, 'request', return_value={}) as request:
+            api_client.get('url')
+            getattr(api_client, method)('url', 'data')
+            api_client.get('url')
+
+    assert [call[0][0] for call in request.call_args_list] == ['GET', method.upper(), 'GET']
+
+
+def test_request_is_sent_through_pooled_session(mocker):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'http://base_url')
+    pooled_request = mocker.patch('app.pooled_sessions.request')
+    pooled_request.return_value.content = b'{"data": "foo"}'
+
+    assert api_client.get('/url', params={'a': 1}) == {'data': 'foo'}
+
+    pooled_request.assert_called_once_with(
+        'GET',
+        'http://base_url/url',
+        headers=mocker.ANY,
+        data='null',
+        params={'a': 1},
+        timeout=(3.05, 10),
+    )
+
+
+def test_request_is_not_sent_if_circuit_breaker_is_open(mocker):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'http://base_url')
+    mocker.patch('app.circuit_breakers.before_call', side_effect=CircuitOpenError('GET /url'))
+    pooled_request = mocker.patch('app.pooled_sessions.request')
+
+    with pytest.raises(CircuitOpenError):
+        api_client.get('/url')
+
+    assert not pooled_request.called
+
+
+@pytest.mark.parametrize('status_code, expected_failed', [
+    (200, False),
+    (404, False),
+    (500, True),
+    (503, True),
+])
+def test_request_records_result_with_circuit_breaker(mocker, status_code, expected_failed):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'http://base_url')
+    pooled_request = mocker.patch('app.pooled_sessions.request')
+    pooled_request.return_value.status_code = status_code
+    pooled_request.return_value.content = b'{}'
+    if status_code >= 400:
+        pooled_request.return_value.raise_for_status.side_effect = requests.HTTPError(
+            response=pooled_request.return_value
+        )
+    record = mocker.patch('app.circuit_breakers.record')
+
+    try:
+        api_client.get('/service/1234/users')
+    except HTTPError:
+        pass
+
+    circuit_breaker, _ = record.call_args[0]
+    assert circuit_breaker.endpoint == 'GET /service/<id>/users'
+    assert record.call_args[1] == {'failed': expected_failed}
+
+
+def test_request_decodes_response_with_json_decoder(mocker):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'http://base_url')
+    pooled_request = mocker.patch('app.pooled_sessions.request')
+    pooled_request.return_value.content = '{"data": "€"}'.encode('utf-8')
+    decode = mocker.patch('app.json_decoder.loads', return_value={'data': '€'})
+
+    assert api_client.get('/url') == {'data': '€'}
+    decode.assert_called_once_with('{"data": "€"}')
+
+
+def test_request_raises_invalid_response_if_not_json(mocker):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'http://base_url')
+    pooled_request = mocker.patch('app.pooled_sessions.request')
+    pooled_request.return_value.content = b'<html>'
+
+    with pytest.raises(InvalidResponse):
+        api_client.get('/url')
+
+
+def _wait_for_waiters(single_flight, key, count):
+    while single_flight._calls.get(key) is None or single_flight._calls[key].waiters < count:
+        sleep(0.001)
+
+
+def test_single_flight_shares_calls_in_flight():
+    single_flight = SingleFlight()
+    release = Event()
+    calls = []
+    results = []
+
+    def slow_call():
+        calls.append(1)
+        release.wait()
+        return {'data': 'foo'}
+
+    threads = [Thread(target=lambda: results.append(single_flight.do('key', slow_call))) for _ in range(3)]
+    threads[0].start()
+    while not calls:
+        sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    _wait_for_waiters(single_flight, 'key', 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert all(result == {'data': 'foo'} for result, _ in results)
+    assert results[1][0] is not results[2][0]
+
+
+def test_single_flight_shares_exceptions():
+    single_flight = SingleFlight()
+    release = Event()
+    errors = []
+
+    def failing_call():
+        release.wait()
+        raise ValueError('oops')
+
+    def call():
+        try:
+            single_flight.do('key', failing_call)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [Thread(target=call) for _ in range(2)]
+    threads[0].start()
+    while 'key' not in single_flight._calls:
+        sleep(0.001)
+    threads[1].start()
+    _wait_for_waiters(single_flight, 'key', 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 2
+    assert single_flight._calls == {}
+
+
+def test_single_flight_does_not_share_finished_calls():
+    single_flight = SingleFlight()
+
+    assert single_flight.do('key', lambda: 1) == (1, False)
+    assert single_flight.do('key', lambda: 2) == (2, False)
+
+
+@pytest.mark.parametrize('coalesce_get_requests, get_kwargs, expected_in_flight', [
+    (True, {}, True),
+    (False, {}, False),
+    (True, {'coalesce': False}, False),
+])
+def test_get_goes_through_single_flight_unless_opted_out(
+    mocker,
+    coalesce_get_requests,
+    get_kwargs,
+    expected_in_flight,
+):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'base_url')
+    api_client.coalesce_get_requests = coalesce_get_requests
+    mocker.patch.object(api_client, 'request', return_value={'data': 'foo'})
+    mock_do = mocker.patch(
+        'app.notify_client._in_flight_gets.do',
+        side_effect=lambda key, function: (function(), True),
+    )
+    mock_statsd = mocker.patch('app.statsd_client.incr')
+
+    assert api_client.get('url', **get_kwargs) == {'data': 'foo'}
+
+    assert mock_do.called == expected_in_flight
+    if expected_in_flight:
+        assert mock_do.call_args[0][0] == ('base_url', 'url', 'null')
+        mock_statsd.assert_called_once_with('notify-admin-api-client.get.coalesced')
+    else:
+        assert not mock_statsd.called
+
+
+def test_get_is_not_coalesced_once_the_request_has_written_something(app_, mocker):
+    api_client = NotifyAdminAPIClient(SAMPLE_API_KEY, 'base_url')
+    mocker.patch.object(api_client, 'request', return_value={'data': 'foo'})
+    mocker.patch.object(api_client, 'check_inactive_service')
+    mock_do = mocker.patch(
+        'app.notify_client._in_flight_gets.do',
+        side_effect=lambda key, function: (function(), False),
+    )
+
+    with app_.test_request_context():
+        api_client.get('url')
+        api_client.post('url', data={})
+        api_client.get('url')
+
+    assert mock_do.call_count == 1
@@ -0,0 +1,157 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Event, current_thread
+
+import pytest
+
+from app.notify_client.request_budgets import LatencyTracker, RequestBudgets
+
+
+@pytest.fixture
+def request_budgets():
+    request_budgets = RequestBudgets()
+    request_budgets.endpoint_read_timeouts = {'GET /service/<id>/notifications': 30}
+    request_budgets.hedge_get_requests = True
+    request_budgets.hedge_min_samples = 5
+    request_budgets._executor = ThreadPoolExecutor(max_workers=2)
+    request_budgets._free_threads = BoundedSemaphore(2)
+    yield request_budgets
+    request_budgets._executor.shutdown(wait=True)
+
+
+def _record_latencies(request_budgets, endpoint, latencies):
+    for latency in latencies:
+        request_budgets._get_latency_tracker(endpoint).record(latency)
+
+
+@pytest.mark.parametrize('latencies, min_samples, expected_percentile', [
+    ([], 1, None),
+    ([0.1, 0.2], 5, None),
+    ([0.1] * 19 + [2], 1, 2),
+    ([0.1] * 95 + [2] * 5, 1, 2),
+    ([0.1] * 96 + [2] * 4, 1, 0.1),
+])
+def test_latency_tracker_percentile(latencies, min_samples, expected_percentile):
+    latency_tracker = LatencyTracker()
+    for latency in latencies:
+        latency_tracker.record(latency)
+
+    assert latency_tracker.percentile(95, min_samples=min_samples) == expected_percentile
+
+
+@pytest.mark.parametrize('endpoint, expected_timeout', [
+    ('GET /service/<id>/notifications', (3.05, 30)),
+    ('GET /service/<id>/job', (3.05, 10)),
+])
+def test_timeout_can_be_set_per_endpoint(request_budgets, endpoint, expected_timeout):
+    calls = []
+
+    request_budgets.send('GET', endpoint, lambda timeout: calls.append(timeout))
+
+    assert calls == [expected_timeout]
+
+
+@pytest.mark.parametrize('endpoints, expected_time_budget', [
+    ((), 13.05),
+    (('GET /service/<id>/job',), 13.05),
+    (('GET /service/<id>/job', 'GET /service/<id>/notifications'), 33.05),
+])
+def test_time_budget_is_long_enough_for_the_slowest_endpoint(request_budgets, endpoints, expected_time_budget):
+    assert request_budgets.get_time_budget(*endpoints) == pytest.approx(expected_time_budget)
+
+
+@pytest.mark.parametrize('method, hedge_get_requests, latencies, expected_delay', [
+    ('GET', True, [0.1] * 5, 0.1),
+    ('GET', True, [0.1] * 4, None),
+    ('GET', False, [0.1] * 5, None),
+    ('POST', True, [0.1] * 5, None),
+])
+def test_only_gets_are_hedged_once_we_know_how_slow_the_endpoint_is(
+    request_budgets,
+    method,
+    hedge_get_requests,
+    latencies,
+    expected_delay,
+):
+    request_budgets.hedge_get_requests = hedge_get_requests
+    _record_latencies(request_budgets, 'GET /foo', latencies)
+
+    assert request_budgets.get_hedge_delay(method, 'GET /foo') == expected_delay
+
+
+def test_slow_get_is_hedged_with_a_second_attempt(mocker, request_budgets):
+    release_first_attempt = Event()
+    statsd_client = request_budgets.statsd_client = mocker.Mock()
+    _record_latencies(request_budgets, 'GET /foo', [0.01] * 5)
+    attempts = []
+
+    def send(timeout):
+        attempts.append(timeout)
+        if len(attempts) == 1:
+            # the first attempt hangs until the second has answered
+            release_first_attempt.wait()
+            return 'first'
+        return 'second'
+
+    assert request_budgets.send('GET', 'GET /foo', send) == 'second'
+    release_first_attempt.set()
+    assert len(attempts) == 2
+    assert [call[0][0] for call in statsd_client.incr.call_args_list] == [
+        'api-client.hedged-request.sent',
+        'api-client.hedged-request.won',
+    ]
+
+
+def test_fast_get_is_not_hedged(request_budgets):
+    _record_latencies(request_budgets, 'GET /foo', [1] * 5)
+    attempts = []
+
+    def send(timeout):
+        attempts.append(timeout)
+        return 'first'
+
+    assert request_budgets.send('GET', 'GET /foo', send) == 'first'
+    assert len(attempts) == 1
+
+
+def test_hedged_get_raises_first_error_if_both_attempts_fail(request_budgets):
+    _record_latencies(request_budgets, 'GET /foo', [0.01] * 5)
+    attempts = []
+    second_attempt_failed = Event()
+
+    def send(timeout):
+        attempts.append(timeout)
+        if len(attempts) == 1:
+            second_attempt_failed.wait()
+            raise ValueError('first')
+        second_attempt_failed.set()
+        raise ValueError('second')
+
+    with pytest.raises(ValueError) as error:
+        request_budgets.send('GET', 'GET /foo', send)
+    assert str(error.value) == 'first'
+
+
+@pytest.mark.parametrize('free_threads, expected_attempts', [
+    # the first attempt would have to queue for a thread, so it’s sent from here
+    (0, 1),
+    # there’s a thread for the first attempt, but it would have to queue for one for the hedge
+    (1, 1),
+])
+def test_get_is_not_hedged_without_free_threads(mocker, request_budgets, free_threads, expected_attempts):
+    _record_latencies(request_budgets, 'GET /foo', [0.01] * 5)
+    request_budgets._free_threads = BoundedSemaphore(2)
+    for _ in range(2 - free_threads):
+        request_budgets._free_threads.acquire()
+    mock_incr = mocker.patch.object(request_budgets, '_incr')
+    attempts = []
+    calling_thread = current_thread()
+
+    def send(timeout):
+        attempts.append(current_thread() is calling_thread)
+        Event().wait(0.05)
+        return 'first'
+
+    assert request_budgets.send('GET', 'GET /foo', send) == 'first'
+    assert attempts == [free_threads == 0]
+    assert len(attempts) == expected_attempts
+    assert not mock_incr.called
@@ -23,19 +23,20 @@ def test_client_posts_archived_true_when_deleting_template(mocker):
 
 
 @pytest.mark.parametrize(
-    'function,params', [
-        (ServiceAPIClient.get_service, {}),
-        (ServiceAPIClient.get_detailed_service, {'detailed': True}),
-        (ServiceAPIClient.get_detailed_service_for_today, {'detailed': True, 'today_only': True})
+    'function,params,coalesce', [
+        # fetched again straight after it has been changed, so it mustn't share a GET which started before that
+        (ServiceAPIClient.get_service, {}, False),
+        (ServiceAPIClient.get_detailed_service, {'detailed': True}, True),
+        (ServiceAPIClient.get_detailed_service_for_today, {'detailed': True, 'today_only': True}, True)
     ],
-    ids=lambda x: x.__name__
+    ids=lambda x: getattr(x, '__name__', None)
 )
-def test_client_gets_service(mocker, function, params):
+def test_client_gets_service(mocker, function, params, coalesce):
     client = ServiceAPIClient()
-    mock_get = mocker.patch.object(client, 'get')
+    mock_get = mocker.patch.object(client, 'get', return_value={'data': {}})
 
     function(client, 'foo')
-    mock_get.assert_called_once_with('/service/foo', params=params)
+    mock_get.assert_called_once_with('/service/foo', params=params, coalesce=coalesce)
 
 
 def test_client_only_updates_allowed_attributes(mocker):
@@ -80,3 +81,131 @@ def test_client_creates_service_with_correct_data(
             email_from='test@example.com',
         ),
     )
+
+
+def test_client_caches_versions_of_templates(mocker):
+    client = ServiceAPIClient()
+    mock_get = mocker.patch.object(client, 'get', return_value={'data': {'content': 'foo'}})
+
+    first = client.get_service_template('service', 'template', version=2)
+    first['data']['content'] = 'changed by the caller'
+    second = client.get_service_template('service', 'template', version=2)
+
+    assert second == {'data': {'content': 'foo'}}
+    mock_get.assert_called_once_with('/service/service/template/template/version/2')
+
+
+def test_client_caches_each_version_separately(mocker):
+    client = ServiceAPIClient()
+    mock_get = mocker.patch.object(client, 'get', return_value={'data': {}})
+
+    client.get_service_template('service', 'template', version=1)
+    client.get_service_template('service', 'template', version=2)
+
+    assert mock_get.call_count == 2
+
+
+def test_client_does_not_cache_current_version_of_template(mocker):
+    client = ServiceAPIClient()
+    mock_get = mocker.patch.object(client, 'get', return_value={'data': {}})
+
+    client.get_service_template('service', 'template')
+    client.get_service_template('service', 'template')
+
+    assert mock_get.call_count == 2
+
+
+def test_client_leaves_whether_template_is_redacted_out_of_cached_versions(mocker):
+    client = ServiceAPIClient()
+    mocker.patch.object(client, 'get', return_value={'data': {'content': 'foo', 'redact_personalisation': False}})
+
+    client.get_service_template('service', 'template', version=1)
+
+    assert client.get_service_template('service', 'template', version=1) == {'data': {'content': 'foo'}}
+
+
+def test_client_caches_service(mocker):
+    client = ServiceAPIClient()
+    mock_get = mocker.patch.object(client, 'get', return_value={'data': {'id': 'foo'}})
+
+    client.get_service('foo')
+    assert client.get_service('foo') == {'data': {'id': 'foo'}}
+
+    mock_get.assert_called_once_with('/service/foo', params={}, coalesce=False)
+
+
+@pytest.mark.parametrize('backend, expected_ttl', [
+    ('redis', 30),
+    ('filesystem', 0),
+    ('local', 0),
+])
+def test_client_only_caches_services_if_every_instance_can_forget_them(app_, mocker, backend, expected_ttl):
+    mocker.patch('app.notify_client.service_api_client.create_shared_cache')
+    mocker.patch.dict(app_.config, values={'SHARED_CACHE_BACKEND': backend, 'SERVICE_CACHE_TTL_SECONDS': 30})
+    client = ServiceAPIClient()
+
+    client.init_app(app_)
+
+    assert client.service_cache_ttl == expected_ttl
+
+
+def test_client_does_not_cache_service_without_ttl(mocker):
+    client = ServiceAPIClient()
+    client.service_cache_ttl = 0
+    mock_get = mocker.patch.object(client, 'get', return_value={'data': {'id': 'foo'}})
+
+    client.get_service('foo')
+    client.get_service('foo')
+
+    assert mock_get.call_count == 2
+    assert len(client.service_cache) == 0
+
+
+def test_client_does_not_cache_detailed_service(mocker):
+    client = ServiceAPIClient()
+    mock_get = mocker.patch.object(client, 'get', return_value={'data': {}})
+
+    client.get_detailed_service('foo')
+    client.get_detailed_service('foo')
+
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.parametrize('method, args, kwargs', [
+    (ServiceAPIClient.update_service, ['foo'], {'name': 'bar'}),
+    (ServiceAPIClient.update_service_with_properties, ['foo', {'name': 'bar'}], {}),
+    (ServiceAPIClient.archive_service, ['foo'], {}),
+    (ServiceAPIClient.suspend_service, ['foo'], {}),
+    (ServiceAPIClient.resume_service, ['foo'], {}),
+    (ServiceAPIClient.remove_user_from_service, ['foo', 'user'], {}),
+    (ServiceAPIClient.create_service_inbound_api, ['foo', 'url', 'token', 'user'], {}),
+    (ServiceAPIClient.update_service_inbound_api, ['foo', 'url', 'token', 'user', 'id'], {}),
+    (ServiceAPIClient.add_reply_to_email_address, ['foo', 'test@example.com'], {}),
+    (ServiceAPIClient.update_reply_to_email_address, ['foo', 'id', 'test@example.com'], {}),
+    (ServiceAPIClient.add_letter_contact, ['foo', 'contact block'], {}),
+    (ServiceAPIClient.update_letter_contact, [], {'service_id': 'foo', 'letter_contact_id': 'id', 'contact_block': ''}),
+])
+def test_changing_service_forgets_cached_service(mocker, method, args, kwargs):
+    mocker.patch('app.notify_client.current_user', id='1')
+    client = ServiceAPIClient()
+    mock_get = mocker.patch.object(client, 'get', return_value={'data': {}})
+    mocker.patch.object(client, 'post')
+    mocker.patch.object(client, 'delete')
+
+    client.get_service('foo')
+    method(client, *args, **kwargs)
+    client.get_service('foo')
+
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.parametrize('method', ['activate_inbound_sms_service', 'deactivate_inbound_sms_permission'])
+def test_changing_inbound_number_forgets_cached_service(mocker, method):
+    from app.notify_client.inbound_number_client import InboundNumberClient
+    mock_forget_service = mocker.patch('app.service_api_client.forget_service')
+    client = InboundNumberClient()
+    mocker.patch.object(client, 'post')
+
+    getattr(client, method)('foo')
+
+    mock_forget_service.assert_called_once_with('foo')
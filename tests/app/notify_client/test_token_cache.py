@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+from freezegun import freeze_time
+from notifications_python_client.authentication import decode_jwt_token
+from notifications_python_client.errors import TokenExpiredError
+
+from app.notify_client.token_cache import TokenCache
+
+SECRET = 'a' * 36
+OTHER_SECRET = 'b' * 36
+ISSUED_AT = datetime(2017, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def mock_create_jwt_token(mocker):
+    tokens = ('token-{}'.format(number) for number in range(1, 100))
+    return mocker.patch(
+        'app.notify_client.token_cache.create_jwt_token',
+        side_effect=lambda secret, client_id: next(tokens),
+    )
+
+
+@pytest.fixture
+def mock_time(mocker):
+    return mocker.patch('app.notify_client.token_cache.time', return_value=1000.0)
+
+
+def test_token_is_reused(mock_create_jwt_token, mock_time):
+    token_cache = TokenCache()
+
+    assert token_cache.get(SECRET, 'notify-admin') == 'token-1'
+    mock_time.return_value = 1014.9
+    assert token_cache.get(SECRET, 'notify-admin') == 'token-1'
+
+    mock_create_jwt_token.assert_called_once_with(SECRET, 'notify-admin')
+
+
+@pytest.mark.parametrize('reuse_fraction, seconds_later, expected_token', [
+    (0.5, 14.9, 'token-1'),
+    (0.5, 15, 'token-2'),
+    (0.5, 31, 'token-2'),
+    (0.2, 5.9, 'token-1'),
+    (0.2, 6, 'token-2'),
+])
+def test_token_is_refreshed_after_its_slice_of_validity(
+    mock_create_jwt_token,
+    mock_time,
+    reuse_fraction,
+    seconds_later,
+    expected_token,
+):
+    token_cache = TokenCache()
+    token_cache.reuse_fraction = reuse_fraction
+    token_cache.get(SECRET, 'notify-admin')
+
+    mock_time.return_value += seconds_later
+
+    assert token_cache.get(SECRET, 'notify-admin') == expected_token
+
+
+def test_token_is_aged_from_its_whole_second_issued_at(mock_create_jwt_token, mock_time):
+    # the token says it was issued at 1000, so at 1015.5 it’s 15.5 seconds old, not 15
+    mock_time.return_value = 1000.5
+    token_cache = TokenCache()
+    token_cache.get(SECRET, 'notify-admin')
+
+    mock_time.return_value = 1015.0
+
+    assert token_cache.get(SECRET, 'notify-admin') == 'token-2'
+
+
+def test_token_is_refreshed_if_clock_goes_backwards(mock_create_jwt_token, mock_time):
+    token_cache = TokenCache()
+    token_cache.get(SECRET, 'notify-admin')
+
+    # eg the clock has been corrected - the old token might now look like it was issued in the future
+    mock_time.return_value -= 5
+
+    assert token_cache.get(SECRET, 'notify-admin') == 'token-2'
+
+
+@pytest.mark.parametrize('api_clock_ahead_by, accepted', [
+    # the headroom: `validity` less the oldest a token is reused at
+    (15, True),
+    # the API only counts whole seconds, so doesn’t reject the token until it’s a whole second past `validity`
+    (16, True),
+    (17, False),
+])
+def test_reused_token_leaves_headroom_for_clock_skew(api_clock_ahead_by, accepted):
+    token_cache = TokenCache()
+    assert token_cache.validity - token_cache.max_age == 15
+    with freeze_time(ISSUED_AT):
+        token = token_cache.get(SECRET, 'notify-admin')
+
+    # the oldest it’s reused at
+    reused_at = ISSUED_AT + timedelta(seconds=token_cache.max_age - 0.1)
+    with freeze_time(reused_at):
+        assert token_cache.get(SECRET, 'notify-admin') == token
+
+    with freeze_time(reused_at + timedelta(seconds=api_clock_ahead_by)):
+        if accepted:
+            assert decode_jwt_token(token, SECRET) is True
+        else:
+            with pytest.raises(TokenExpiredError):
+                decode_jwt_token(token, SECRET)
+
+
+def test_token_is_refreshed_when_secret_is_rotated(mock_create_jwt_token, mock_time):
+    token_cache = TokenCache()
+    token_cache.get(SECRET, 'notify-admin')
+
+    assert token_cache.get(OTHER_SECRET, 'notify-admin') == 'token-2'
+    assert token_cache.get(OTHER_SECRET, 'notify-admin') == 'token-2'
+    mock_create_jwt_token.assert_called_with(OTHER_SECRET, 'notify-admin')
+
+
+def test_tokens_are_cached_per_client_id(mock_create_jwt_token, mock_time):
+    token_cache = TokenCache()
+
+    assert token_cache.get(SECRET, 'notify-admin') == 'token-1'
+    assert token_cache.get(SECRET, 'other-client') == 'token-2'
+    assert token_cache.get(SECRET, 'notify-admin') == 'token-1'
+
+
+def test_init_app_sets_validity_and_forgets_tokens(app_, mock_create_jwt_token, mock_time):
+    token_cache = TokenCache()
+    token_cache.get(SECRET, 'notify-admin')
+    app_.config['API_TOKEN_REUSE_FRACTION'] = 0.25
+
+    token_cache.init_app(app_)
+    app_.config['API_TOKEN_REUSE_FRACTION'] = 0.5
+
+    assert token_cache.max_age == 7.5
+    assert token_cache.get(SECRET, 'notify-admin') == 'token-2'
@@ -33,3 +33,102 @@ def test_client_updates_password_separately(mocker, api_user_active):
 
     client.update_password(api_user_active.id, expected_params['_password'])
     mock_update_password.assert_called_once_with(expected_url, data=expected_params)
+
+
+def _user_json(current_session_id):
+    return {'data': {
+        'id': 1,
+        'name': 'Test User',
+        'email_address': 'test@user.gov.uk',
+        'mobile_number': '+447700900986',
+        'password_changed_at': None,
+        'permissions': {},
+        'state': 'active',
+        'auth_type': 'sms_auth',
+        'failed_login_count': 0,
+        'current_session_id': current_session_id,
+        'platform_admin': False,
+    }}
+
+
+@pytest.mark.parametrize('backend, expected_ttl', [
+    ('redis', 10),
+    ('filesystem', 0),
+    ('local', 0),
+])
+def test_client_only_caches_users_if_every_instance_can_forget_them(app_, mocker, backend, expected_ttl):
+    mocker.patch('app.notify_client.user_api_client.create_shared_cache')
+    mocker.patch.dict(app_.config, values={'SHARED_CACHE_BACKEND': backend, 'USER_CACHE_TTL_SECONDS': 10})
+    client = UserApiClient()
+
+    client.init_app(app_)
+
+    assert client.user_cache_ttl == expected_ttl
+
+
+def test_client_gets_user_every_time_without_ttl(app_, mocker):
+    client = UserApiClient()
+    client.max_failed_login_count = 1
+    client.user_cache_ttl = 0
+    mock_get = mocker.patch.object(client, 'get', return_value=_user_json('session-1'))
+
+    with app_.test_request_context() as request_context:
+        request_context.session['current_session_id'] = 'session-1'
+        client.get_user(1)
+        client.get_user(1)
+
+    assert mock_get.call_count == 2
+
+
+def test_client_keeps_user_for_same_session(app_, mocker):
+    client = UserApiClient()
+    client.max_failed_login_count = 1
+    mock_get = mocker.patch.object(client, 'get', return_value=_user_json('session-1'))
+
+    with app_.test_request_context() as request_context:
+        request_context.session['current_session_id'] = 'session-1'
+        client.get_user(1)
+        user = client.get_user(1)
+
+    assert user.current_session_id == 'session-1'
+    mock_get.assert_called_once_with('/user/1', coalesce=False)
+
+
+def test_client_gets_user_again_if_signed_in_elsewhere(app_, mocker):
+    client = UserApiClient()
+    client.max_failed_login_count = 1
+    mock_get = mocker.patch.object(client, 'get', side_effect=[
+        _user_json('session-1'),
+        _user_json('session-2'),
+    ])
+
+    with app_.test_request_context() as request_context:
+        request_context.session['current_session_id'] = 'session-1'
+        client.get_user(1)
+    with app_.test_request_context() as request_context:
+        request_context.session['current_session_id'] = 'session-2'
+        user = client.get_user(1)
+
+    assert user.current_session_id == 'session-2'
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.parametrize('method, extra_args', [
+    ('update_user_attribute', {'name': 'New name'}),
+    ('update_password', {'password': 'newpassword'}),
+    ('reset_failed_login_count', {}),
+])
+def test_client_forgets_user_after_changing_them(app_, mocker, method, extra_args):
+    mocker.patch('app.notify_client.current_user', id='1')
+    client = UserApiClient()
+    client.max_failed_login_count = 1
+    mock_get = mocker.patch.object(client, 'get', return_value=_user_json('session-1'))
+    mocker.patch.object(client, 'post', return_value=_user_json('session-1'))
+
+    with app_.test_request_context() as request_context:
+        request_context.session['current_session_id'] = 'session-1'
+        client.get_user(1)
+        getattr(client, method)(1, **extra_args)
+        client.get_user(1)
+
+    assert mock_get.call_count == 2
@@ -0,0 +1,211 @@
+from unittest.mock import Mock
+
+import pytest
+
+from freezegun import freeze_time
+
+from app.cache import (
+    FileSystemCache,
+    LRUCache,
+    LayeredCache,
+    ExpiringCache,
+    create_immutable_cache,
+    create_shared_cache,
+)
+
+
+def test_lru_cache_forgets_least_recently_used_item():
+    cache = LRUCache(max_size=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    assert len(cache) == 2
+
+
+def test_lru_cache_returns_copies():
+    cache = LRUCache()
+    cache.set('a', {'b': 'c'})
+    cache.get('a')['b'] = 'd'
+
+    assert cache.get('a') == {'b': 'c'}
+
+
+def test_lru_cache_deletes_by_prefix():
+    cache = LRUCache()
+    cache.set('a/1', 1)
+    cache.set('a/2', 2)
+    cache.set('b/1', 3)
+
+    cache.delete_prefix('a/')
+
+    assert (cache.get('a/1'), cache.get('a/2'), cache.get('b/1')) == (None, None, 3)
+
+
+def test_lru_cache_only_adds_items_which_arent_set():
+    cache = LRUCache()
+    with freeze_time('2017-01-01 12:00:00'):
+        assert cache.add('a', 1, ttl=10) is True
+        assert cache.add('a', 2, ttl=10) is False
+        assert cache.get('a') == 1
+    with freeze_time('2017-01-01 12:00:11'):
+        assert cache.add('a', 3) is True
+        assert cache.get('a') == 3
+
+
+def test_layered_cache_adds_if_the_last_cache_does():
+    local, shared = LRUCache(), LRUCache()
+    shared.set('a', 1)
+
+    assert LayeredCache(local, shared).add('a', 2) is False
+    assert LayeredCache(local, shared).add('b', 3) is True
+    assert (local.get('a'), local.get('b'), shared.get('b')) == (None, 3, 3)
+
+
+def test_layered_cache_fills_earlier_caches():
+    local, shared = LRUCache(), LRUCache()
+    shared.set('a', 1)
+
+    assert LayeredCache(local, shared).get('a') == 1
+    assert local.get('a') == 1
+
+
+def test_immutable_cache_is_local_without_redis():
+    assert isinstance(create_immutable_cache(10), LRUCache)
+
+
+def test_immutable_cache_needs_redis_package_to_use_redis(mocker):
+    mocker.patch('app.cache.redis', None)
+
+    with pytest.raises(RuntimeError):
+        create_immutable_cache(10, redis_url='redis://localhost')
+
+
+def test_lru_cache_forgets_items_after_ttl():
+    cache = LRUCache()
+    with freeze_time('2017-01-01 12:00:00'):
+        cache.set('a', 1, ttl=10)
+    with freeze_time('2017-01-01 12:00:09'):
+        assert cache.get('a') == 1
+    with freeze_time('2017-01-01 12:00:11'):
+        assert cache.get('a') is None
+
+
+def test_expiring_cache_only_fetches_once_per_ttl():
+    expiring_cache = ExpiringCache(key_prefix='', ttl_config_key='MICRO_CACHE_TTL_SECONDS')
+    expiring_cache.ttl = 2
+    fetch = Mock(side_effect=[{'a': 1}, {'a': 2}])
+
+    with freeze_time('2017-01-01 12:00:00'):
+        assert expiring_cache.get_or_fetch('key', fetch) == {'a': 1}
+    with freeze_time('2017-01-01 12:00:01'):
+        assert expiring_cache.get_or_fetch('key', fetch) == {'a': 1}
+    with freeze_time('2017-01-01 12:00:03'):
+        assert expiring_cache.get_or_fetch('key', fetch) == {'a': 2}
+    assert fetch.call_count == 2
+
+
+@pytest.mark.parametrize('ttl, should_cache', [
+    (0, lambda value: True),
+    (2, lambda value: False),
+])
+def test_expiring_cache_can_not_cache(ttl, should_cache):
+    expiring_cache = ExpiringCache(key_prefix='', ttl_config_key='MICRO_CACHE_TTL_SECONDS')
+    expiring_cache.ttl = ttl
+    fetch = Mock(side_effect=[{'a': 1}, {'a': 2}])
+
+    assert expiring_cache.get_or_fetch('key', fetch, should_cache=should_cache) == {'a': 1}
+    assert expiring_cache.get_or_fetch('key', fetch, should_cache=should_cache) == {'a': 2}
+
+
+def test_file_system_cache_is_shared_between_instances(tmpdir):
+    FileSystemCache(str(tmpdir), key_prefix='service/').set('a', {'b': 'c'})
+
+    assert FileSystemCache(str(tmpdir), key_prefix='service/').get('a') == {'b': 'c'}
+    assert FileSystemCache(str(tmpdir), key_prefix='user/').get('a') is None
+
+
+def _files(tmpdir):
+    return [path for path in tmpdir.visit() if path.isfile()]
+
+
+def test_file_system_cache_forgets_items_after_ttl(tmpdir):
+    cache = FileSystemCache(str(tmpdir))
+    with freeze_time('2017-01-01 12:00:00'):
+        cache.set('a', 1, ttl=10)
+    with freeze_time('2017-01-01 12:00:11'):
+        assert cache.get('a') is None
+    assert not _files(tmpdir)
+
+
+def test_file_system_cache_sweeps_out_expired_items(tmpdir):
+    with freeze_time('2017-01-01 12:00:00'):
+        cache = FileSystemCache(str(tmpdir), sweep_interval=60)
+        cache.set('a/1', 1, ttl=10)
+        cache.set('b/1', 2, ttl=10)
+        cache.set('b/2', 3, ttl=120)
+    with freeze_time('2017-01-01 12:00:30'):
+        cache.set('c', 4)
+        assert len(_files(tmpdir)) == 4
+    with freeze_time('2017-01-01 12:01:01'):
+        cache.set('c', 5)
+        assert len(_files(tmpdir)) == 2
+        assert len(tmpdir.listdir()[0].listdir()) == 2
+        assert (cache.get('b/2'), cache.get('c')) == (3, 5)
+
+
+def test_file_system_cache_deletes(tmpdir):
+    cache = FileSystemCache(str(tmpdir), key_prefix='service/')
+    cache.set('a/1', 1)
+    cache.set('a/2', 2)
+    cache.set('b', 3)
+
+    cache.delete('b')
+    assert cache.get('b') is None
+
+    cache.delete_prefix('a/')
+    assert not _files(tmpdir)
+
+
+@pytest.mark.parametrize('prefix, expected_values', [
+    ('', (None, None, None, None)),
+    ('a', (None, None, None, None)),
+    ('a/', (None, None, 3, 4)),
+    ('a/b', (1, None, 3, 4)),
+    ('a/b/', (1, 2, 3, 4)),
+    ('ab', (1, 2, 3, None)),
+])
+def test_file_system_cache_deletes_by_prefix(tmpdir, prefix, expected_values):
+    cache = FileSystemCache(str(tmpdir), key_prefix='service/')
+    keys = ('a/1', 'a/b', 'a', 'ab/1')
+    for value, key in enumerate(keys, start=1):
+        cache.set(key, value)
+    FileSystemCache(str(tmpdir), key_prefix='user/').set('a/1', 5)
+
+    cache.delete_prefix(prefix)
+
+    assert tuple(cache.get(key) for key in keys) == expected_values
+    assert FileSystemCache(str(tmpdir), key_prefix='user/').get('a/1') == 5
+
+
+@pytest.mark.parametrize('backend, expected_class', [
+    ('filesystem', FileSystemCache),
+    ('local', LRUCache),
+])
+def test_create_shared_cache(app_, mocker, tmpdir, backend, expected_class):
+    mocker.patch.dict(app_.config, values={'SHARED_CACHE_BACKEND': backend, 'SHARED_CACHE_DIRECTORY': str(tmpdir)})
+
+    assert isinstance(create_shared_cache(app_, key_prefix='foo/'), expected_class)
+
+
+def test_file_system_cache_only_adds_items_which_arent_set(tmpdir):
+    with freeze_time('2017-01-01 12:00:00'):
+        assert FileSystemCache(str(tmpdir)).add('a', 1, ttl=10) is True
+        assert FileSystemCache(str(tmpdir)).add('a', 2, ttl=10) is False
+        assert FileSystemCache(str(tmpdir)).get('a') == 1
+    with freeze_time('2017-01-01 12:00:11'):
+        assert FileSystemCache(str(tmpdir)).add('a', 3) is True
+        assert FileSystemCache(str(tmpdir)).get('a') == 3
+    assert len(tmpdir.listdir()) == 1
@@ -0,0 +1,137 @@
+from threading import Event
+from unittest.mock import Mock
+
+import pytest
+from notifications_python_client.errors import HTTPError
+
+from app.event_streams import EventStreams, Subscription
+
+
+@pytest.fixture
+def event_streams(mocker):
+    # don’t wait between polls
+    mocker.patch('app.event_streams.sleep')
+    event_streams = EventStreams()
+    event_streams.keep_alive_interval = 0.01
+    return event_streams
+
+
+def _read_stream(event_streams, key, fetch):
+    return list(event_streams.stream(key, fetch))
+
+
+def test_subscription_only_keeps_latest_data():
+    subscription = Subscription('key')
+
+    subscription.publish({'a': 1})
+    subscription.publish({'a': 2})
+
+    assert subscription.get(timeout=0) == {'a': 2}
+    assert subscription.get(timeout=0) is None
+
+
+def test_subscription_stays_finished():
+    subscription = Subscription('key')
+
+    subscription.publish({'a': 1})
+    subscription.finish()
+
+    assert subscription.get(timeout=0) == {'a': 1}
+    assert subscription.get(timeout=0) is None
+    assert subscription.finished
+
+
+def test_stream_sends_data_until_finished(event_streams):
+    fetch = Mock(side_effect=[
+        ({'counts': '1'}, 2),
+        ({'counts': '1'}, 2),
+        ({'counts': '2'}, 0),
+    ])
+
+    events = _read_stream(event_streams, 'key', fetch)
+
+    # anything the stream hasn’t got round to sending is replaced by the newer data
+    assert events[0] == 'retry: 2000\n\n'
+    assert set(events[1:-2]) <= {'data: {"counts": "1"}\n\n'}
+    assert events[-2:] == [
+        'data: {"counts": "2"}\n\n',
+        'event: finished\ndata: {}\n\n',
+    ]
+    assert fetch.call_count == 3
+    assert event_streams._pollers == {}
+
+
+def test_stream_sends_keep_alive_while_waiting(event_streams):
+    carry_on = Event()
+
+    def fetch():
+        carry_on.wait(1)
+        return {'counts': '1'}, 0
+
+    stream = event_streams.stream('key', fetch)
+
+    assert next(stream) == 'retry: 2000\n\n'
+    assert next(stream) == ': keep-alive\n\n'
+    carry_on.set()
+    assert list(stream) == [
+        'data: {"counts": "1"}\n\n',
+        'event: finished\ndata: {}\n\n',
+    ]
+
+
+def test_subscribers_share_a_poller(event_streams):
+    carry_on = Event()
+
+    def fetch():
+        carry_on.wait(1)
+        return {'counts': '1'}, 0
+    other_fetch = Mock()
+
+    first = event_streams.subscribe('key', fetch)
+    second = event_streams.subscribe('key', other_fetch)
+    carry_on.set()
+
+    assert first.get(timeout=1) == second.get(timeout=1) == {'counts': '1'}
+    assert first.finished and second.finished
+    assert other_fetch.called is False
+
+
+def test_stream_finishes_if_there_is_nothing_to_poll(event_streams):
+    fetch = Mock(side_effect=HTTPError(Mock(status_code=404, json=Mock(return_value={}))))
+
+    assert _read_stream(event_streams, 'key', fetch) == [
+        'retry: 2000\n\n',
+        'event: finished\ndata: {}\n\n',
+    ]
+
+
+def test_poller_keeps_going_if_the_api_is_down(event_streams):
+    fetch = Mock(side_effect=[
+        HTTPError(Mock(status_code=503, json=Mock(return_value={}))),
+        ({'counts': '1'}, 0),
+    ])
+
+    assert _read_stream(event_streams, 'key', fetch) == [
+        'retry: 2000\n\n',
+        'data: {"counts": "1"}\n\n',
+        'event: finished\ndata: {}\n\n',
+    ]
+
+
+def test_poller_stops_once_everyone_has_gone(event_streams):
+    carry_on = Event()
+
+    def fetch():
+        carry_on.wait(1)
+        return {'counts': '1'}, 2
+    fetch = Mock(side_effect=fetch)
+
+    subscription = event_streams.subscribe('key', fetch)
+    poller = event_streams._pollers['key']
+    event_streams.unsubscribe(subscription)
+    carry_on.set()
+    poller.join(1)
+
+    assert not poller.is_alive()
+    assert event_streams._pollers == {}
+    assert fetch.call_count == 1
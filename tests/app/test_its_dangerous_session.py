@@ -0,0 +1,67 @@
+from flask import url_for
+from freezegun import freeze_time
+
+from tests.conftest import SERVICE_ONE_ID, mock_get_notification
+
+
+def _sets_session_cookie(response):
+    return any(
+        cookie.startswith('notify_admin_session=')
+        for cookie in response.headers.getlist('Set-Cookie')
+    )
+
+
+def test_pages_reissue_session_cookie(logged_in_client, mocker, fake_uuid):
+    mock_get_notification(mocker, fake_uuid)
+
+    response = logged_in_client.get(url_for(
+        'main.view_notification', service_id=SERVICE_ONE_ID, notification_id=fake_uuid
+    ))
+
+    assert response.status_code == 200
+    assert _sets_session_cookie(response)
+
+
+def test_read_only_views_do_not_reissue_unchanged_session_cookie(logged_in_client, mocker, fake_uuid):
+    mock_get_notification(mocker, fake_uuid)
+
+    response = logged_in_client.get(url_for(
+        'main.view_notification_updates', service_id=SERVICE_ONE_ID, notification_id=fake_uuid
+    ))
+
+    assert response.status_code == 200
+    assert not _sets_session_cookie(response)
+
+
+def test_read_only_views_reissue_changed_session_cookie(logged_in_client, mocker, fake_uuid):
+    mock_get_notification(mocker, fake_uuid)
+    with logged_in_client.session_transaction() as session:
+        session['service_id'] = 'some-other-service'
+
+    response = logged_in_client.get(url_for(
+        'main.view_notification_updates', service_id=SERVICE_ONE_ID, notification_id=fake_uuid
+    ))
+
+    assert response.status_code == 200
+    assert _sets_session_cookie(response)
+
+
+def test_read_only_views_reissue_session_cookie_close_to_expiry(
+    client,
+    mocker,
+    fake_uuid,
+    active_user_with_permissions,
+    service_one,
+):
+    mock_get_notification(mocker, fake_uuid)
+    url = url_for('main.view_notification_updates', service_id=SERVICE_ONE_ID, notification_id=fake_uuid)
+
+    with freeze_time('2017-01-01 00:00:00'):
+        client.login(active_user_with_permissions, mocker, service_one)
+    with freeze_time('2017-01-01 18:59:00'):
+        not_expiring_soon = client.get(url)
+    with freeze_time('2017-01-01 19:01:00'):
+        expiring_soon = client.get(url)
+
+    assert not _sets_session_cookie(not_expiring_soon)
+    assert _sets_session_cookie(expiring_soon)
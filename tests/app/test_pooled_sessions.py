@@ -0,0 +1,49 @@
+from unittest.mock import Mock
+
+import pytest
+
+from app.pooled_sessions import PooledSessions
+
+
+@pytest.mark.parametrize('url, expected_host', [
+    ('https://api.notifications.service.gov.uk/service/1234', 'https://api.notifications.service.gov.uk'),
+    ('http://localhost:6011/user?email=a', 'http://localhost:6011'),
+])
+def test_get_host(url, expected_host):
+    assert PooledSessions.get_host(url) == expected_host
+
+
+def test_one_session_per_host():
+    pooled_sessions = PooledSessions()
+
+    assert pooled_sessions.get_session('https://a.gov.uk/foo') is pooled_sessions.get_session('https://a.gov.uk/bar')
+    assert pooled_sessions.get_session('https://a.gov.uk/foo') is not pooled_sessions.get_session('https://b.gov.uk')
+
+
+def test_init_app_configures_pools(app_):
+    pooled_sessions = PooledSessions()
+    app_.config['HTTP_POOL_MAXSIZE'] = 3
+    app_.config['HTTP_MAX_RETRIES'] = 2
+
+    pooled_sessions.init_app(app_)
+    adapter = pooled_sessions.get_session('https://a.gov.uk').get_adapter('https://a.gov.uk')
+
+    assert adapter._pool_maxsize == 3
+    assert adapter.max_retries.connect == 2
+    assert adapter.max_retries.read is False
+
+    app_.config['HTTP_POOL_MAXSIZE'] = 10
+    app_.config['HTTP_MAX_RETRIES'] = 3
+
+
+def test_request_uses_pooled_session_and_records_connection_reuse(mocker):
+    statsd_client = Mock()
+    pooled_sessions = PooledSessions()
+    pooled_sessions.statsd_client = statsd_client
+    session_request = mocker.patch('requests.Session.request')
+
+    response = pooled_sessions.post('https://a.gov.uk/foo', json={'a': 1})
+
+    assert response == session_request.return_value
+    session_request.assert_called_once_with('POST', 'https://a.gov.uk/foo', json={'a': 1})
+    statsd_client.incr.assert_called_once_with('pooled-sessions.connection.reused')
@@ -47,7 +47,7 @@ def test_from_database_object_makes_request(
     expected_url,
 ):
     resp = Mock(content='a', status_code='b', headers={'c': 'd'})
-    request_mock = mocker.patch('app.template_previews.requests.post', return_value=resp)
+    request_mock = mocker.patch('app.template_previews.pooled_sessions.post', return_value=resp)
     mocker.patch('app.template_previews.current_service', __getitem__=Mock(return_value='123'))
 
     ret = partial_call(template='foo')
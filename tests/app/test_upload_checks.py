@@ -0,0 +1,121 @@
+from concurrent.futures import Future
+from threading import Event
+
+import pytest
+
+from app.upload_checks import CHECKING, FAILED, FINISHED, UploadChecks
+
+
+@pytest.fixture
+def upload_checks():
+    upload_checks = UploadChecks()
+    upload_checks.min_size = 10
+    return upload_checks
+
+
+class ImmediateExecutor(object):
+
+    def submit(self, function, *args):
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _start_and_wait(upload_checks, upload_id, function, iterable):
+    results, finished = [], Event()
+
+    def callback(result):
+        results.append(result)
+        finished.set()
+
+    upload_checks.start(upload_id, function, iterable, callback=callback)
+    finished.wait(timeout=10)
+    return results
+
+
+@pytest.mark.parametrize('min_size, contents, expected', [
+    (10, 'x' * 9, False),
+    (10, 'x' * 10, True),
+    (0, 'x' * 1000, False),
+])
+def test_should_run_in_background(upload_checks, min_size, contents, expected):
+    upload_checks.min_size = min_size
+
+    assert upload_checks.should_run_in_background(contents) is expected
+
+
+@pytest.mark.parametrize('backend, expected_min_size', [
+    ('redis', 10),
+    ('filesystem', 0),
+    ('local', 0),
+])
+def test_only_checks_in_the_background_if_every_instance_can_see_the_status(
+    app_, mocker, backend, expected_min_size
+):
+    mocker.patch('app.upload_checks.create_shared_cache')
+    mocker.patch.dict(app_.config, values={'SHARED_CACHE_BACKEND': backend, 'BACKGROUND_CHECK_MIN_FILE_SIZE': 10})
+    upload_checks = UploadChecks()
+
+    upload_checks.init_app(app_)
+
+    assert upload_checks.min_size == expected_min_size
+
+
+def test_runs_check_in_other_processes_and_calls_back_with_results(upload_checks):
+    upload_checks.max_workers = 2
+
+    assert _start_and_wait(upload_checks, 'upload-id', len, ['x' * 20, 'x' * 10, 'x']) == [[20, 10, 1]]
+    assert upload_checks.get_status('upload-id') == FINISHED
+
+
+def test_is_checking_until_finished(upload_checks, mocker):
+    mocker.patch.object(upload_checks, '_get_executor')
+
+    upload_checks.start('upload-id', len, ['x' * 20], callback=lambda results: None)
+
+    assert upload_checks.get_status('upload-id') == CHECKING
+
+
+def test_doesnt_start_checking_the_same_file_twice(upload_checks, mocker):
+    mock_get_executor = mocker.patch.object(upload_checks, '_get_executor')
+
+    upload_checks.start('upload-id', len, ['x' * 20], callback=lambda results: None)
+    upload_checks.start('upload-id', len, ['x' * 20], callback=lambda results: None)
+
+    assert mock_get_executor.return_value.submit.call_count == 1
+
+
+def test_only_calls_back_once_everything_has_finished(upload_checks, mocker):
+    futures = [Future(), Future()]
+    mocker.patch.object(upload_checks, '_get_executor').return_value.submit.side_effect = futures
+    results = []
+
+    upload_checks.start('upload-id', len, ['x' * 20, 'x' * 10], callback=results.append)
+    futures[1].set_result(10)
+    assert results == []
+    futures[0].set_result(20)
+
+    assert results == [[20, 10]]
+
+
+@pytest.mark.parametrize('iterable, callback', [
+    (['not a number'], lambda results: None),
+    (['1'], lambda results: 1 / 0),
+])
+def test_remembers_checks_which_fail(upload_checks, mocker, iterable, callback):
+    mocker.patch.object(upload_checks, '_get_executor', return_value=ImmediateExecutor())
+    mock_logger = mocker.patch('app.upload_checks.logger')
+
+    upload_checks.start('upload-id', int, iterable, callback=callback)
+
+    assert upload_checks.get_status('upload-id') == FAILED
+    mock_logger.exception.assert_called_once_with('Failed to check upload upload-id')
+
+
+def test_map_keeps_results_in_order(upload_checks):
+    upload_checks.max_workers = 2
+
+    assert upload_checks.map(len, ['a' * length for length in range(10)]) == list(range(10))
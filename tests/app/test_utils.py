@@ -1,10 +1,18 @@
+import hashlib
+import json
+import pickle
+from concurrent.futures import TimeoutError
 from pathlib import Path
+from time import sleep
 from io import StringIO
 from collections import OrderedDict
 from csv import DictReader
 
 from freezegun import freeze_time
 import pytest
+from flask import request
+from flask.globals import _request_ctx_stack
+from notifications_utils.recipients import RecipientCSV
 
 from app.utils import (
     email_safe,
@@ -13,7 +21,15 @@ from app.utils import (
     generate_next_dict,
     Spreadsheet,
     get_letter_timings,
-    get_cdn_domain
+    get_cdn_domain,
+    run_concurrently,
+    jsonify_with_etag,
+    jsonify_partials,
+    STOP_POLLING,
+    RecipientsSummary,
+    split_csv_lines,
+    split_into_shards,
+    with_request_context_of_its_own,
 )
 
 
@@ -300,3 +316,328 @@ def test_get_cdn_domain_on_non_localhost(client, mocker):
     mocker.patch.dict('app.current_app.config', values={'ADMIN_BASE_URL': 'https://some.admintest.com'})
     domain = get_cdn_domain()
     assert domain == 'static-logos.admintest.com'
+
+
+def test_run_concurrently_returns_results_in_order(app_):
+    with app_.test_request_context():
+        assert run_concurrently(
+            lambda: sleep(0.02) or 'slow',
+            lambda: 'fast',
+        ) == ['slow', 'fast']
+
+
+def test_run_concurrently_raises_errors_from_calls(app_):
+    def _raise():
+        raise ValueError('foo')
+
+    with app_.test_request_context(), pytest.raises(ValueError):
+        run_concurrently(lambda: 1, _raise)
+
+
+def test_run_concurrently_has_a_time_budget(app_, mocker):
+    mocker.patch.dict(app_.config, values={'CONCURRENT_API_CALLS_TIMEOUT_SECONDS': 0.01})
+
+    with app_.test_request_context(), pytest.raises(TimeoutError):
+        run_concurrently(lambda: sleep(0.1))
+
+
+def test_run_concurrently_can_use_something_else_for_calls_which_dont_finish_in_time(app_):
+    with app_.test_request_context():
+        assert run_concurrently(
+            lambda: 'fast',
+            lambda: sleep(0.1) or 'slow',
+            time_budget=0.05,
+            on_timeout=lambda index: 'call {} timed out'.format(index),
+        ) == ['fast', 'call 1 timed out']
+
+
+def test_run_concurrently_can_see_the_current_service(app_):
+    from app import current_service
+
+    with app_.test_request_context() as request_context:
+        request_context.service = {'id': '1234'}
+        assert run_concurrently(lambda: current_service['id']) == ['1234']
+
+
+@pytest.mark.parametrize('method', ['GET', 'POST'])
+def test_jsonify_with_etag_returns_full_response_with_strong_etag(app_, method):
+    with app_.test_request_context(method=method):
+        response = jsonify_with_etag(partial='<p>hello</p>')
+
+    assert response.status_code == 200
+    assert response.get_etag() == (
+        hashlib.sha256(response.get_data()).hexdigest(), False
+    )
+    assert json.loads(response.get_data(as_text=True)) == {'partial': '<p>hello</p>'}
+
+
+@pytest.mark.parametrize('method', ['GET', 'POST'])
+def test_jsonify_with_etag_returns_304_if_content_unchanged(app_, method):
+    with app_.test_request_context():
+        etag, _ = jsonify_with_etag(partial='<p>hello</p>').get_etag()
+
+    with app_.test_request_context(method=method, headers={'If-None-Match': '"{}"'.format(etag)}):
+        response = jsonify_with_etag(partial='<p>hello</p>')
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.get_etag() == (etag, False)
+
+
+def test_jsonify_with_etag_returns_new_content_if_changed(app_):
+    with app_.test_request_context():
+        etag, _ = jsonify_with_etag(partial='<p>hello</p>').get_etag()
+
+    with app_.test_request_context(headers={'If-None-Match': '"{}"'.format(etag)}):
+        response = jsonify_with_etag(partial='<p>goodbye</p>')
+
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
+
+
+def test_jsonify_partials_sends_every_partial_and_its_hash(app_):
+    with app_.test_request_context():
+        response = jsonify_partials({'counts': '<p>1</p>', 'notifications': '<p>2</p>', 'has_jobs': True})
+
+    content = json.loads(response.get_data(as_text=True))
+    assert content['counts'] == '<p>1</p>'
+    assert content['notifications'] == '<p>2</p>'
+    assert content['has_jobs'] is True
+    assert content['hashes'] == {
+        'counts': hashlib.sha1(b'"<p>1</p>"').hexdigest(),
+        'notifications': hashlib.sha1(b'"<p>2</p>"').hexdigest(),
+        'has_jobs': hashlib.sha1(b'true').hexdigest(),
+    }
+
+
+def test_jsonify_partials_leaves_out_partials_browser_already_has(app_):
+    with app_.test_request_context(headers={'X-Partial-Hashes': json.dumps({
+        'counts': hashlib.sha1(b'"<p>1</p>"').hexdigest(),
+        'notifications': 'out-of-date',
+    })}):
+        response = jsonify_partials({'counts': '<p>1</p>', 'notifications': '<p>2</p>'})
+
+    content = json.loads(response.get_data(as_text=True))
+    assert content.keys() == {'notifications', 'hashes'}
+
+
+@pytest.mark.parametrize('header', ['not json', '["a list"]', ''])
+def test_jsonify_partials_ignores_bad_hashes(app_, header):
+    with app_.test_request_context(headers={'X-Partial-Hashes': header}):
+        response = jsonify_partials({'counts': '<p>1</p>'})
+
+    assert json.loads(response.get_data(as_text=True)).keys() == {'counts', 'hashes'}
+
+
+def _hash_of(partial):
+    return hashlib.sha1(json.dumps(partial).encode('utf-8')).hexdigest()
+
+
+@pytest.mark.parametrize('current_interval, hashes_in_browser, expected_interval', [
+    # something has changed
+    (None, {}, '2'),
+    ('16', {}, '2'),
+    ('16', {'counts': 'out-of-date'}, '2'),
+    # nothing has changed
+    (None, {'counts': _hash_of('<p>1</p>')}, '4'),
+    ('4', {'counts': _hash_of('<p>1</p>')}, '8'),
+    ('1.5', {'counts': _hash_of('<p>1</p>')}, '4'),
+    ('16', {'counts': _hash_of('<p>1</p>')}, '30'),
+    ('30', {'counts': _hash_of('<p>1</p>')}, '30'),
+    ('not a number', {'counts': _hash_of('<p>1</p>')}, '4'),
+])
+def test_jsonify_partials_backs_off_while_nothing_changes(
+    app_,
+    current_interval,
+    hashes_in_browser,
+    expected_interval,
+):
+    headers = {'X-Partial-Hashes': json.dumps(hashes_in_browser)}
+    if current_interval:
+        headers['X-Poll-Interval-Seconds'] = current_interval
+
+    with app_.test_request_context(headers=headers):
+        response = jsonify_partials({'counts': '<p>1</p>'})
+
+    assert float(response.headers['X-Poll-Interval-Seconds']) == float(expected_interval)
+
+
+@pytest.mark.parametrize('if_none_match', [True, False])
+def test_jsonify_partials_can_tell_browser_to_stop_polling(app_, if_none_match):
+    with app_.test_request_context():
+        etag, _ = jsonify_partials({'counts': '<p>1</p>'}).get_etag()
+
+    headers = {'If-None-Match': '"{}"'.format(etag)} if if_none_match else {}
+    with app_.test_request_context(headers=headers):
+        response = jsonify_partials({'counts': '<p>1</p>'}, poll_interval_seconds=STOP_POLLING)
+
+    assert response.status_code == (304 if if_none_match else 200)
+    assert response.headers['X-Poll-Interval-Seconds'] == '0'
+
+
+@pytest.mark.parametrize('whitelist', [None, ['07700900001']])
+def test_recipients_summary_matches_recipient_csv(whitelist):
+    recipients = RecipientCSV(
+        'phone number,name\n'
+        '07700900001,A\n'
+        '07700900002,\n'
+        'not a number,C\n'
+        'not a number,\n'
+        '07700900005,E\n',
+        template_type='sms',
+        placeholders=['name'],
+        max_initial_rows_shown=2,
+        max_errors_shown=2,
+        whitelist=whitelist,
+        remaining_messages=10,
+    )
+
+    summary = RecipientsSummary(recipients)
+
+    assert summary.count == len(list(recipients.rows)) == 5
+    assert summary.rows_with_bad_recipients == set(recipients.rows_with_bad_recipients) == {2, 3}
+    assert summary.rows_with_missing_data == set(recipients.rows_with_missing_data) == {1, 3}
+    assert summary.rows_with_errors == set(recipients.rows_with_errors) == {1, 2, 3}
+    assert [row['index'] for row in summary.initial_annotated_rows] == [
+        row['index'] for row in recipients.initial_annotated_rows
+    ] == [0, 1]
+    assert [row['index'] for row in summary.initial_annotated_rows_with_errors] == [
+        row['index'] for row in recipients.initial_annotated_rows_with_errors
+    ] == [1, 2]
+    assert summary.has_errors == recipients.has_errors
+    assert summary.too_many_rows is recipients.too_many_rows is False
+    assert summary.more_rows_than_can_send is recipients.more_rows_than_can_send is False
+    assert summary.allowed_to_send_to == recipients.allowed_to_send_to
+    assert summary.column_headers == recipients.column_headers
+    assert summary.missing_column_headers == recipients.missing_column_headers
+    assert summary.first_row == next(recipients.rows)
+
+
+@pytest.mark.parametrize('template_type, contents, whitelist, expected_allowed_to_send_to', [
+    ('sms', 'phone number\n07700900001\n+447700900002\n', ['07700 900001', '07700900002'], True),
+    ('sms', 'phone number\n07700900001\n07700900003\n', ['07700900001'], False),
+    ('sms', 'phone number\n07700900003\n', None, True),
+    ('letter', 'address line 1,postcode\nA1,SW1A 1AA\n', ['07700900001'], True),
+])
+def test_recipients_summary_checks_the_whitelist_in_the_same_pass(
+    mocker,
+    template_type,
+    contents,
+    whitelist,
+    expected_allowed_to_send_to,
+):
+    mock_allowed_to_send_to = mocker.patch.object(
+        RecipientCSV, 'allowed_to_send_to', new_callable=mocker.PropertyMock
+    )
+
+    summary = RecipientsSummary(RecipientCSV(contents, template_type=template_type, whitelist=whitelist))
+
+    assert summary.allowed_to_send_to is expected_allowed_to_send_to
+    assert not mock_allowed_to_send_to.called
+
+
+def test_recipients_summary_knows_when_there_are_too_many_rows():
+    recipients = RecipientCSV('phone number\n07700900001\n07700900002\n', template_type='sms', remaining_messages=1)
+    recipients.max_rows = 1
+
+    summary = RecipientsSummary(recipients)
+
+    assert summary.too_many_rows is True
+    assert summary.more_rows_than_can_send is True
+    assert summary.has_errors is True
+
+
+def test_recipients_summary_can_be_cached_without_the_file():
+    summary = pickle.loads(pickle.dumps(RecipientsSummary(
+        RecipientCSV('phone number\n07700900001\n07700900002\n', template_type='sms', remaining_messages=2)
+    )))
+
+    assert summary.count == 2
+    assert summary.has_errors is False
+
+    summary.remaining_messages = 1
+
+    assert summary.more_rows_than_can_send is True
+    assert summary.has_errors is True
+
+
+@pytest.mark.parametrize('text, expected_lines, expected_unfinished', [
+    ('', [], ''),
+    ('a,b\r\n1,2', ['a,b\r\n'], '1,2'),
+    ('a,b\n1,2\n', ['a,b\n', '1,2\n'], ''),
+    ('a,b\n1,"two\nlines"\n3,"unfinished\n', ['a,b\n', '1,"two\nlines"\n'], '3,"unfinished\n'),
+])
+def test_split_csv_lines(text, expected_lines, expected_unfinished):
+    assert split_csv_lines(text) == (expected_lines, expected_unfinished)
+
+
+def test_split_into_shards():
+    assert split_into_shards(
+        '\n,,\nphone number,name\n07700900001,A\n07700900002,"B\nB"\n07700900003,C',
+        rows_per_shard=2,
+    ) == [
+        'phone number,name\n07700900001,A\n07700900002,"B\nB"\n',
+        'phone number,name\n07700900003,C',
+    ]
+
+
+def test_split_into_shards_leaves_small_files_alone():
+    assert split_into_shards('phone number\n07700900001\n', rows_per_shard=1) == [
+        'phone number\n07700900001\n'
+    ]
+
+
+@pytest.mark.parametrize('whitelist', [None, ['07700900001', '07700900004']])
+@pytest.mark.parametrize('rows_per_shard', [1, 2, 3, 100])
+def test_recipients_summary_from_shards_matches_checking_the_whole_file(whitelist, rows_per_shard):
+    contents = (
+        'phone number,name\n'
+        '07700900001,A\n'
+        '07700900002,\n'
+        '\n'
+        'not a number,C\n'
+        'not a number,\n'
+        '07700900004,"E\nE"\n'
+        ',\n'
+        '07700900005,F\n'
+    )
+
+    def summarise(contents):
+        return RecipientsSummary(RecipientCSV(
+            contents,
+            template_type='sms',
+            placeholders=['name'],
+            max_initial_rows_shown=3,
+            max_errors_shown=2,
+            whitelist=whitelist,
+            remaining_messages=5,
+        ))
+
+    sharded = RecipientsSummary.from_shards([
+        summarise(shard) for shard in split_into_shards(contents, rows_per_shard)
+    ])
+
+    assert vars(sharded) == vars(summarise(contents))
+    assert sharded.has_errors is True
+
+
+def test_with_request_context_of_its_own_doesnt_belong_to_whoever_started_it(app_, fake_uuid):
+    with app_.test_request_context(
+        '/events/services/{}/jobs/{}?status=sending'.format(fake_uuid, fake_uuid),
+        headers={'Cookie': 'notify_admin_session=abc'},
+    ) as request_context:
+        request_context.service_id = fake_uuid
+        request_context.user = 'whoever started it'
+        call = with_request_context_of_its_own(
+            lambda: (_request_ctx_stack.top, request.path, request.args.get('status'), request.cookies)
+        )
+
+    # long after the request which started it has finished
+    new_request_context, path, status, cookies = call()
+
+    assert new_request_context is not request_context
+    assert new_request_context.service_id == fake_uuid
+    assert not hasattr(new_request_context, 'user')
+    assert path == '/events/services/{}/jobs/{}'.format(fake_uuid, fake_uuid)
+    assert status == 'sending'
+    assert cookies == {}